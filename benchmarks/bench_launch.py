@@ -0,0 +1,319 @@
+"""
+@brief  Launch-latency benchmarks of dockerx, run offline against a local
+        stand-in of the Docker Engine API and a fake X11 server.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+
+@details Usage:
+
+    $ python3 benchmarks/bench_launch.py
+    $ python3 benchmarks/bench_launch.py --json results.json
+    $ python3 benchmarks/bench_launch.py --compare results.json --tolerance 0.5
+
+         With '--compare', the script exits with status 1 if the median of
+         any benchmark is more than 'tolerance' (relative) slower than in the
+         baseline, so it can be used to catch regressions in CI.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# The fake Docker Engine and X server live with the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'tests'))
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+from test_startup import imported_modules
+
+# My imports
+import dockerx
+import dockerx.probe
+import dockerx.xauth
+
+
+def summary(samples: list):
+    """@returns a dictionary of statistics (in seconds) of the samples."""
+    samples = sorted(samples)
+    return {
+        'iterations': len(samples),
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+        'mean': statistics.fmean(samples),
+    }
+
+
+def bench(func, iterations: int, setup=None):
+    """
+    @brief Measures the latency of 'func()'.
+    @param[in]  setup  Function called (untimed) before every iteration.
+    @returns the summary() of the latencies.
+    """
+    samples = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        tic = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - tic)
+    return summary(samples)
+
+
+def startup_time():
+    """
+    @returns the cumulative import time (in seconds) of the dockerx modules
+             imported by 'python -m dockerx.run --help'.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-m',
+        'dockerx.run', '--help'], capture_output=True, text=True, check=True,
+        timeout=60)
+    modules = imported_modules(proc.stderr)
+    return 1e-6 * sum(t for name, t in modules.items()
+                      if name == 'dockerx' or name.startswith('dockerx.'))
+
+
+def launched(results: list):
+    """@brief Raises the first error of a launch_many() batch."""
+    for res in results:
+        if not res.ok:
+            raise res.error
+    return results
+
+
+def in_parallel(func, n: int):
+    """@brief Calls 'func()' 'n' times from 'n' threads."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n) as ex:
+        for future in [ex.submit(func) for _ in range(n)]:
+            future.result()
+
+
+def throughput(func, n: int):
+    """@returns the summary of a call that launches 'n' containers, with the
+                throughput (containers per second) added."""
+    tic = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - tic
+    result = summary([elapsed])
+    result['throughput'] = n / elapsed
+    return result
+
+
+class Environment:
+    """
+    @brief Fake X servers (unix and TCP), Xauthority file and Docker Engine
+           for the benchmarks.
+    """
+
+    def __init__(self, engine_latency: float = 0.):
+        self.stack = contextlib.ExitStack()
+        self.tmpdir = self.stack.enter_context(tempfile.TemporaryDirectory())
+        self.engine = self.stack.enter_context(
+            FakeEngine(images=['ubuntu:latest'], latency=engine_latency))
+
+        # X server listening on a unix socket
+        self.unix_display = ':42'
+        self.stack.enter_context(FakeXServer(
+            path=dockerx.probe.unix_socket_path(42, self.tmpdir)))
+
+        # X server listening on TCP (e.g. an ssh -X forwarded display)
+        self.tcp_server = self.stack.enter_context(FakeXServer(port=0))
+        self.tcp_display = '127.0.0.1:' + str(self.tcp_server.port - 6000)
+
+        # Xauthority file with a cookie for the TCP display
+        self.xauthority = os.path.join(self.tmpdir, 'Xauthority')
+        entry = dockerx.xauth.XauthEntry(dockerx.xauth.FAMILY_INTERNET,
+            socket.inet_aton('127.0.0.1'),
+            str(self.tcp_server.port - 6000).encode(), b'MIT-MAGIC-COOKIE-1',
+            os.urandom(16))
+        dockerx.xauth.write_entries(self.xauthority, [entry])
+
+        self.saved = (dict(os.environ), dockerx.DockerLauncher.x11_socket_dir,
+                      dockerx.DockerLauncher.xauth_files)
+        os.environ['XAUTHORITY'] = self.xauthority
+        dockerx.DockerLauncher.x11_socket_dir = self.tmpdir
+        dockerx.DockerLauncher.xauth_files = dockerx.xauth.XauthFileStore(
+            os.path.join(self.tmpdir, 'xauth'))
+
+    def launcher(self, max_pool_size: int = 10):
+        import docker
+        dl = dockerx.DockerLauncher()
+        dl.client = docker.DockerClient(base_url=self.engine.base_url,
+            version=FakeEngine.api_version, max_pool_size=max_pool_size)
+        return dl
+
+    def display(self, display: str):
+        os.environ['DISPLAY'] = display
+        dockerx.DockerLauncher.x11_cache.invalidate()
+
+    def close(self):
+        os.environ.clear()
+        os.environ.update(self.saved[0])
+        dockerx.DockerLauncher.x11_socket_dir = self.saved[1]
+        dockerx.DockerLauncher.xauth_files = self.saved[2]
+        dockerx.DockerLauncher.x11_cache.invalidate()
+        self.stack.close()
+
+
+def run(iterations: int = 50, concurrency: int = 16,
+        engine_latency: float = 0.005):
+    """
+    @brief Runs all the benchmarks.
+    @returns a dictionary {benchmark name: summary}.
+    """
+    results = {}
+
+    # Import time of the CLI, each sample is a new interpreter
+    results['startup[dockerx.run --help]'] = summary([startup_time()
+        for _ in range(min(iterations, 10))])
+
+    env = Environment(engine_latency)
+    dl_class = dockerx.DockerLauncher
+    try:
+        # Parsing of the DISPLAY and network interfaces
+        env.display(env.tcp_display)
+        results['get_ip_from_display'] = bench(dl_class.get_ip_from_display,
+            iterations)
+        results['get_ip_from_interface'] = bench(
+            lambda: dl_class.get_ip_from_interface('lo'), iterations)
+        results['host_network.refresh'] = bench(
+            dl_class.host_network.refresh, iterations)
+
+        # Detection of the X server
+        results['get_x11_server_socket_type[tcp]'] = bench(
+            dl_class.get_x11_server_socket_type, iterations)
+        env.display(env.unix_display)
+        results['get_x11_server_socket_type[unix]'] = bench(
+            dl_class.get_x11_server_socket_type, iterations)
+
+        # Preparation of the environment, with and without cache
+        for name, display in (('unix', env.unix_display),
+                              ('tcp', env.tcp_display)):
+            env.display(display)
+            results['prepare_environment[' + name + ',cold]'] = bench(
+                lambda: dl_class.prepare_environment('lo', False, {}, {}, None,
+                    use_cache=False), iterations)
+            results['prepare_environment[' + name + ',cached]'] = bench(
+                lambda: dl_class.prepare_environment('lo', False, {}, {},
+                    None), iterations)
+
+        # Concurrent uncached preparations of the TCP environment, they all
+        # share the Xauthority file of the display instead of rewriting it
+        env.display(env.tcp_display)
+        results['prepare_environment[tcp,cold,n=' + str(concurrency) + ']'] = \
+            throughput(lambda: in_parallel(lambda: dl_class.prepare_environment(
+                'lo', False, {}, {}, None, use_cache=False), concurrency),
+                concurrency)
+
+        # End-to-end launch of a single container
+        dl = env.launcher()
+        for name, display in (('unix', env.unix_display),
+                              ('tcp', env.tcp_display)):
+            env.display(display)
+            results['launch_container[' + name + ']'] = bench(
+                lambda: dl.launch_container('ubuntu', ifname='lo',
+                    command='sleep infinity'), iterations)
+
+        # N-way concurrent launches
+        dl = env.launcher(max_pool_size=concurrency)
+        specs = [{'image_name': 'ubuntu', 'ifname': 'lo'}
+                 for _ in range(concurrency)]
+        for name, display in (('unix', env.unix_display),
+                              ('tcp', env.tcp_display)):
+            env.display(display)
+            results['launch_many[' + name + ',n=' + str(concurrency) + ']'] = \
+                throughput(lambda: launched(dl.launch_many(specs,
+                    max_workers=concurrency)), concurrency)
+
+        # Overhead of the telemetry: recording and exporting the samples,
+        # and launching while the stats of the launched containers stream
+        env.engine.stats_interval = 0.05
+        collector = dockerx.StatsCollector(dl, max_streams=4, dwell=0.2)
+        collector.sync()
+        cid = dl.registry.records()[-1].id
+        stats = env.engine.stats_sample(env.engine.find_container(cid))
+        results['telemetry.record'] = bench(
+            lambda: collector.record(cid, stats), iterations)
+        for record in dl.registry.records():
+            collector.record(record.id, stats)
+        results['telemetry.prometheus[n=' + str(len(dl.registry)) + ']'] = \
+            bench(collector.prometheus, iterations)
+        env.display(env.unix_display)
+        with collector:
+            results['launch_many[unix,n=' + str(concurrency) \
+                    + ',telemetry]'] = throughput(lambda: launched(
+                        dl.launch_many(specs, max_workers=concurrency)),
+                    concurrency)
+    finally:
+        env.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """@returns the list of benchmarks slower than the baseline."""
+    regressions = []
+    for name, result in results.items():
+        if name in baseline:
+            ref = baseline[name]['median']
+            if result['median'] > ref * (1. + tolerance):
+                regressions.append((name, ref, result['median']))
+    return regressions
+
+
+def print_table(results: dict, out=sys.stdout):
+    width = max(len(name) for name in results)
+    out.write('%-*s %10s %10s %10s %12s\n' % (width, 'benchmark', 'min (ms)',
+        'median', 'p95', 'launches/s'))
+    for name, r in results.items():
+        out.write('%-*s %10.3f %10.3f %10.3f %12s\n' % (width, name,
+            1e3 * r['min'], 1e3 * r['median'], 1e3 * r['p95'],
+            '%.1f' % r['throughput'] if 'throughput' in r else '-'))
+
+
+def parse_command_line_parameters(argv=None):
+    parser = argparse.ArgumentParser(description='dockerx launch benchmarks')
+    parser.add_argument('--iterations', type=int, default=50,
+                        help='Iterations of each latency benchmark.')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Containers launched concurrently.')
+    parser.add_argument('--engine-latency', type=float, default=0.005,
+                        help='Seconds added to each fake Engine API request.')
+    parser.add_argument('--json', default=None,
+                        help='Write the results to this JSON file.')
+    parser.add_argument('--compare', default=None,
+                        help='Baseline JSON file to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed relative slowdown of the median.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line_parameters(argv)
+    results = run(args.iterations, args.concurrency, args.engine_latency)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, ref, new in regressions:
+            sys.stderr.write('[REGRESSION] %s: %.3f ms -> %.3f ms\n' % (name,
+                1e3 * ref, 1e3 * new))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
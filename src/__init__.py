@@ -6,4 +6,38 @@ if sys.version_info < (3, 9):
     error_msg = '[ERROR] The dockerx package requires at least Python 3.9.'
     raise RuntimeError(error_msg)
 
-from .dl import *
+# The public names are imported lazily (PEP 562) on first access, so that
+# 'import dockerx' and 'python -m dockerx.run --help' do not pay for the
+# import of the docker SDK or asyncio
+_lazy_names = {
+    'DockerLauncher'      : 'dl',
+    'LaunchResult'        : 'dl',
+    'X11EnvironmentCache' : 'cache',
+    'Tracer'              : 'tracing',
+    'ContainerPool'       : 'pool',
+    'ContainerRegistry'   : 'registry',
+    'EventMonitor'        : 'events',
+    'X11Relay'            : 'relay',
+    'ClusterLauncher'     : 'cluster',
+    'StatsCollector'      : 'telemetry',
+    'AsyncDockerLauncher' : 'aio',
+    'AsyncEngineClient'   : 'aio',
+    'EngineAPIError'      : 'aio',
+}
+
+__all__ = list(_lazy_names)
+
+
+def __getattr__(name):
+    if name in _lazy_names:
+        import importlib
+        module = importlib.import_module('.' + _lazy_names[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module ' + repr(__name__) + ' has no attribute ' \
+        + repr(name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,380 @@
+##
+# @brief  asyncio-native launcher of docker containers with X11 support.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+
+import os
+import json
+import shlex
+import shutil
+import asyncio
+import urllib.parse
+
+# My imports
+from .dl import DockerLauncher
+from .registry import LABEL, OWNER_LABEL
+from .numa import parse_size
+from . import probe
+from . import x11env
+
+
+class EngineAPIError(Exception):
+    """@brief Error response of the Docker Engine API."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__('[ERROR] Docker Engine API returned ' + str(status) \
+            + ': ' + message)
+        self.status = status
+        self.message = message
+
+
+class AsyncEngineClient:
+    """
+    @brief Minimal asyncio HTTP/1.1 client of the Docker Engine API over a
+           unix socket.
+
+    @details Connections are kept alive and reused, and at most
+             'max_connections' requests are in flight at the same time.
+    """
+
+    def __init__(self, base_url: str = None, api_version: str = '1.41',
+            max_connections: int = 8, timeout: float = 60.):
+        """
+        @param[in]  base_url         URL of the Engine API, by default the
+                                     DOCKER_HOST environment variable or
+                                     'unix:///var/run/docker.sock'.
+        @param[in]  api_version      Version of the Engine API to use.
+        @param[in]  max_connections  Maximum number of concurrent requests.
+        @param[in]  timeout          Timeout (in seconds) of each request.
+        """
+        if base_url is None:
+            base_url = os.environ.get('DOCKER_HOST',
+                'unix:///var/run/docker.sock')
+        if not base_url.startswith('unix://'):
+            raise ValueError('[ERROR] AsyncEngineClient only supports ' \
+                + 'unix:// Docker hosts, got: ' + base_url)
+        self.socket_path = base_url[len('unix://'):]
+        self.api_version = api_version
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle = []
+        self._semaphore = None
+
+    async def _connect(self):
+        if self._idle:
+            return self._idle.pop(), True
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        return (reader, writer), False
+
+    @staticmethod
+    async def _read_response(reader):
+        """@returns a tuple (status, headers, body, keep_alive)."""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by the engine')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                body += await reader.readexactly(size)
+                await reader.readline()
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        elif status in (204, 304):
+            body = b''
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, headers, body, keep_alive
+
+    async def request(self, method: str, path: str, params: dict = None,
+            body=None):
+        """
+        @brief Sends a request to the Engine API.
+
+        @param[in]  method  HTTP method, e.g. 'POST'.
+        @param[in]  path    Path of the endpoint, e.g. '/containers/create'.
+        @param[in]  params  Dictionary of query parameters.
+        @param[in]  body    Object sent as JSON in the body of the request.
+
+        @returns the decoded JSON response, or None if it was empty.
+                 Streamed JSON responses (e.g. pulls) are returned as a list.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        url = '/v' + self.api_version + path
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        payload = b'' if body is None else json.dumps(body).encode()
+        head = method + ' ' + url + ' HTTP/1.1\r\nHost: docker\r\n' \
+            + 'Content-Type: application/json\r\n' \
+            + 'Content-Length: ' + str(len(payload)) + '\r\n\r\n'
+
+        async with self._semaphore:
+            for attempt in range(2):
+                (reader, writer), reused = await self._connect()
+                try:
+                    writer.write(head.encode('latin-1') + payload)
+                    await writer.drain()
+                    status, headers, raw, keep_alive = await asyncio.wait_for(
+                        self._read_response(reader), self.timeout)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # The engine may have closed an idle connection
+                    if not reused or attempt:
+                        raise
+                except BaseException:
+                    writer.close()
+                    raise
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+
+        data = None
+        if raw and 'json' in headers.get('content-type', ''):
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                data = [json.loads(line) for line in raw.splitlines()
+                    if line.strip()]
+        if status >= 400:
+            message = data.get('message', '') if isinstance(data, dict) \
+                else raw.decode('utf-8', 'replace')
+            raise EngineAPIError(status, message)
+        if isinstance(data, list):
+            errors = [m for m in data if isinstance(m, dict) and 'error' in m]
+            if errors:
+                raise EngineAPIError(status, errors[-1]['error'])
+        return data
+
+    async def close(self):
+        """@brief Closes the idle connections."""
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+class AsyncDockerLauncher:
+    """
+    @brief asyncio counterpart of DockerLauncher.
+
+    @details Nothing blocks the event loop: the X server is probed with
+             asyncio sockets, xhost runs as an asyncio subprocess and the
+             Docker Engine API is reached through an AsyncEngineClient. The
+             X11 setup is shared with DockerLauncher.x11_cache.
+    """
+
+    def __init__(self, base_url: str = None, max_concurrency: int = 8,
+            api_version: str = '1.41', owner: str = None):
+        """
+        @param[in]  base_url         URL of the Docker Engine API, see
+                                     AsyncEngineClient.
+        @param[in]  max_concurrency  Maximum number of concurrent requests to
+                                     the Docker Engine API.
+        @param[in]  api_version      Version of the Engine API to use.
+        @param[in]  owner            Value of the 'dockerx.owner' label, see
+                                     DockerLauncher.
+        """
+        self.engine = AsyncEngineClient(base_url, api_version,
+            max_connections=max_concurrency)
+        self.owner = owner if owner is not None \
+            else DockerLauncher.default_owner()
+        self.launched_containers = []
+        self._xauth_paths = {}  # Container id -> Xauthority files mounted
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """@brief Closes the connections to the Docker Engine API."""
+        await self.engine.close()
+
+    @staticmethod
+    async def get_x11_server_socket_type(unix_socket_dir: str = None,
+            timeout: float = None):
+        """
+        @brief Non-blocking version of
+               DockerLauncher.get_x11_server_socket_type().
+        """
+        if unix_socket_dir is None:
+            unix_socket_dir = DockerLauncher.x11_socket_dir
+        if timeout is None:
+            timeout = DockerLauncher.probe_timeout
+        result = await probe.aprobe_display(x11env.get('DISPLAY'),
+            unix_socket_dir, timeout)
+        return result.transport
+
+    @staticmethod
+    async def x11_setup(ifname: str, use_cache: bool = True):
+        """@brief Non-blocking version of DockerLauncher.x11_setup()."""
+        if use_cache:
+            x11 = DockerLauncher.x11_cache.lookup(ifname)
+            if x11 is not None:
+                return x11
+
+        socket_type = await AsyncDockerLauncher.get_x11_server_socket_type()
+        if socket_type == 'unix' and shutil.which('xhost'):
+            proc = await asyncio.create_subprocess_exec('xhost',
+                '+SI:localuser:root', stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL, env=x11env.environ())
+            await proc.wait()
+
+        # It may read and write Xauthority files, or start a relay
+        x11 = await asyncio.to_thread(DockerLauncher.x11_setup_for,
+            socket_type, ifname, xhost=False)
+
+        if use_cache:
+            DockerLauncher.x11_cache.store(ifname, x11)
+        return x11
+
+    @staticmethod
+    async def prepare_environment(ifname: str, nvidia_runtime: bool,
+            additional_volumes: dict, additional_env_vars: dict,
+            network: str, use_cache: bool = True, shm=False, 
+            shm_size=None):
+        """@brief Non-blocking version of DockerLauncher.prepare_environment()."""
+        x11 = await AsyncDockerLauncher.x11_setup(ifname, use_cache)
+        return DockerLauncher.build_options(x11, nvidia_runtime,
+            additional_volumes, additional_env_vars, network, shm, shm_size)
+
+    @staticmethod
+    def create_body(image_name: str, command: str, docker_options: dict):
+        """
+        @brief Converts the docker options produced by prepare_environment()
+               into the body of a POST /containers/create request.
+        """
+        options = dict(docker_options)
+        host_config = {}
+        body = {'Image': image_name, 'HostConfig': host_config}
+        if command is not None:
+            body['Cmd'] = shlex.split(command) if isinstance(command, str) \
+                else list(command)
+        env = options.pop('environment', {})
+        body['Env'] = [str(k) + '=' + str(v) for k, v in env.items()]
+        binds = []
+        for src, vol in options.pop('volumes', {}).items():
+            binds.append(src + ':' + vol['bind'] + ':' + vol.get('mode', 'rw'))
+        host_config['Binds'] = binds
+        if 'runtime' in options:
+            host_config['Runtime'] = options.pop('runtime')
+        if 'network' in options:
+            host_config['NetworkMode'] = options.pop('network')
+        if 'ipc_mode' in options:
+            host_config['IpcMode'] = options.pop('ipc_mode')
+        if 'shm_size' in options:
+            host_config['ShmSize'] = parse_size(options.pop('shm_size'))
+        if 'labels' in options:
+            body['Labels'] = options.pop('labels')
+        if options:
+            raise ValueError('[ERROR] Unsupported docker options: ' \
+                + ', '.join(sorted(options)))
+        return body
+
+    @staticmethod
+    def split_image_name(image_name: str):
+        """@returns a tuple (repository, tag) for an image name."""
+        repo, sep, tag = image_name.rpartition(':')
+        if not sep or '/' in tag:
+            return image_name, 'latest'
+        return repo, tag
+
+    async def pull(self, image_name: str):
+        """@brief Pulls an image from its registry."""
+        repo, tag = AsyncDockerLauncher.split_image_name(image_name)
+        await self.engine.request('POST', '/images/create',
+            {'fromImage': repo, 'tag': tag})
+
+    async def launch_container(self, image_name: str,
+            ifname: str = 'docker0', nvidia_runtime: bool = False,
+            volumes: dict = {}, env_vars: dict = {}, command: str = None,
+            name=None, network: str = None, shm=False, shm_size=None):
+        """
+        @brief Launch a Docker container, see DockerLauncher.launch_container()
+               for the description of the parameters.
+        @returns the id of the container launched.
+        """
+        docker_options = await AsyncDockerLauncher.prepare_environment(ifname,
+            nvidia_runtime, volumes, env_vars, network, shm=shm, 
+            shm_size=shm_size)
+        docker_options['labels'] = {LABEL: 'true', OWNER_LABEL: self.owner}
+        body = AsyncDockerLauncher.create_body(image_name, command,
+            docker_options)
+
+        # Create the container, pulling the image if it is missing
+        try:
+            resp = await self.engine.request('POST', '/containers/create',
+                {'name': name}, body)
+        except EngineAPIError as e:
+            # Other 404s, e.g. of a missing network, are not fixed by a pull
+            if e.status != 404 or not e.message.startswith('No such image'):
+                raise
+            await self.pull(image_name)
+            resp = await self.engine.request('POST', '/containers/create',
+                {'name': name}, body)
+        container_id = resp['Id']
+
+        # Keep the Xauthority file of the container until it is removed,
+        # the files are shared with the DockerLaunchers of the process
+        xauth_paths = [src for src in docker_options.get('volumes', {})
+                       if DockerLauncher.xauth_files.owns(src)]
+        for path in xauth_paths:
+            DockerLauncher.xauth_files.acquire(path)
+        self._xauth_paths[container_id] = xauth_paths
+
+        # Start the container
+        try:
+            await self.engine.request('POST', '/containers/' + container_id \
+                + '/start')
+        except BaseException:
+            self._release(container_id)
+            try:
+                await self.engine.request('DELETE', '/containers/' \
+                    + container_id, {'force': 'true'})
+            except Exception:
+                pass
+            raise
+
+        self.launched_containers.append(container_id)
+        return container_id
+
+    def _release(self, container_id: str):
+        """@brief Releases the Xauthority files mounted in a container."""
+        for path in self._xauth_paths.pop(container_id, []):
+            DockerLauncher.xauth_files.release(path)
+
+    async def inspect(self, container_id: str):
+        """@returns the dictionary of attributes of a container."""
+        return await self.engine.request('GET',
+            '/containers/' + container_id + '/json')
+
+    async def stop(self, container_id: str, timeout: int = 10):
+        """@brief Stops a container, killing it after 'timeout' seconds."""
+        await self.engine.request('POST', '/containers/' + container_id \
+            + '/stop', {'t': timeout})
+
+    async def remove(self, container_id: str, force: bool = False):
+        """@brief Removes a container."""
+        await self.engine.request('DELETE', '/containers/' + container_id,
+            {'force': 'true' if force else 'false'})
+        self._release(container_id)
+        if container_id in self.launched_containers:
+            self.launched_containers.remove(container_id)
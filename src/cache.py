@@ -0,0 +1,124 @@
+##
+# @brief  Cache of the X11 setup detected by the DockerLauncher.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+
+import os
+import copy
+import time
+import threading
+
+# My imports
+from . import x11env
+
+
+class X11EnvironmentCache:
+    """
+    @brief Process-wide cache of the output of DockerLauncher.x11_setup().
+
+    @details Detecting the X11 server involves parsing the DISPLAY, probing
+             sockets, resolving hostnames and running xhost/xauth. The
+             result only changes when the DISPLAY, the network interface or
+             the Xauthority file change, so these are used as the cache key.
+             Entries also expire after 'ttl' seconds, and can be dropped
+             explicitly with invalidate().
+    """
+
+    def __init__(self, ttl: float = 300.):
+        """
+        @param[in]  ttl  Time (in seconds) that a cached X11 setup is valid.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def xauthority_mtime():
+        """
+        @returns the modification time (in ns) of the Xauthority file of the
+                 user, or None if the file does not exist.
+        """
+        path = x11env.get('XAUTHORITY',
+            os.path.join(os.path.expanduser('~'), '.Xauthority'))
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def key(ifname: str):
+        """@returns the cache key of the X11 setup for 'ifname'."""
+        return (x11env.get('DISPLAY'), ifname,
+            X11EnvironmentCache.xauthority_mtime())
+
+    @staticmethod
+    def _still_valid(value: dict):
+        """
+        @returns False if any of the host files mounted by the cached setup
+                 (e.g. the Xauthority file) has disappeared. Otherwise, True.
+        """
+        return all(os.path.exists(src) for src in value['volumes'])
+
+    def lookup(self, ifname: str):
+        """
+        @returns a copy of the cached X11 setup for 'ifname', or None if it
+                 is not cached (or has expired).
+        """
+        key = X11EnvironmentCache.key(ifname)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None \
+                    and time.monotonic() - entry[0] < self.ttl \
+                    and X11EnvironmentCache._still_valid(entry[1]):
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self._entries.pop(key, None)
+            self.misses += 1
+        return None
+
+    def store(self, ifname: str, value: dict):
+        """
+        @brief Caches the X11 setup for 'ifname'.
+
+        @details A setup in which no X11 server was found is not cached, so
+                 that a server started later is detected in the next launch.
+        """
+        if value['transport'] is not None:
+            key = X11EnvironmentCache.key(ifname)
+            with self._lock:
+                self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+
+    def get(self, ifname: str, compute):
+        """
+        @brief Returns the X11 setup for 'ifname', computing it with
+               'compute(ifname)' if it is not cached.
+        @returns a copy of the cached dictionary, the caller can modify it.
+        """
+        value = self.lookup(ifname)
+        if value is None:
+            value = compute(ifname)
+            self.store(ifname, value)
+        return value
+
+    def invalidate(self, display: str = None):
+        """
+        @brief Drops the cached setups of 'display', or all of them if
+               'display' is None.
+        """
+        with self._lock:
+            if display is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == display]:
+                    del self._entries[key]
+
+    def stats(self):
+        """@returns a dictionary with the hits, misses and size of the cache."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries)}
+
+    def __len__(self):
+        return len(self._entries)
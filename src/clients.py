@@ -0,0 +1,112 @@
+##
+# @brief  Process-wide registry of Docker clients shared by the launchers.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details Each docker.from_env() creates a new HTTP session with its own
+#          pool of connections (10 by default), and negotiates the API
+#          version with the engine. The ClientRegistry creates one client
+#          per engine configuration (DOCKER_HOST, TLS settings, pool size,
+#          timeout and API version) and hands the same client to every
+#          launcher and thread, so their requests reuse the open
+#          (keep-alive) connections of a single, larger pool.
+
+import os
+import threading
+
+# Environment variables that select the engine and how to talk to it
+ENVIRONMENT_KEYS = ('DOCKER_HOST', 'DOCKER_TLS_VERIFY', 'DOCKER_CERT_PATH',
+                    'DOCKER_API_VERSION')
+
+
+class ClientRegistry:
+    """@brief Docker clients indexed by their configuration."""
+
+    def __init__(self, max_pool_size: int = 32, timeout: float = None):
+        """
+        @param[in]  max_pool_size  Default maximum number of connections
+                                   kept open to each engine, i.e. the
+                                   number of concurrent requests that do not
+                                   wait for a connection.
+        @param[in]  timeout        Default timeout (in seconds) of the
+                                   requests, None for the default of the
+                                   docker SDK.
+        """
+        self.max_pool_size = max_pool_size
+        self.timeout = timeout
+        self.created = 0
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def key(self, environment: dict = None, max_pool_size: int = None,
+            timeout: float = None, version: str = None):
+        """@returns the key of the client of a configuration."""
+        environment = os.environ if environment is None else environment
+        return (tuple(environment.get(k) for k in ENVIRONMENT_KEYS),
+            max_pool_size or self.max_pool_size,
+            timeout if timeout is not None else self.timeout, version)
+
+    def get(self, environment: dict = None, max_pool_size: int = None,
+            timeout: float = None, version: str = None):
+        """
+        @brief Returns the client of a configuration, it is created on first
+               use.
+
+        @param[in]  environment    Dictionary with the DOCKER_* variables,
+                                   by default os.environ.
+        @param[in]  max_pool_size  Maximum number of connections kept open,
+                                   by default self.max_pool_size.
+        @param[in]  timeout        Timeout of the requests, by default
+                                   self.timeout.
+        @param[in]  version        API version, None to negotiate it with
+                                   the engine.
+
+        @returns a docker.DockerClient.
+        """
+        key = self.key(environment, max_pool_size, timeout, version)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                import docker
+                _, max_pool_size, timeout, version = key
+                kwargs = {'max_pool_size': max_pool_size}
+                if timeout is not None:
+                    kwargs['timeout'] = timeout
+                if version is not None:
+                    kwargs['version'] = version
+                if environment is not None:
+                    kwargs['environment'] = environment
+                client = docker.from_env(**kwargs)
+                self._clients[key] = client
+                self.created += 1
+            return client
+
+    def discard(self, client):
+        """@brief Forgets (and closes) a client, e.g. after a fork."""
+        with self._lock:
+            for key in [k for k, c in self._clients.items() if c is client]:
+                del self._clients[key]
+        client.close()
+
+    def close(self):
+        """@brief Closes all the clients."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+# Registry used by the launchers that are not given a client
+registry = ClientRegistry()
+
+
+def get_client(**kwargs):
+    """
+    @brief Shortcut for dockerx.clients.registry.get().
+    @returns the shared docker.DockerClient of a configuration.
+    """
+    return registry.get(**kwargs)
@@ -0,0 +1,481 @@
+##
+# @brief  Placement of the containers across several Docker engines.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details A ClusterLauncher holds one DockerLauncher per engine (one
+#          DOCKER_HOST endpoint each) and places every launch on one of
+#          them according to a PlacementPolicy: the engine with the fewest
+#          running containers, the one with the most CPU and memory
+#          headroom, or one that already has the image. The load of each
+#          engine (a single /info request, plus the list of its images) is
+#          cached for 'ttl' seconds, and the launches placed since then are
+#          counted locally, so placing a container does not cost a round
+#          trip. The X11 setup is computed per engine: the engines of this
+#          host mount the X11 socket as usual, and the containers of remote
+#          engines reach the X server over TCP at the address of this host
+#          seen from theirs. Likewise, the CPUs pinned with cpuset='auto'
+#          are shared by the engines of this host, and each remote engine
+#          has an allocator of its own, sized by the 'NCPU' of its /info.
+
+import time
+import socket
+import threading
+import urllib.parse
+import concurrent.futures
+
+# My imports
+from .dl import DockerLauncher, LaunchResult
+from . import clients
+from . import numa
+
+
+def is_local(base_url: str):
+    """@returns True if the engine of a DOCKER_HOST runs on this host."""
+    return base_url.startswith(('unix://', 'npipe://', '/'))
+
+
+def route_address(host: str, port: int = 9):
+    """
+    @returns the address of this host used to reach 'host', i.e. the one
+             that a remote host sees. No packet is sent.
+    """
+    family, _, _, _, addr = socket.getaddrinfo(host, port,
+        type=socket.SOCK_DGRAM)[0]
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.connect(addr)
+        return sock.getsockname()[0]
+
+
+def remote_x11_setup(host: str, display: str = None):
+    """
+    @brief X11 setup of the containers of an engine that runs on another
+           host.
+
+    @details The X11 socket and the Xauthority file of this host cannot be
+             mounted in a remote container, so the containers connect to
+             the X server over TCP. The X server must listen on TCP and
+             accept the remote host (e.g. 'xhost +<host>').
+
+    @param[in]  host     Address of the host of the engine.
+    @param[in]  display  DISPLAY of the containers. By default, the address
+                         of this host seen from 'host' and the display
+                         number of the DISPLAY of this process.
+
+    @returns the same dictionary as DockerLauncher.x11_setup().
+    """
+    if display is None:
+        address = route_address(host)
+        if ':' in address:
+            address = '[' + address + ']'
+        display = address + ':' \
+            + str(DockerLauncher.get_port_offset_from_display())
+    return {'transport': 'tcp',
+            'environment': {'QT_X11_NO_MITSHM': 1, 'DISPLAY': display},
+            'volumes': {}}
+
+
+class EngineNode:
+    """@brief Docker engine of a cluster and its cached load."""
+
+    def __init__(self, name: str, base_url: str, launcher,
+            ifname: str = 'docker0', environment: dict = None,
+            registry=None):
+        """
+        @param[in]  name         Name of the engine, used in the results.
+        @param[in]  base_url     DOCKER_HOST of the engine.
+        @param[in]  launcher     DockerLauncher of the engine, without a
+                                 client, see connect().
+        @param[in]  ifname       Default network interface of its launches.
+        @param[in]  environment  Other DOCKER_* variables of the engine.
+        @param[in]  registry     dockerx.clients.ClientRegistry of the
+                                 client, by default the process-wide one.
+        """
+        self.name = name
+        self.base_url = base_url
+        self.launcher = launcher
+        self.ifname = ifname
+        self.environment = dict(environment or {}, DOCKER_HOST=base_url)
+        self.registry = registry if registry is not None \
+            else clients.registry
+        self.connected = False
+        self.local = is_local(base_url)
+        self.running = 0      # Running containers, from /info
+        self.ncpu = 0
+        self.mem_total = 0
+        self.placed = 0       # Launches placed since the last refresh
+        self.error = None     # Exception of the last refresh
+        self.stamp = None     # time.monotonic() of the last refresh
+        self.refreshes = 0
+        if not self.local:
+            launcher.cpu_allocator = numa.CpuAllocator(
+                topology=self.topology)
+
+    @property
+    def healthy(self):
+        """@returns True if the last refresh reached the engine."""
+        return self.stamp is not None and self.error is None
+
+    @property
+    def load(self):
+        """@returns the estimated number of containers running now."""
+        return self.running + self.placed
+
+    def connect(self):
+        """
+        @brief Gives the launcher the client of the engine. The client is
+               created on first use, as it contacts the engine to negotiate
+               the API version.
+        """
+        if not self.connected:
+            self.launcher.client = self.registry.get(
+                environment=self.environment)
+            self.connected = True
+
+    def refresh(self):
+        """@brief Reads the load and the images of the engine."""
+        try:
+            self.connect()
+            info = self.launcher.client.info()
+            self.launcher.images.refresh()
+        except Exception as e:
+            self.error = e
+        else:
+            self.running = info.get('ContainersRunning', 0)
+            self.ncpu = info.get('NCPU', 0)
+            self.mem_total = info.get('MemTotal', 0)
+            self.placed = 0
+            self.error = None
+        self.stamp = time.monotonic()
+        self.refreshes += 1
+
+    def topology(self):
+        """
+        @returns the list of dockerx.numa.NumaNode objects of the host of
+                 the engine, from its /info.
+        """
+        self.connect()
+        return numa.engine_topology(self.launcher.client.info())
+
+    def has_image(self, image_name: str):
+        """@returns True if the image is present in the engine."""
+        return self.launcher.images.present(image_name)
+
+    def __repr__(self):
+        return 'EngineNode(name=%r, load=%d, healthy=%r)' % (self.name,
+            self.load, self.healthy)
+
+
+class PlacementPolicy:
+    """
+    @brief Base class of the placement policies. The container is placed on
+           the healthy engine with the highest score, the first one of the
+           list in case of a tie.
+    """
+
+    name = 'policy'
+
+    def score(self, node: EngineNode, spec: dict):
+        """
+        @param[in]  node  Candidate engine.
+        @param[in]  spec  Keyword arguments of the launch.
+        @returns a number (or a tuple), higher is better.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return self.__class__.__name__ + '()'
+
+
+class LeastContainers(PlacementPolicy):
+    """@brief Places the container on the engine with the fewest running."""
+
+    name = 'least-containers'
+
+    def score(self, node: EngineNode, spec: dict):
+        return -node.load
+
+
+class Headroom(PlacementPolicy):
+    """
+    @brief Places the container on the engine with the largest fraction of
+           CPUs and memory left, assuming that each container uses 'cpus'
+           CPUs and 'memory' bytes.
+    """
+
+    name = 'headroom'
+
+    def __init__(self, cpus: float = 1., memory: int = 1 << 30):
+        """
+        @param[in]  cpus    CPUs used by a container.
+        @param[in]  memory  Bytes of memory used by a container.
+        """
+        self.cpus = cpus
+        self.memory = memory
+
+    def score(self, node: EngineNode, spec: dict):
+        used = node.load + 1
+        cpu = 1. - used * self.cpus / node.ncpu if node.ncpu else -1.
+        mem = 1. - used * self.memory / node.mem_total if node.mem_total \
+            else -1.
+        return min(cpu, mem)
+
+
+class ImageLocality(PlacementPolicy):
+    """
+    @brief Places the container on an engine that already has the image,
+           so that it does not wait for a pull. Ties are broken by another
+           policy.
+    """
+
+    name = 'image-locality'
+
+    def __init__(self, fallback: PlacementPolicy = None):
+        """
+        @param[in]  fallback  Policy among the engines that have (or that do
+                              not have) the image. By default,
+                              LeastContainers.
+        """
+        self.fallback = fallback if fallback is not None \
+            else LeastContainers()
+
+    def score(self, node: EngineNode, spec: dict):
+        return (node.has_image(spec['image_name']),
+                self.fallback.score(node, spec))
+
+
+# Policies that can be selected by name
+POLICIES = {policy.name: policy for policy in
+            (LeastContainers, Headroom, ImageLocality)}
+
+
+def parse_policy(policy):
+    """
+    @param[in]  policy  A PlacementPolicy or the name of one of POLICIES.
+    @returns a PlacementPolicy.
+    """
+    if isinstance(policy, PlacementPolicy):
+        return policy
+    if policy not in POLICIES:
+        raise ValueError('[ERROR] Unknown placement policy: ' + repr(policy) \
+            + '. Use one of: ' + ', '.join(sorted(POLICIES)) + '.')
+    return POLICIES[policy]()
+
+
+class ClusterLauncher:
+    """@brief Launches containers across several Docker engines."""
+
+    def __init__(self, engines: list, policy='least-containers',
+            ttl: float = 5., tracer=None, owner: str = None,
+            registry=None):
+        """
+        @param[in]  engines   List of engines, each one the DOCKER_HOST of
+                              the engine (e.g. 'tcp://10.0.0.5:2375') or a
+                              dictionary with the keys 'base_url', and
+                              optionally 'name', 'ifname' (network interface
+                              of the launches on that engine), 'display'
+                              (DISPLAY of its containers, for remote
+                              engines) and 'environment' (other DOCKER_*
+                              variables, e.g. the TLS settings).
+        @param[in]  policy    PlacementPolicy, or the name of one of
+                              POLICIES.
+        @param[in]  ttl       Seconds that the load of an engine is cached.
+        @param[in]  tracer    dockerx.tracing.Tracer of the launchers.
+        @param[in]  owner     Owner label of the containers, see
+                              DockerLauncher.
+        @param[in]  registry  dockerx.clients.ClientRegistry of the clients
+                              of the engines, by default the process-wide
+                              one.
+        """
+        if not engines:
+            raise ValueError('[ERROR] A cluster needs at least one engine.')
+        self.policy = parse_policy(policy)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.nodes = []
+        for engine in engines:
+            if isinstance(engine, str):
+                engine = {'base_url': engine}
+            base_url = engine['base_url']
+            x11_setup = None
+            if not is_local(base_url):
+                host = urllib.parse.urlparse(base_url).hostname
+                display = engine.get('display')
+                x11_setup = lambda ifname, host=host, display=display: \
+                    remote_x11_setup(host, display)
+            launcher = DockerLauncher(tracer=tracer, owner=owner,
+                x11_setup=x11_setup)
+            self.nodes.append(EngineNode(engine.get('name', base_url),
+                base_url, launcher, engine.get('ifname', 'docker0'),
+                engine.get('environment'), registry))
+        names = [node.name for node in self.nodes]
+        if len(set(names)) != len(names):
+            raise ValueError('[ERROR] The engines of a cluster must have ' \
+                + 'different names.')
+
+    def node(self, name: str):
+        """@returns the EngineNode called 'name'."""
+        for node in self.nodes:
+            if node.name == name:
+                return node
+        raise KeyError('[ERROR] Unknown engine: ' + repr(name))
+
+    def refresh(self, force: bool = False):
+        """
+        @brief Reads the load of the engines whose cached load expired (or
+               of all of them if 'force' is True), in parallel.
+        """
+        now = time.monotonic()
+        stale = [node for node in self.nodes if force or node.stamp is None
+                 or now - node.stamp >= self.ttl]
+        if len(stale) == 1:
+            stale[0].refresh()
+        elif stale:
+            with concurrent.futures.ThreadPoolExecutor(len(stale)) as ex:
+                list(ex.map(EngineNode.refresh, stale))
+
+    def invalidate(self):
+        """@brief Drops the cached load, the next placement refreshes it."""
+        for node in self.nodes:
+            node.stamp = None
+
+    def place(self, spec: dict):
+        """
+        @brief Chooses the engine of a launch, and counts the launch in its
+               load.
+        @param[in]  spec  Keyword arguments of the launch, with the key
+                          'image_name'.
+        @returns the EngineNode chosen.
+        """
+        self.refresh()
+        with self._lock:
+            healthy = [node for node in self.nodes if node.healthy]
+            if not healthy:
+                raise RuntimeError('[ERROR] No Docker engine of the cluster ' \
+                    + 'is reachable: ' + '; '.join(node.name + ': ' \
+                    + str(node.error) for node in self.nodes))
+            best = max(healthy, key=lambda node:
+                self.policy.score(node, spec))
+            best.placed += 1
+            return best
+
+    def pin(self, name: str):
+        """
+        @brief Places a launch on a given engine, regardless of the policy.
+        @returns the EngineNode called 'name'.
+        """
+        node = self.node(name)
+        with self._lock:
+            node.connect()
+            node.placed += 1
+        return node
+
+    def _unplace(self, node: EngineNode):
+        with self._lock:
+            node.placed = max(0, node.placed - 1)
+
+    def launch_container(self, image_name: str, engine: str = None,
+            return_result: bool = False, **kwargs):
+        """
+        @brief Launches a container on the engine chosen by the policy.
+        @param[in]  image_name     Name of the Docker image.
+        @param[in]  engine         Name of the engine to use instead of the
+                                   one chosen by the policy.
+        @param[in]  return_result  Return a LaunchResult, whose 'engine' is
+                                   the name of the engine chosen.
+        @param[in]  kwargs         Keyword arguments of
+                                   DockerLauncher.launch_container().
+        @returns the Docker container object of the container launched.
+        """
+        spec = dict(kwargs, image_name=image_name)
+        if engine is not None:
+            node = self.pin(engine)
+        else:
+            node = self.place(spec)
+        kwargs.setdefault('ifname', node.ifname)
+        try:
+            res = node.launcher.launch_container(image_name,
+                return_result=True, **kwargs)
+        except BaseException:
+            self._unplace(node)
+            raise
+        res.engine = node.name
+        return res if return_result else res.container
+
+    def launch_many(self, specs: list, max_workers: int = 8):
+        """
+        @brief Places a batch of launches and launches them concurrently.
+        @param[in]  specs        List of dictionaries with the keyword
+                                 arguments of launch_container() (the key
+                                 'engine' pins a container to an engine).
+        @param[in]  max_workers  Maximum number of containers being launched
+                                 at the same time on each engine.
+        @returns a list of LaunchResult objects in the same order as 'specs'.
+        """
+        results = [None] * len(specs)
+        groups = {}
+        for i, spec in enumerate(specs):
+            spec = dict(spec)
+            try:
+                if 'image_name' not in spec:
+                    raise TypeError('[ERROR] The launch options must ' \
+                        + 'contain an \'image_name\'.')
+                engine = spec.pop('engine', None)
+                if engine is not None:
+                    node = self.pin(engine)
+                else:
+                    node = self.place(spec)
+            except Exception as e:
+                results[i] = LaunchResult(spec, error=e)
+                continue
+            spec.setdefault('ifname', node.ifname)
+            groups.setdefault(node.name, (node, []))[1].append((i, spec))
+
+        def launch(group):
+            node, items = group
+            batch = node.launcher.launch_many([spec for _, spec in items],
+                max_workers=max_workers)
+            for (i, _), res in zip(items, batch):
+                res.engine = node.name
+                if not res.ok:
+                    self._unplace(node)
+                results[i] = res
+
+        if groups:
+            with concurrent.futures.ThreadPoolExecutor(len(groups)) as ex:
+                list(ex.map(launch, groups.values()))
+        return results
+
+    def _bulk(self, method: str, kwargs: dict):
+        with concurrent.futures.ThreadPoolExecutor(len(self.nodes)) as ex:
+            batches = list(ex.map(lambda node:
+                getattr(node.launcher, method)(**kwargs), self.nodes))
+        results = {}
+        for batch in batches:
+            results.update(batch)
+        return results
+
+    def stop_all(self, **kwargs):
+        """
+        @brief DockerLauncher.stop_all() on every engine, in parallel.
+        @returns a dictionary {container id: None or exception} with the
+                 containers of all the engines.
+        """
+        return self._bulk('stop_all', kwargs)
+
+    def remove_all(self, **kwargs):
+        """
+        @brief DockerLauncher.remove_all() on every engine, in parallel.
+        @returns a dictionary {container id: None or exception} with the
+                 containers of all the engines.
+        """
+        return self._bulk('remove_all', kwargs)
+
+    def stats(self):
+        """@returns a dictionary {engine name: cached load of the engine}."""
+        with self._lock:
+            return {node.name: {'running': node.running,
+                'placed': node.placed, 'ncpu': node.ncpu,
+                'mem_total': node.mem_total, 'healthy': node.healthy,
+                'error': None if node.error is None else str(node.error)}
+                for node in self.nodes}
@@ -0,0 +1,483 @@
+##
+# @brief  Resident dockerx daemon, and the client used by dockerx.run.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details Every 'python -m dockerx.run' pays for the interpreter, the import
+#          of the docker SDK, the negotiation of the API version with the
+#          engine and the detection of the X server before the container is
+#          created. The daemon pays for them once: it keeps a DockerLauncher
+#          (with its client, image index, X11 cache and container registry)
+#          alive and listens on a unix socket, so a launch from the shell
+#          costs one round trip on the socket plus the calls to the engine.
+#
+#          The protocol is one JSON object per line. A request is
+#          {"op": <name>, "args": {...}, "env": {"DISPLAY": ...,
+#          "XAUTHORITY": ...}, "engine": {"DOCKER_HOST": ...}} and the
+#          response is {"ok": true, "result": ...} or {"ok": false,
+#          "error": <message>, "type": <exception>}. The X11 variables of
+#          the client are applied with dockerx.x11env.override(), so every
+#          shell gets the containers on its own display. The daemon only
+#          talks to the engine of its own DOCKER_* variables, so it refuses
+#          the requests of clients that select another engine (dockerx.run
+#          then launches by itself). Only processes of the same user (or
+#          root) are served.
+#
+#          The client part of this module only needs the standard library,
+#          so that dockerx.run stays cheap to start when it talks to a
+#          daemon. Start the daemon with 'python -m dockerx.daemon'.
+
+import os
+import sys
+import json
+import time
+import errno
+import signal
+import socket
+import struct
+import argparse
+import tempfile
+import threading
+
+# My imports
+from . import x11env
+
+# Environment variable with the path of the socket of the daemon
+SOCKET_VARIABLE = 'DOCKERX_DAEMON_SOCKET'
+
+# Environment variables that select the Docker engine
+ENGINE_KEYS = ('DOCKER_HOST', 'DOCKER_CONTEXT', 'DOCKER_TLS_VERIFY',
+               'DOCKER_CERT_PATH')
+
+# Operations that talk to the Docker engine
+ENGINE_OPS = ('launch', 'launch_many', 'prefetch')
+
+
+def engine_environment():
+    """
+    @returns the dictionary with the variables of ENGINE_KEYS that are set
+             in this process.
+    """
+    return {key: os.environ[key] for key in ENGINE_KEYS
+            if os.environ.get(key)}
+
+
+def default_socket_path():
+    """
+    @returns the path of the socket of the daemon: $DOCKERX_DAEMON_SOCKET,
+             or 'dockerx.sock' in $XDG_RUNTIME_DIR, or else 'daemon.sock'
+             in a private folder of the temporary directory.
+    """
+    path = os.environ.get(SOCKET_VARIABLE)
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'dockerx.sock')
+    return os.path.join(tempfile.gettempdir(),
+        'dockerx-' + str(os.getuid()), 'daemon.sock')
+
+
+def peer_credentials(sock: socket.socket):
+    """@returns (pid, uid, gid) of the peer of a unix socket (Linux)."""
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize('3i'))
+    return struct.unpack('3i', creds)
+
+
+class DaemonError(RuntimeError):
+    """@brief Error raised by a request in the daemon."""
+
+    def __init__(self, message: str, type_name: str = 'RuntimeError'):
+        """
+        @param[in]  message    Message of the exception raised in the daemon.
+        @param[in]  type_name  Name of its class, e.g. 'ImageNotFound'.
+        """
+        super().__init__(message)
+        self.type_name = type_name
+
+
+class DaemonClient:
+    """@brief Connection to a running dockerx daemon."""
+
+    def __init__(self, socket_path: str = None, timeout: float = None):
+        """
+        @param[in]  socket_path  Socket of the daemon, by default the one of
+                                 default_socket_path().
+        @param[in]  timeout      Seconds to wait for each response, by
+                                 default forever (a launch may wait for
+                                 the readiness of the container).
+        """
+        self.socket_path = socket_path if socket_path is not None \
+            else default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        """
+        @brief Connects to the daemon. Raises OSError if no daemon listens
+               on the socket.
+        @returns self.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(self.timeout)
+        self._sock = sock
+        self._file = sock.makefile('rb')
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def __enter__(self):
+        return self if self._sock is not None else self.connect()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def request(self, op: str, **args):
+        """
+        @brief Sends a request with the DISPLAY and XAUTHORITY (and the
+               DOCKER_* variables) of this process and waits for its
+               response.
+        @param[in]  op    Name of the operation, e.g. 'launch'.
+        @param[in]  args  Arguments of the operation.
+        @returns the result of the operation. Raises TimeoutError or
+                 DaemonError if it failed in the daemon.
+        """
+        if self._sock is None:
+            self.connect()
+        message = {'op': op, 'args': args, 'env': x11env.current(),
+                   'engine': engine_environment()}
+        self._sock.sendall(json.dumps(message).encode() + b'\n')
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise ConnectionError('[ERROR] The dockerx daemon closed the ' \
+                + 'connection.')
+        response = json.loads(line)
+        if response['ok']:
+            return response['result']
+        if response.get('type') == 'TimeoutError':
+            raise TimeoutError(response['error'])
+        raise DaemonError(response['error'], response.get('type'))
+
+    def ping(self):
+        """
+        @returns the pid, the uptime and the DOCKER_* variables (see
+                 engine_environment()) of the daemon.
+        """
+        return self.request('ping')
+
+    def same_engine(self):
+        """
+        @returns True if the daemon launches on the Docker engine selected
+                 by the DOCKER_* variables of this process.
+        """
+        return self.ping().get('engine', {}) == engine_environment()
+
+    def launch(self, **kwargs):
+        """
+        @brief Launches a container in the daemon.
+        @param[in]  kwargs  Arguments of DockerLauncher.launch_container().
+        @returns the dictionary of dockerx.run.launch_result().
+        """
+        return self.request('launch', **kwargs)
+
+    def launch_many(self, specs: list, max_workers: int = 8):
+        """@returns the list of dictionaries of dockerx.run.launch_result()."""
+        return self.request('launch_many', specs=specs,
+                            max_workers=max_workers)
+
+    def prefetch(self, image_names: list):
+        """@returns a dictionary {image name: image id or DaemonError}."""
+        result = self.request('prefetch', image_names=image_names)
+        return {name: r['id'] if 'id' in r else DaemonError(r['error'])
+                for name, r in result.items()}
+
+    def stats(self):
+        """@returns the counters of the daemon, see Daemon.op_stats()."""
+        return self.request('stats')
+
+    def shutdown(self):
+        """@brief Stops the daemon (the containers keep running)."""
+        return self.request('shutdown')
+
+
+def connect(socket_path: str = None, timeout: float = None):
+    """
+    @returns a connected DaemonClient, or None if no daemon is running (so
+             that the caller can launch the containers by itself).
+    """
+    try:
+        return DaemonClient(socket_path, timeout).connect()
+    except OSError:
+        return None
+
+
+class Daemon:
+    """@brief Server that launches containers for the dockerx clients."""
+
+    def __init__(self, socket_path: str = None, launcher=None):
+        """
+        @param[in]  socket_path  Path of the socket, by default the one of
+                                 default_socket_path().
+        @param[in]  launcher     DockerLauncher that launches the containers.
+                                 By default, a new one with a tracer (for
+                                 the timings of the launches).
+        """
+        self.socket_path = socket_path if socket_path is not None \
+            else default_socket_path()
+        if launcher is None:
+            from .dl import DockerLauncher
+            from .tracing import Tracer
+            launcher = DockerLauncher(tracer=Tracer())
+        self.launcher = launcher
+        self.engine = engine_environment()
+        self.started = None
+        self.requests = 0
+        self.errors = 0
+        self._sock = None
+        self._thread = None
+        self._conns = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._sock is not None and not self._stop.is_set()
+
+    def start(self, warm: bool = True):
+        """
+        @brief Binds the socket and serves the clients in a background
+               thread. Raises RuntimeError if another daemon is already
+               listening on the socket.
+        @param[in]  warm  Create the client, read the local images and adopt
+                          the containers of previous runs before serving.
+        @returns self.
+        """
+        other = connect(self.socket_path, timeout=1.)
+        if other is not None:
+            other.close()
+            raise RuntimeError('[ERROR] A dockerx daemon is already ' \
+                + 'listening on ' + self.socket_path + '.')
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        try:
+            os.unlink(self.socket_path)  # Left by a daemon that crashed
+        except FileNotFoundError:
+            pass
+        if warm:
+            self.warm()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(64)
+        self._sock = sock
+        self._stop.clear()
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._serve, daemon=True,
+                                        name='dockerx-daemon')
+        self._thread.start()
+        return self
+
+    def warm(self):
+        """
+        @brief Pays the startup costs of the launcher in advance. An engine
+               that is not reachable yet is not an error, the client is
+               then created by the first launch.
+
+        @details The image index stays valid for the life of the daemon:
+                 images built, tagged or loaded later (and images launched
+                 by id) are looked up in the engine when they are not in
+                 the index, see ImageIndex.missing().
+        """
+        try:
+            self.launcher.images.refresh()
+            self.launcher.adopt()
+        except Exception as e:
+            sys.stderr.write('[WARN] dockerx daemon: the Docker engine is ' \
+                + 'not reachable yet: ' + str(e) + '\n')
+
+    def close(self):
+        """@brief Stops serving and deletes the socket."""
+        self._stop.set()
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None \
+                and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def wait(self):
+        """@brief Blocks until the daemon is closed (e.g. by 'shutdown')."""
+        self._stop.wait()
+
+    def __enter__(self):
+        return self if self._sock is not None else self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                return
+            threading.Thread(target=self._handle, args=(conn,),
+                             daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        """@brief Serves the requests of a client until it disconnects."""
+        with self._lock:
+            self._conns.add(conn)
+        try:
+            _, uid, _ = peer_credentials(conn)
+            if uid not in (os.getuid(), 0):
+                return
+            with conn.makefile('rb') as f:
+                for line in f:
+                    response = self.dispatch(line)
+                    conn.sendall(json.dumps(response).encode() + b'\n')
+                    if response.get('result') == 'shutdown':
+                        threading.Thread(target=self.close,
+                                         daemon=True).start()
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._conns.discard(conn)
+            conn.close()
+
+    def dispatch(self, line: bytes):
+        """
+        @param[in]  line  JSON request.
+        @returns the response dictionary.
+        """
+        with self._lock:
+            self.requests += 1
+        try:
+            request = json.loads(line)
+            handler = getattr(self, 'op_' + str(request.get('op')), None)
+            if handler is None:
+                raise ValueError('[ERROR] Unknown operation: ' \
+                    + repr(request.get('op')))
+            engine = request.get('engine')
+            if request.get('op') in ENGINE_OPS and engine is not None \
+                    and engine != self.engine:
+                raise RuntimeError('[ERROR] The dockerx daemon launches on ' \
+                    + 'the Docker engine of ' + json.dumps(self.engine) \
+                    + ', not on that of ' + json.dumps(engine) + '.')
+            with x11env.override(request.get('env') or {}):
+                return {'ok': True,
+                        'result': handler(**(request.get('args') or {}))}
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            return {'ok': False, 'error': str(e), 'type': type(e).__name__}
+
+    def op_ping(self):
+        return {'pid': os.getpid(),
+                'uptime': time.monotonic() - self.started,
+                'engine': self.engine}
+
+    def op_launch(self, **kwargs):
+        from .run import launch_result
+        return launch_result(self.launcher.launch_container(
+            return_result=True, **kwargs))
+
+    def op_launch_many(self, specs: list, max_workers: int = 8):
+        from .run import launch_manifest
+        return launch_manifest(self.launcher, specs, max_workers)
+
+    def op_prefetch(self, image_names: list):
+        return {name: {'error': str(r)} if isinstance(r, Exception)
+                else {'id': r}
+                for name, r in self.launcher.prefetch(image_names).items()}
+
+    def op_stats(self):
+        from .dl import DockerLauncher
+        with self._lock:
+            requests, errors = self.requests, self.errors
+        return {'pid': os.getpid(),
+                'uptime': time.monotonic() - self.started,
+                'requests': requests, 'errors': errors,
+                'containers': len(self.launcher.registry),
+                'x11_cache': DockerLauncher.x11_cache.stats()}
+
+    def op_shutdown(self):
+        return 'shutdown'
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m dockerx.daemon',
+        description='Resident dockerx daemon, used by dockerx.run when it '
+                    'is running.')
+    parser.add_argument('--socket', default=None, type=str,
+        help='Path of the unix socket. Default is ' + default_socket_path()
+             + ' (set ' + SOCKET_VARIABLE + ' to change it).')
+    parser.add_argument('--stop', action='store_true',
+        help='Stop the daemon that is running.')
+    parser.add_argument('--status', action='store_true',
+        help='Print the counters of the daemon that is running.')
+    args = parser.parse_args()
+
+    if args.stop or args.status:
+        client = connect(args.socket)
+        if client is None:
+            sys.stderr.write('[ERROR] No dockerx daemon is running.\n')
+            sys.exit(1)
+        with client:
+            if args.stop:
+                client.shutdown()
+            else:
+                json.dump(client.stats(), sys.stdout, indent=2)
+                sys.stdout.write('\n')
+        sys.exit(0)
+
+    try:
+        daemon = Daemon(args.socket).start()
+    except RuntimeError as e:
+        sys.stderr.write(str(e) + '\n')
+        sys.exit(1)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon._stop.set())
+    sys.stdout.write('[INFO] dockerx daemon listening on ' \
+        + daemon.socket_path + '\n')
+    sys.stdout.flush()
+    daemon.wait()
+    daemon.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,36 +5,276 @@
 
 import subprocess
 import shlex
+import time
 import os
-import tempfile
 import re
 import socket
-import struct
-import fcntl
+import ipaddress
 import pathlib
-import docker
+import shutil
+import warnings
+import getpass
+import threading
+import concurrent.futures
+
+# My imports
+from .cache import X11EnvironmentCache
+from .images import ImageIndex
+from .registry import ContainerRegistry, ContainerList, LABEL, OWNER_LABEL, \
+    TERMINATED
+from . import clients
+from . import xauth
+from . import network
+from . import numa
+from . import probe
+from . import readiness
+from . import relay
+from . import tracing
+from . import x11env
+
+
+class LaunchResult:
+    """@brief Outcome of launching one of the containers of a batch."""
+
+    def __init__(self, spec: dict, container=None, error=None, 
+            timings: dict = None, shm: bool = False, 
+            time_to_ready: float = None, engine: str = None,
+            allocation=None):
+        """
+        @param[in]  spec       Dictionary of launch_container() arguments.
+        @param[in]  container  Docker container object, None if the launch
+                               failed.
+        @param[in]  error      Exception raised while launching the
+                               container, None if the launch succeeded.
+        @param[in]  timings    Dictionary {phase: seconds} recorded by the
+                               tracer of the launcher, None if tracing is
+                               disabled.
+        @param[in]  shm        True if the container shares the IPC 
+                               namespace of the host to render with MIT-SHM,
+                               see DockerLauncher.shm_usable().
+        @param[in]  time_to_ready  Seconds between the start of the container
+                                   and its readiness probes passing, None if
+                                   it was not asked to wait, see 
+                                   DockerLauncher.wait_ready().
+        @param[in]  engine         Name of the engine where the container 
+                                   was placed by a dockerx.ClusterLauncher,
+                                   None for a single engine.
+        @param[in]  allocation     dockerx.numa.Allocation of the CPUs 
+                                   pinned with cpuset='auto', or None.
+        """
+        self.spec = spec
+        self.container = container
+        self.error = error
+        self.timings = timings
+        self.shm = shm
+        self.time_to_ready = time_to_ready
+        self.engine = engine
+        self.allocation = allocation
+
+    @property
+    def ok(self):
+        """@returns True if the container was launched. Otherwise, False."""
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else repr(self.error)
+        return 'LaunchResult(image=%r, %s)' % (self.spec.get('image_name'),
+                                               status)
+
 
 class DockerLauncher:
 
-    def __init__(self):
-        self.client = docker.from_env()
-        self.launched_containers = []
+    # Keyword arguments accepted in the specs of launch_many()
+    launch_keys = ('image_name', 'ifname', 'nvidia_runtime', 'volumes',
+                   'env_vars', 'command', 'name', 'network', 'pull', 'shm',
+                   'shm_size', 'wait_ready', 'ready_timeout', 'cpuset', 'cpus',
+                   'mems', 'mem_limit')
+
+    # Process-wide cache of the detected X11 setup, see x11_setup()
+    x11_cache = X11EnvironmentCache()
+
+    # Deadline (in seconds) of the detection of the X11 server
+    probe_timeout = 2.
+
+    # Folder of the X11 unix sockets in the host
+    x11_socket_dir = '/tmp/.X11-unix'
+
+    # Process-wide snapshot of the network interfaces of the host
+    host_network = network.HostNetwork()
+
+    # Process-wide store of the Xauthority files mounted in the containers
+    xauth_files = xauth.XauthFileStore()
+
+    # Forward TCP displays to the containers through a local unix socket,
+    # see enable_relay()
+    use_relay = False
+
+    # Also forward local (unix socket) displays through a relay, so that
+    # the connections of the containers can be seen, see enable_relay()
+    relay_unix = False
+
+    # Process-wide relays of the TCP displays
+    x11_relays = relay.RelayManager()
+
+    # Process-wide allocator of the CPUs of this host pinned with 
+    # cpuset='auto', the default one of the launchers
+    cpu_allocator = numa.CpuAllocator()
+
+    def __init__(self, tracer=None, owner: str = None, 
+            retention: int = 1024, client=None, x11_setup=None,
+            cpu_allocator=None):
+        """
+        @param[in]  tracer     dockerx.tracing.Tracer used to time the phases
+                               of each launch. Tracing is disabled by 
+                               default.
+        @param[in]  owner      Value of the 'dockerx.owner' label of the 
+                               containers launched, used by adopt() to find
+                               them after a restart. By default, user@host.
+        @param[in]  retention  Maximum number of containers remembered in
+                               the registry, see dockerx.registry. The
+                               terminated containers evicted from it are
+                               forgotten (see forget()).
+        @param[in]  client     docker.DockerClient to use. By default, the
+                               client of dockerx.clients.get_client(), 
+                               which is shared by all the launchers of the
+                               process.
+        @param[in]  x11_setup  Callable 'x11_setup(ifname)' that returns the
+                               X11 setup (see x11_setup()) of the containers
+                               of this engine. By default, the X server is
+                               reached as from a container of this host,
+                               use it for engines of other hosts.
+        @param[in]  cpu_allocator  dockerx.numa.CpuAllocator of the CPUs 
+                                   pinned with cpuset='auto'. By default,
+                                   DockerLauncher.cpu_allocator, shared by
+                                   all the launchers of the engines of this
+                                   host. Engines of other hosts need their
+                                   own.
+        """
+        self._client = client
+        self._x11_setup = x11_setup
+        self.cpu_allocator = cpu_allocator if cpu_allocator is not None \
+            else DockerLauncher.cpu_allocator
+        self.tracer = tracer if tracer is not None else tracing.NULL_TRACER
+        self.owner = owner if owner is not None \
+            else DockerLauncher.default_owner()
+        self.registry = ContainerRegistry(retention,
+            on_evict=lambda record: self.forget(record.id))
+        self._xauth_paths = {}
+        self._lock = threading.Lock()
+
+        # Local images of the engine, see prefetch()
+        self.images = ImageIndex(lambda: self.client)
+
+    @property
+    def client(self):
+        """
+        @returns the Docker client. It is obtained on first use, so that the
+                 docker SDK is only imported when it is actually needed.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = clients.get_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+        self.images = ImageIndex(lambda: self.client)
+
+    @property
+    def launched_containers(self):
+        """
+        @returns a list-like view of the containers in the registry, oldest
+                 first. Appending to it registers a container, and removing
+                 from it forgets one, see forget().
+        """
+        return ContainerList(self.registry, self.forget)
+
+    @launched_containers.setter
+    def launched_containers(self, containers):
+        containers = list(containers)
+        keep = {c.id for c in containers}
+        for record in self.registry.records():
+            if record.id not in keep:
+                self.forget(record.id)
+        self.launched_containers.extend(c for c in containers
+                                        if c.id not in self.registry)
+
+    @staticmethod
+    def default_owner():
+        """@returns 'user@hostname', the default owner of the containers."""
+        try:
+            user = getpass.getuser()
+        except (KeyError, OSError):
+            user = str(os.getuid())
+        return user + '@' + socket.gethostname()
+
+    def labels(self):
+        """@returns the labels set on the containers launched."""
+        return {LABEL: 'true', OWNER_LABEL: self.owner}
+
+    def prefetch(self, image_names: list):
+        """
+        @brief Pulls the missing images of a list in parallel, so that the
+               launches of these images do not block on a pull.
+        @param[in]  image_names  List of image names, e.g. ['ubuntu'].
+        @returns a dictionary {image name: image id or exception}.
+        """
+        return self.images.prefetch(image_names)
+
+    @staticmethod
+    def enable_relay(enabled: bool = True, spares: int = None, 
+            unix: bool = None):
+        """
+        @brief Exposes TCP displays (e.g. those of 'ssh -X') to the containers
+               through a local unix socket instead of the docker0 bridge.
+
+        @details The relay is a dockerx.relay.X11Relay started on the first
+                 launch of each display. Its socket is mounted in the
+                 containers as '/tmp/.X11-unix/X<n>', so sshd does not need 
+                 'X11UseLocalhost no'. The cached X11 setups are dropped, so
+                 that the next launch uses (or stops using) the relay.
+
+        @param[in]  enabled  False to connect the containers to the X server
+                             over TCP again. The relays are closed.
+        @param[in]  spares   Upstream connections that each relay opens in
+                             advance.
+        @param[in]  unix     True to forward local displays (unix sockets)
+                             through a relay too. The relay tells which 
+                             process connected to the X server, which the
+                             'x11' readiness probe needs. The X server sees
+                             the clients as the user of this process, so 
+                             the containers get the cookie of the display
+                             (like for TCP displays) and the socket of the
+                             relay only accepts this user and root.
+        """
+        DockerLauncher.use_relay = enabled
+        if unix is not None:
+            DockerLauncher.relay_unix = unix
+        if spares is not None:
+            DockerLauncher.x11_relays.spares = spares
+        if not enabled:
+            DockerLauncher.x11_relays.close()
+        DockerLauncher.x11_cache.invalidate()
 
     @staticmethod
-    def shell(cmd):
+    def shell(cmd, env: dict = None):
         """
         @brief Launches a terminal command and returns you the output.
         @param[in]  cmd  Command that you want to execute.
+        @param[in]  env  Environment of the command, by default the one of
+                         this process.
         """
         cmd_list = shlex.split(cmd, posix=False)
         proc = subprocess.Popen(cmd_list, stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT)
+            stderr=subprocess.STDOUT, env=env)
         out, err = proc.communicate()
         return out
 
     @staticmethod
     def xhost_available():
-        return bool(DockerLauncher.shell('which xhost').decode('utf-8')) 
+        return shutil.which('xhost') is not None
 
     @staticmethod
     def touch(fpath):
@@ -45,56 +285,67 @@ class DockerLauncher:
     @staticmethod
     def interfaces():
         """@returns a list of network interfaces."""
-        return [iface for _, iface in socket.if_nameindex()]
+        return list(DockerLauncher.host_network.snapshot())
     
     @staticmethod
     def interface_exists(ifname):
         """@returns True if the network adapter exists. Otherwise, False."""
-        return True if ifname in DockerLauncher.interfaces() else False
+        return DockerLauncher.host_network.exists(ifname)
 
     @staticmethod
     def get_ip_from_interface(ifname, linux_siocgifaddr=0x8915):
         """
-        @param[in]  ifname  Network adaptar name, e.g. 'eth0' or 'docker0'.
-        @returns the IP address of a given network adapter.
+        @details The address is looked up in DockerLauncher.host_network, a
+                 snapshot of all the interfaces, so no system call is made
+                 while the snapshot is valid.
+
+        @param[in]  ifname             Network adaptar name, e.g. 'eth0' or
+                                       'docker0'.
+        @param[in]  linux_siocgifaddr  Unused, kept for backwards 
+                                       compatibility.
+
+        @returns the IP address of a given network adapter. The IPv4 address
+                 if it has one, otherwise its IPv6 address.
         """
-        if not DockerLauncher.interface_exists(ifname):
+        iface = DockerLauncher.host_network.get(ifname)
+        if iface is None:
             raise ValueError("""[ERROR] You are trying to find the IP of a 
                 network adapter that does not exist.""")
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        ifname_pack = struct.pack('256s', ifname[:15].encode('utf-8'))
-        ip = socket.inet_ntoa(fcntl.ioctl(s.fileno(), linux_siocgifaddr, 
-                              ifname_pack)[20:24])
-        s.close()
+        ip = iface.address()
+        if ip is None:
+            raise ValueError('[ERROR] The network adapter ' + ifname \
+                + ' does not have an IP address.')
         return ip
 
     @staticmethod
     def get_ip_from_display():
         """
-        @details IPv6 not supported.
+        @details The host of the DISPLAY can be an IPv4 address, an IPv6
+                 address (e.g. '::1:10' or '[::1]:10') or a hostname.
         @returns the IP address from the DISPLAY environment variable.
         """
-        ip = None
+        host, _ = probe.parse_display(x11env.get('DISPLAY'))
+        if not host:
+            return None
 
-        # Regex patterns (ipv4: RFC 791, hostname: RFC 952)
-        ipv4_pattern = '^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})[:]\d+$'
-        # TODO: ipv6_pattern = 
-        hostname_pattern = '^((([a-zA-Z]|[a-zA-Z][a-zA-Z0-9\-]*[a-zA-Z0-9])'
-        hostname_pattern += '\.)*([A-Za-z]|[A-Za-z][A-Za-z0-9\-]*[A-Za-z0-9]))'
-        hostname_pattern += '[:]\d+$'
+        # IPv4 (RFC 791) or IPv6 (RFC 4291) address
+        try:
+            ipaddress.ip_address(host.split('%')[0])
+            return host
+        except ValueError:
+            pass
 
-        # Match DISPLAY with all the patterns
-        ipv4_match = re.match(ipv4_pattern, os.environ['DISPLAY'])
-        hostname_match = re.match(hostname_pattern, os.environ['DISPLAY'])
-        
-        # Get IP address 
-        if ipv4_match:
-            ip = ipv4_match.group(1) 
-        elif hostname_match:
-            hostname = hostname_match.group(1)
-            ip = socket.gethostbyname(hostname)
-        
-        return ip
+        # Hostname (RFC 952)
+        hostname_pattern = r'^((([a-zA-Z]|[a-zA-Z][a-zA-Z0-9\-]*[a-zA-Z0-9])'
+        hostname_pattern += r'\.)*([A-Za-z]|[A-Za-z][A-Za-z0-9\-]*[A-Za-z0-9]))$'
+        if re.match(hostname_pattern, host) is None:
+            return None
+        try:
+            return socket.gethostbyname(host)
+        except socket.gaierror:
+            # IPv6-only hostname
+            infos = socket.getaddrinfo(host, None, socket.AF_INET6)
+            return infos[0][4][0]
 
     @staticmethod
     def get_port_from_display(base_port=6000):
@@ -104,80 +355,139 @@ class DockerLauncher:
     @staticmethod
     def get_port_offset_from_display():
         port_offset = None
-        port_pattern = '^.*[:](\d+)(?:[.]\d+|)$'
-        m = re.match(port_pattern, os.environ['DISPLAY'])
+        port_pattern = r'^.*[:](\d+)(?:[.]\d+|)$'
+        m = re.match(port_pattern, x11env.get('DISPLAY'))
         if m:
             port_offset = int(m.group(1))
         return port_offset
 
     @staticmethod
-    def get_x11_server_socket_type(unix_socket_dir='/tmp/.X11-unix'):
+    def get_x11_server_socket_type(unix_socket_dir: str = None,
+            timeout: float = None):
         """
+        @brief Probes the TCP and unix socket transports of the DISPLAY in
+               parallel, see dockerx.probe.probe_display().
+
+        @param[in]  unix_socket_dir  Folder of the X11 unix sockets, by 
+                                     default DockerLauncher.x11_socket_dir.
+        @param[in]  timeout          Deadline (in seconds) of the detection,
+                                     by default DockerLauncher.probe_timeout.
+
         @returns 'unix' if the X11 server specified in the DISPLAY is using
                  unix sockets. 
                  'tcp' if the X11 server specified in the DISPLAY is using
                  TCP sockets.
+                 None if no X11 server answered before the deadline.
         """
-        result = None
+        if unix_socket_dir is None:
+            unix_socket_dir = DockerLauncher.x11_socket_dir
+        if timeout is None:
+            timeout = DockerLauncher.probe_timeout
+        return probe.probe_display(x11env.get('DISPLAY'), unix_socket_dir,
+            timeout).transport
 
-        # Check if there is a TCP server listening
-        ip = DockerLauncher.get_ip_from_display()
-        port = DockerLauncher.get_port_from_display()
-        if ip is None:
-            ip = socket.gethostbyname('localhost')
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        location = (ip, port)
-        someone_listening = sock.connect_ex(location) == 0
-        sock.close()
-        if someone_listening:
-            result = 'tcp'
-        else:
-            # Check if there is a unix socket listening 
-            offset = DockerLauncher.get_port_offset_from_display() 
-            path = os.path.join(unix_socket_dir, 'X' + str(offset))
-            if pathlib.Path(path).exists():
-                result = 'unix' 
+    @staticmethod
+    def x11_setup(ifname: str, use_cache: bool = True):
+        """
+        @brief Detects the X11 server in the DISPLAY and prepares the 
+               environment variables and volumes that a container needs to
+               connect to it.
+
+        @details This is the part of the environment that is shared by all
+                 the containers launched with the same 'ifname', so it can
+                 be computed once for a whole batch of containers.
+
+                 The result is stored in DockerLauncher.x11_cache, so 
+                 repeated launches in the same process skip the probing of
+                 the X server and the xhost/xauth commands. Use 
+                 'DockerLauncher.x11_cache.invalidate()' to force a new
+                 detection.
+
+        @param[in]  ifname     Network adaptar name, e.g. 'eth0' or 'docker0'.
+        @param[in]  use_cache  Set it to False to ignore the cache.
+
+        @returns a dictionary with the keys 'transport' (the socket type 
+                 returned by get_x11_server_socket_type()), 'environment'
+                 and 'volumes'.
+        """
+        if use_cache:
+            with tracing.span('x11_cache'):
+                x11 = DockerLauncher.x11_cache.lookup(ifname)
+            if x11 is None:
+                x11 = DockerLauncher.x11_setup(ifname, use_cache=False)
+                DockerLauncher.x11_cache.store(ifname, x11)
+            return x11
+
+        # Detect whether the server is listening on TCP or UNIX sockets
+        with tracing.span('probe'):
+            socket_type = DockerLauncher.get_x11_server_socket_type()
+        
+        return DockerLauncher.x11_setup_for(socket_type, ifname)
 
-        return result
+    def setup_x11(self, ifname: str):
+        """
+        @returns the X11 setup of the containers of this launcher, see the
+                 'x11_setup' parameter of the constructor.
+        """
+        if self._x11_setup is not None:
+            return self._x11_setup(ifname)
+        return DockerLauncher.x11_setup(ifname)
 
     @staticmethod
-    def prepare_environment(ifname: str, nvidia_runtime: bool, 
-            additional_volumes: dict, additional_env_vars: dict, 
-            network: str):
+    def x11_setup_for(socket_type: str, ifname: str, xhost: bool = True):
         """
-        @brief Prepares the environment to launch a container with X11 
-               support.
+        @brief Prepares the X11 environment variables and volumes for an X
+               server that has already been detected.
 
-        @param[in]  ifname               Network adaptar name, e.g. 'eth0' or 
-                                         'docker0'.
-        @param[in]  nvidia_runtime       Flag to enable the nvidia runtime.
-        @param[in]  additional_volumes   Dictionary with additional volumes.
-                                         The key is typically a string 
-                                         containing the path in the host.  
-                                         The value is a dictionary typically 
-                                         containing the keys 'bind' and 'mode'.
-                                         'bind' contains the mount point inside
-                                         the container and 'mode' contains the
-                                         read/write mode, e.g. 'rw'.
-        @param[in]  additional_env_vars  Dictionary containing environment
-                                         variables and their corresponding
-                                         values.
+        @param[in]  socket_type  Output of get_x11_server_socket_type().
+        @param[in]  ifname       Network adaptar name, e.g. 'docker0'.
+        @param[in]  xhost        Set it to False to skip running 
+                                 'xhost +SI:localuser:root' for unix 
+                                 sockets, e.g. if the caller runs it 
+                                 asynchronously.
 
-        @returns the dictionary of docker options.
+        @returns the same dictionary as x11_setup().
         """
         # Initialise environment and volumes
         env = {'QT_X11_NO_MITSHM': 1}
         vol = {}
-
-        # Detect whether the server is listening on TCP or UNIX sockets
-        socket_type = DockerLauncher.get_x11_server_socket_type()
+        cookie_file = socket_type == 'tcp'
 
         # Prepare the Docker environment according to the type of X server
-        if socket_type == 'unix':
-            env['DISPLAY'] = os.environ['DISPLAY']
-            vol['/tmp/.X11-unix'] = {'bind': '/tmp/.X11-unix', 'mode': 'rw'}
-            if DockerLauncher.xhost_available():
-                DockerLauncher.shell('xhost +SI:localuser:root')
+        if socket_type == 'unix' and DockerLauncher.use_relay \
+                and DockerLauncher.relay_unix:
+            port_offset = DockerLauncher.get_port_offset_from_display()
+            # The X server sees the connections as coming from the user of
+            # this process, not from root, so 'xhost' does not apply: the
+            # clients need the cookie, and only the user and root (i.e.
+            # the containers) can reach the relay
+            with tracing.span('relay'):
+                x11_relay = DockerLauncher.x11_relays.get(
+                    probe.unix_socket_path(port_offset, 
+                        DockerLauncher.x11_socket_dir), port_offset, 
+                    mode=0o700)
+            env['DISPLAY'] = ':' + str(port_offset)
+            vol[x11_relay.directory] = {'bind': '/tmp/.X11-unix', 
+                'mode': 'rw'}
+            cookie_file = True
+        elif socket_type == 'unix':
+            env['DISPLAY'] = x11env.get('DISPLAY')
+            vol[DockerLauncher.x11_socket_dir] = {'bind': '/tmp/.X11-unix', 
+                'mode': 'rw'}
+            if xhost and DockerLauncher.xhost_available():
+                with tracing.span('xhost'):
+                    DockerLauncher.shell('xhost +SI:localuser:root',
+                                         env=x11env.environ())
+        elif socket_type == 'tcp' and DockerLauncher.use_relay:
+            # Forward the display through a local unix socket that is 
+            # mounted in the container like the X11 folder of the host
+            host, port_offset = probe.parse_display(x11env.get('DISPLAY'))
+            with tracing.span('relay'):
+                x11_relay = DockerLauncher.x11_relays.get(
+                    (host or 'localhost', 6000 + port_offset), port_offset)
+            env['DISPLAY'] = ':' + str(port_offset)
+            vol[x11_relay.directory] = {'bind': '/tmp/.X11-unix', 
+                'mode': 'rw'}
         elif socket_type == 'tcp':
             # Discover the IP of the server
             if ifname is not None:
@@ -204,28 +514,81 @@ class DockerLauncher:
             # Set DISPLAY for Docker container
             env['DISPLAY'] = ip + ':' + str(port_offset)
 
-            # Create an empty Xauthority file if it does not exist
-            env['XAUTHORITY'] = os.path.join(tempfile.gettempdir(), 
-                '.docker.xauth')
-            DockerLauncher.touch(env['XAUTHORITY'])
+        if cookie_file:
+            # Put the X11 cookie of the DISPLAY with a wildcard family (so
+            # that it is valid regardless of the hostname of the container)
+            # in an Xauthority file of its own, reused while the cookie
+            # does not change
+            with tracing.span('xauth'):
+                cookie = xauth.find_cookie(x11env.get('DISPLAY'))
+                env['XAUTHORITY'] = DockerLauncher.xauth_files.get(
+                    x11env.get('DISPLAY'), 
+                    cookie.wildcard() if cookie is not None else None)
 
-            # Hack X11 cookie
-            out = DockerLauncher.shell('xauth nlist ' + os.environ['DISPLAY'])
-            cookie = 'ffff' + out.decode('ascii')[4:]
+            # Mount Xauthority file inside the container
+            vol[env['XAUTHORITY']] = {'bind': env['XAUTHORITY'], 'mode':"rw"}
 
-            # Save X11 cookie in a temporary file
-            cookie_path = os.path.join(tempfile.gettempdir(), '.myx11cookie')
-            with open(cookie_path, 'w') as f:
-                f.write(cookie)
+        return {'transport': socket_type, 'environment': env, 'volumes': vol}
 
-            # Merge cookie in Xauthority file
-            DockerLauncher.shell('xauth -f ' + env['XAUTHORITY'] \
-                + ' nmerge ' + cookie_path)
+    @staticmethod
+    def shm_usable(x11: dict):
+        """
+        @brief Checks whether the containers can render with the MIT-SHM 
+               extension of the X server.
+
+        @details The X server and the application exchange the images 
+                 through SysV shared memory segments, so the server must run
+                 on this host, reached through its unix socket, and the 
+                 container has to share the IPC namespace of the host.
+                 Remote and TCP displays (e.g. 'ssh -X') cannot use it.
+
+        @param[in]  x11  Output of x11_setup().
+
+        @returns True if MIT-SHM can be used. Otherwise, False.
+        """
+        if x11['transport'] != 'unix':
+            return False
+        host, _ = probe.parse_display(x11['environment'].get('DISPLAY'))
+        return host in ('', 'unix')
+
+    @staticmethod
+    def build_options(x11: dict, nvidia_runtime: bool, 
+            additional_volumes: dict, additional_env_vars: dict, 
+            network: str, shm=False, shm_size=None):
+        """
+        @brief Builds the dictionary of Docker options of a container from
+               the output of x11_setup() and the container-specific settings.
+
+        @details The dictionaries in 'x11' are copied, not modified, so the
+                 same X11 setup can be reused for many containers.
+
+        @param[in]  shm       Shared memory rendering (MIT-SHM). False (the 
+                              default) disables it in the container with
+                              QT_X11_NO_MITSHM=1. 'auto' enables it if 
+                              shm_usable(), sharing the IPC namespace of the
+                              host. True does the same, but warns if it is
+                              not usable.
+        @param[in]  shm_size  Size of /dev/shm in the container, e.g. '1g'.
+                              Ignored if the container shares the IPC
+                              namespace of the host, as then /dev/shm is
+                              that of the host.
+
+        @returns the dictionary of docker options.
+        """
+        # Decide whether the container can use MIT-SHM
+        use_shm = False
+        if shm:
+            use_shm = DockerLauncher.shm_usable(x11)
+            if shm is True and not use_shm:
+                warnings.warn('[WARN] dockerx: MIT-SHM requires a local X ' \
+                    + 'server reached through its unix socket, it will not ' \
+                    + 'be used.')
 
-            # Mount Xauthority file inside the container
-            vol[env['XAUTHORITY']] = {'bind': env['XAUTHORITY'], 'mode':"rw"}
-        
         # Prepare dictionary of options for Docker
+        env = dict(x11['environment'])
+        vol = dict(x11['volumes'])
+        if use_shm:
+            env.pop('QT_X11_NO_MITSHM', None)
         env.update(additional_env_vars)
         vol.update(additional_volumes)
         docker_options = {
@@ -233,6 +596,12 @@ class DockerLauncher:
             'volumes'     : vol,
         }
 
+        # Share the shared memory segments with the X server
+        if use_shm:
+            docker_options['ipc_mode'] = 'host'
+        elif shm_size is not None:
+            docker_options['shm_size'] = shm_size
+
         # Add NVIDIA runtime if requested
         if nvidia_runtime:
             docker_options['runtime'] = 'nvidia'
@@ -243,10 +612,99 @@ class DockerLauncher:
         
         return docker_options
 
+    @staticmethod
+    def prepare_environment(ifname: str, nvidia_runtime: bool, 
+            additional_volumes: dict, additional_env_vars: dict, 
+            network: str, use_cache: bool = True, shm=False, 
+            shm_size=None):
+        """
+        @brief Prepares the environment to launch a container with X11 
+               support.
+
+        @param[in]  ifname               Network adaptar name, e.g. 'eth0' or 
+                                         'docker0'.
+        @param[in]  nvidia_runtime       Flag to enable the nvidia runtime.
+        @param[in]  additional_volumes   Dictionary with additional volumes.
+                                         The key is typically a string 
+                                         containing the path in the host.  
+                                         The value is a dictionary typically 
+                                         containing the keys 'bind' and 'mode'.
+                                         'bind' contains the mount point inside
+                                         the container and 'mode' contains the
+                                         read/write mode, e.g. 'rw'.
+        @param[in]  additional_env_vars  Dictionary containing environment
+                                         variables and their corresponding
+                                         values.
+        @param[in]  use_cache            Reuse the X11 setup detected in a 
+                                         previous call, see x11_setup().
+        @param[in]  shm                  Shared memory rendering, see 
+                                         build_options().
+        @param[in]  shm_size             Size of /dev/shm, see 
+                                         build_options().
+
+        @returns the dictionary of docker options.
+        """
+        with tracing.span('prepare_environment'):
+            x11 = DockerLauncher.x11_setup(ifname, use_cache)
+            return DockerLauncher.build_options(x11, nvidia_runtime, 
+                additional_volumes, additional_env_vars, network, shm,
+                shm_size)
+
+    def resource_options(self, cpuset=None, cpus: int = None, mems=None, 
+            mem_limit=None):
+        """
+        @brief Docker options that pin a container to CPUs and NUMA nodes,
+               and limit its memory.
+
+        @param[in]  cpuset     CPUs of the container, e.g. '0-3', or 'auto'
+                               to take 'cpus' free CPUs of the host from
+                               the 'cpu_allocator' of the launcher. The 
+                               CPUs are taken from the NUMA node with the
+                               most free CPUs, and the memory is bound to
+                               that node.
+                               The allocation is released when the 
+                               container is forgotten (see forget(), 
+                               remove_all() and reap_exited()). None 
+                               (default) to not pin the container.
+        @param[in]  cpus       Number of CPUs pinned with cpuset='auto' 
+                               (default 1). If it is given without a 
+                               cpuset, 'auto' is assumed.
+        @param[in]  mems       NUMA nodes of the memory of the container,
+                               e.g. '0'. With cpuset='auto', the nodes 
+                               where the CPUs can be taken from.
+        @param[in]  mem_limit  Memory limit, e.g. '4g' or a number of bytes.
+
+        @returns a tuple (options, allocation), where 'allocation' is the
+                 dockerx.numa.Allocation of cpuset='auto', or None.
+        """
+        options = {}
+        allocation = None
+        if cpuset is None and cpus is not None:
+            cpuset = 'auto'
+        if mem_limit is not None:
+            options['mem_limit'] = mem_limit
+        if cpuset == 'auto':
+            memory = 0
+            if mem_limit is not None:
+                memory = numa.parse_size(mem_limit)
+            allocation = self.cpu_allocator.allocate(
+                int(cpus or 1), memory, mems)
+            options['cpuset_cpus'] = allocation.cpuset_cpus
+            options['cpuset_mems'] = allocation.cpuset_mems
+        else:
+            if cpuset is not None:
+                options['cpuset_cpus'] = str(cpuset)
+            if mems is not None:
+                options['cpuset_mems'] = str(mems)
+        return options, allocation
+
     def launch_container(self, image_name: str, ifname: str = 'docker0',
             nvidia_runtime: bool = False, volumes: dict = {}, 
             env_vars: dict = {}, command: str = None, name=None, 
-            network: str = None):
+            network: str = None, return_result: bool = False, 
+            pull: bool = True, shm=False, shm_size=None, wait_ready=None,
+            ready_timeout: float = 30., cpuset=None, cpus: int = None,
+            mems=None, mem_limit=None):
         """
         @brief Launch a Docker container.
         
@@ -308,26 +766,430 @@ class DockerLauncher:
                                     your container to. Can be None, in which
                                     case the container will be connected to
                                     the default Docker network.
+        @param[in]  return_result   Return a LaunchResult, which contains the
+                                    container and the time spent in each
+                                    phase of the launch (if the launcher has
+                                    a tracer), instead of the container.
+        @param[in]  pull            Pull the image if it is not present
+                                    locally. If False, a missing image 
+                                    raises docker.errors.ImageNotFound 
+                                    instead of blocking on a pull.
+        @param[in]  shm             Shared memory rendering (MIT-SHM): False
+                                    (default), 'auto' or True, see 
+                                    build_options(). LaunchResult.shm tells
+                                    whether it was enabled.
+        @param[in]  shm_size        Size of /dev/shm in the container, e.g.
+                                    '1g', see build_options().
+        @param[in]  wait_ready      Block until the application is ready:
+                                    'health' (healthcheck of the image), 
+                                    'x11' (a process of the container 
+                                    connected to the X server, needs 
+                                    enable_relay()), 'log:<regex>' (a line 
+                                    of the logs matches), a 
+                                    dockerx.readiness.ReadinessProbe, or a
+                                    list of them. See wait_ready().
+        @param[in]  ready_timeout   Seconds to wait for 'wait_ready' before
+                                    raising TimeoutError. A container that
+                                    does not become ready (it times out or
+                                    exits) is removed and forgotten before
+                                    the error is raised.
+        @param[in]  cpuset          CPUs of the container (e.g. '0-3'), or
+                                    'auto' to pin it to free CPUs of the 
+                                    least loaded NUMA node, see 
+                                    resource_options().
+        @param[in]  cpus            Number of CPUs pinned with 'auto'.
+        @param[in]  mems            NUMA nodes of the memory, e.g. '0'.
+        @param[in]  mem_limit       Memory limit, e.g. '4g'.
 
         @returns the Docker container object of the container launched.
         """
-        # Prepare environment and volumes to run the container
-        docker_options = DockerLauncher.prepare_environment(ifname, 
-            nvidia_runtime, volumes, env_vars, network)
+        probes = readiness.parse(wait_ready)
+        time_to_ready = None
+        with self.tracer.trace('launch_container', image=image_name) as trace:
+            # Prepare environment and volumes to run the container
+            if self._x11_setup is None:
+                docker_options = DockerLauncher.prepare_environment(ifname, 
+                    nvidia_runtime, volumes, env_vars, network, shm=shm, 
+                    shm_size=shm_size)
+            else:
+                with tracing.span('prepare_environment'):
+                    docker_options = DockerLauncher.build_options(
+                        self.setup_x11(ifname), nvidia_runtime, volumes, 
+                        env_vars, network, shm, shm_size)
         
+            contexts = [p.prepare(self) for p in probes]
+            resources, allocation = self.resource_options(cpuset,
+                cpus, mems, mem_limit)
+            docker_options.update(resources)
+            container = self._run(image_name, command, name, docker_options,
+                pull, allocation)
+            if probes:
+                time_to_ready = self._ready(container, probes, 
+                    ready_timeout, contexts)
+
+        if return_result:
+            spec = {'image_name': image_name, 'ifname': ifname, 
+                'nvidia_runtime': nvidia_runtime, 'volumes': volumes,
+                'env_vars': env_vars, 'command': command, 'name': name,
+                'network': network, 'pull': pull, 'shm': shm, 
+                'shm_size': shm_size, 'wait_ready': wait_ready,
+                'ready_timeout': ready_timeout, 'cpuset': cpuset, 
+                'cpus': cpus, 'mems': mems, 'mem_limit': mem_limit}
+            return LaunchResult(spec, container, timings=trace.timings,
+                shm=docker_options.get('ipc_mode') == 'host',
+                time_to_ready=time_to_ready, allocation=allocation)
+        return container
+
+    def wait_ready(self, container, probes, timeout: float = 30., 
+            contexts: list = None):
+        """
+        @brief Blocks until the application of a started container is ready.
+
+        @details The probes wait for events (engine events, log lines, 
+                 connections to the X server) with a common deadline, 
+                 there is no polling. The time spent is recorded in the 
+                 'ready' phase of the tracer.
+
+        @param[in]  container  Docker container object.
+        @param[in]  probes     Probes accepted by dockerx.readiness.parse(),
+                               the container is ready when all of them 
+                               have passed.
+        @param[in]  timeout    Seconds to wait before raising TimeoutError.
+        @param[in]  contexts   Values returned by the prepare() of the 
+                               probes before the container was created. By
+                               default, they are prepared now.
+
+        @returns the seconds that it took for the container to be ready.
+        """
+        probes = readiness.parse(probes)
+        if contexts is None:
+            contexts = [p.prepare(self) for p in probes]
+        tic = time.monotonic()
+        deadline = tic + timeout
+        with tracing.span('ready'):
+            for p, context in zip(probes, contexts):
+                p.wait(self, container, context, deadline)
+        return time.monotonic() - tic
+
+    def _ready(self, container, probes, timeout: float, contexts: list):
+        """
+        @brief wait_ready() for a container that has just been launched. If
+               it does not become ready, the container is removed and 
+               forgotten (see _discard()), and the error is re-raised.
+        @returns the seconds that it took for the container to be ready.
+        """
+        try:
+            return self.wait_ready(container, probes, timeout, contexts)
+        except BaseException:
+            self._discard(container)
+            raise
+
+    def _run(self, image_name: str, command: str, name: str, 
+            docker_options: dict, pull: bool = True, allocation=None):
+        """
+        @brief Creates and starts a container with the options produced by
+               prepare_environment() or build_options().
+        @param[in]  allocation  CPUs reserved for the container (see 
+                                resource_options()), released if it cannot
+                                be created.
+        @returns the Docker container object of the container launched.
+        """
         # Put a name to the container if provided
         if name is not None:
             docker_options['name'] = name
 
-        # Launch container
-        container = self.client.containers.run(image_name, detach=True,
-            command=command, **docker_options)
+        # Label the container so that adopt() can find it after a restart
+        labels = dict(docker_options.get('labels') or {})
+        labels.update(self.labels())
+        docker_options['labels'] = labels
+
+        # If the image index knows that the image is missing, pull it first
+        # (or fail right away) instead of trying to create the container
+        from docker.errors import ImageNotFound
+        if self.images.missing(image_name):
+            if not pull:
+                raise ImageNotFound('[ERROR] The image ' + image_name \
+                    + ' is not present locally and pulling it is disabled.')
+            with tracing.span('pull'):
+                self.images.pull(image_name).result()
+
+        # Keep the Xauthority file of the container until it is removed
+        xauth_paths = [src for src in docker_options.get('volumes', {})
+                       if DockerLauncher.xauth_files.owns(src)]
+        for path in xauth_paths:
+            DockerLauncher.xauth_files.acquire(path)
+
+        # Launch container, pulling the image if it is not available.
+        # Concurrent launches of the same missing image share the pull.
+        create = lambda: self.client.containers.create(image_name, 
+            command=command, detach=True, **docker_options)
+        try:
+            try:
+                with tracing.span('create'):
+                    container = create()
+            except ImageNotFound:
+                self.images.discard(image_name)
+                if not pull:
+                    raise
+                with tracing.span('pull'):
+                    self.images.pull(image_name).result()
+                with tracing.span('create'):
+                    container = create()
+        except BaseException:
+            for path in xauth_paths:
+                DockerLauncher.xauth_files.release(path)
+            if allocation is not None:
+                self.cpu_allocator.release(allocation)
+            raise
+        if allocation is not None:
+            self.cpu_allocator.assign(allocation, container.id)
+        self.images.add(image_name, container.attrs.get('Image'))
+        with self._lock:
+            self._xauth_paths[container.id] = xauth_paths
+        with tracing.span('start'):
+            try:
+                container.start()
+            except BaseException:
+                self._discard(container)
+                raise
         
         # Store it just in case we need it
-        self.launched_containers.append(container)
+        self.registry.add(container, image=image_name, status='running')
         
         return container
 
+    def _discard(self, container):
+        """
+        @brief Removes a container that was created but could not be 
+               started (or made ready), and frees what was reserved for it:
+               its pinned CPUs and its references to Xauthority files.
+        """
+        try:
+            container.remove(force=True)
+        except Exception:
+            pass
+        self.forget(container.id)
+
+    def launch_many(self, specs: list, max_workers: int = 8):
+        """
+        @brief Launch a batch of Docker containers concurrently.
+
+        @details The X11 environment is detected only once per distinct 
+                 'ifname' in the batch, and then the containers are created
+                 and started in parallel by a pool of at most 'max_workers'
+                 threads. A container that fails to launch does not abort 
+                 the rest of the batch, its exception is returned in the 
+                 corresponding LaunchResult instead.
+
+        @param[in]  specs        List of dictionaries with the keyword 
+                                 arguments of launch_container(), e.g.
+                                 {'image_name': 'ubuntu', 
+                                  'command': 'sleep infinity'}.
+                                 The key 'image_name' is mandatory.
+        @param[in]  max_workers  Maximum number of containers being launched
+                                 at the same time.
+
+        @returns a list of LaunchResult objects in the same order as 'specs'.
+        """
+        results = [LaunchResult(dict(spec)) for spec in specs]
+
+        # Validate the specs before doing any work
+        for res in results:
+            unknown = set(res.spec) - set(DockerLauncher.launch_keys)
+            if unknown:
+                res.error = TypeError('[ERROR] Unknown launch options: ' \
+                    + ', '.join(sorted(unknown)))
+            elif 'image_name' not in res.spec:
+                res.error = TypeError('[ERROR] The launch options must ' \
+                    + 'contain an \'image_name\'.')
+
+        # Detect the X11 server once per network interface
+        x11 = {}
+        x11_timings = {}
+        for res in results:
+            ifname = res.spec.get('ifname', 'docker0')
+            if res.ok and ifname not in x11:
+                with self.tracer.trace('x11_setup', ifname=ifname) as trace:
+                    try:
+                        x11[ifname] = self.setup_x11(ifname)
+                    except Exception as e:
+                        x11[ifname] = e
+                x11_timings[ifname] = trace.timings
+            if res.ok and isinstance(x11[ifname], Exception):
+                res.error = x11[ifname]
+
+        def launch(res):
+            spec = res.spec
+            ifname = spec.get('ifname', 'docker0')
+            with self.tracer.trace('launch_container', 
+                    image=spec['image_name']) as trace:
+                try:
+                    docker_options = DockerLauncher.build_options(x11[ifname],
+                        spec.get('nvidia_runtime', False), 
+                        spec.get('volumes', {}), spec.get('env_vars', {}),
+                        spec.get('network'), spec.get('shm', False),
+                        spec.get('shm_size'))
+                    res.shm = docker_options.get('ipc_mode') == 'host'
+                    probes = readiness.parse(spec.get('wait_ready'))
+                    contexts = [p.prepare(self) for p in probes]
+                    resources, res.allocation = \
+                        self.resource_options(spec.get('cpuset'),
+                            spec.get('cpus'), spec.get('mems'), 
+                            spec.get('mem_limit'))
+                    docker_options.update(resources)
+                    container = self._run(spec['image_name'], 
+                        spec.get('command'), spec.get('name'), docker_options,
+                        spec.get('pull', True), res.allocation)
+                    if probes:
+                        res.time_to_ready = self._ready(container, probes,
+                            spec.get('ready_timeout', 30.), contexts)
+                    res.container = container
+                except Exception as e:
+                    res.error = e
+            if trace.timings is not None:
+                res.timings = dict(x11_timings[ifname])
+                res.timings.update(trace.timings)
+
+        # Create and start the containers in parallel
+        pending = [res for res in results if res.ok]
+        if pending:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(1, min(max_workers, len(pending)))) as ex:
+                list(ex.map(launch, pending))
+
+        return results
+
+    def forget(self, ref: str):
+        """
+        @brief Drops a container that has been removed from the registry,
+               and releases the files that were mounted only for it (e.g.
+               its Xauthority file).
+        @param[in]  ref  Id or name of the container.
+        @returns the ContainerRecord, or None if it was not registered.
+        """
+        record = self.registry.remove(ref)
+        cid = record.id if record is not None else ref
+        with self._lock:
+            paths = self._xauth_paths.pop(cid, [])
+        for path in paths:
+            DockerLauncher.xauth_files.release(path)
+        self.cpu_allocator.release(cid)
+        return record
+
+    def adopt(self, any_owner: bool = False):
+        """
+        @brief Registers the containers launched by this owner in a previous
+               run of the process (found by their labels).
+        @param[in]  any_owner  Adopt the containers launched by any dockerx
+                               launcher, not only by this owner.
+        @returns the list of ContainerRecords adopted.
+        """
+        label = LABEL if any_owner else OWNER_LABEL + '=' + self.owner
+        containers = self.client.containers.list(all=True, sparse=True,
+            filters={'label': [label]})
+        return [self.registry.add(c) for c in containers]
+
+    def _bulk(self, func, records: list, max_workers: int, deadline: float):
+        """
+        @brief Calls 'func(record)' for each record in a bounded pool of
+               threads.
+        @param[in]  deadline  Seconds to wait for all the calls, None to wait
+                              for as long as they take.
+        @returns a dictionary {container id: None or exception}.
+        """
+        results = {}
+        if not records:
+            return results
+        ex = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(records))))
+        futures = {ex.submit(func, r): r for r in records}
+        done, _ = concurrent.futures.wait(futures, timeout=deadline)
+        ex.shutdown(wait=False, cancel_futures=True)
+        for future, record in futures.items():
+            if future in done:
+                results[record.id] = future.exception()
+            else:
+                results[record.id] = TimeoutError('[ERROR] The operation ' \
+                    + 'on the container ' + record.id[:12] \
+                    + ' did not finish before the deadline.')
+        return results
+
+    def stop_all(self, timeout: float = 10, max_workers: int = 8, 
+            deadline: float = None):
+        """
+        @brief Stops all the registered containers that are not stopped, in
+               parallel.
+        @param[in]  timeout      Seconds that Docker waits for each container
+                                 to stop before killing it.
+        @param[in]  max_workers  Containers stopped at the same time.
+        @param[in]  deadline     Seconds to wait for all the containers, None
+                                 to wait for as long as it takes.
+        @returns a dictionary {container id: None or exception}.
+        """
+        def stop(record):
+            record.container.stop(timeout=timeout)
+            self.registry.set_status(record.id, 'exited')
+
+        records = [r for r in self.registry.records() 
+                   if r.status not in TERMINATED]
+        return self._bulk(stop, records, max_workers, deadline)
+
+    def remove_all(self, force: bool = True, max_workers: int = 8,
+            deadline: float = None):
+        """
+        @brief Removes all the registered containers in parallel, and drops
+               them from the registry.
+        @param[in]  force        Kill the containers that are running.
+        @param[in]  max_workers  Containers removed at the same time.
+        @param[in]  deadline     Seconds to wait for all the containers, None
+                                 to wait for as long as it takes.
+        @returns a dictionary {container id: None or exception}.
+        """
+        return self._bulk(lambda r: self._remove(r, force), 
+                          self.registry.records(), max_workers, deadline)
+
+    def _remove(self, record, force: bool = True):
+        from docker.errors import NotFound
+        try:
+            record.container.remove(force=force)
+        except NotFound:
+            pass
+        self.forget(record.id)
+
+    def reap_exited(self, max_workers: int = 8, deadline: float = None):
+        """
+        @brief Removes the containers of this owner that have exited.
+
+        @details A single API call lists the containers of this owner. The
+                 statuses in the registry are updated, the containers of
+                 this owner that no longer exist are forgotten, and the 
+                 exited (or dead) ones are removed in parallel. The 
+                 containers of other owners (see adopt()) are left alone.
+
+        @param[in]  max_workers  Containers removed at the same time.
+        @param[in]  deadline     Seconds to wait for all the containers, None
+                                 to wait for as long as it takes.
+        @returns a dictionary {container id: None or exception} of the
+                 containers reaped.
+        """
+        from .registry import container_status
+        containers = self.client.containers.list(all=True, sparse=True,
+            filters={'label': [OWNER_LABEL + '=' + self.owner]})
+        alive = set()
+        exited = []
+        for c in containers:
+            alive.add(c.id)
+            status = container_status(c.attrs)
+            record = self.registry.set_status(c.id, status)
+            if status in ('exited', 'dead'):
+                exited.append(record or self.registry.add(c))
+        for record in self.registry.records():
+            if record.id not in alive \
+                    and record.labels.get(OWNER_LABEL) == self.owner:
+                self.forget(record.id)
+        return self._bulk(lambda r: self._remove(r, force=False), exited,
+                          max_workers, deadline)
+
 
 if __name__ == '__main__':
     raise RuntimeError('[ERROR] This module is not meant to be run as a script.')
@@ -0,0 +1,251 @@
+##
+# @brief  Tracking of the state of the launched containers through a single
+#         subscription to the Docker events stream.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details Polling 'container.reload()' costs one API call per container and
+#          tick. The EventMonitor instead keeps one 'GET /events' stream
+#          open, filtered to the containers labelled by the launcher, and
+#          updates the registry of the launcher as the events arrive.
+#          Callers can register callbacks for some actions (e.g. 'start',
+#          'die', 'oom') or block (or await) until a container goes through
+#          one of them. If the stream breaks, it is reopened from the time
+#          of the last event received, so no events are lost.
+
+import threading
+import collections
+
+# My imports
+from .registry import OWNER_LABEL
+
+# Status of a container after each event
+STATUS = {
+    'create' : 'created',
+    'start'  : 'running',
+    'restart': 'running',
+    'unpause': 'running',
+    'pause'  : 'paused',
+    'die'    : 'exited',
+    'stop'   : 'exited',
+    'kill'   : None,
+    'oom'    : None,
+}
+
+
+class EventMonitor:
+    """@brief Background subscription to the container events of a launcher."""
+
+    def __init__(self, launcher, any_owner: bool = False,
+            reconnect_delay: float = 1., history: int = 4096):
+        """
+        @param[in]  launcher         DockerLauncher whose registry is kept up
+                                     to date.
+        @param[in]  any_owner        Follow the containers launched by any
+                                     dockerx launcher, not only this owner.
+        @param[in]  reconnect_delay  Seconds to wait before reopening the
+                                     stream if it breaks.
+        @param[in]  history          Number of containers whose last events
+                                     are remembered for wait_for().
+        """
+        self.launcher = launcher
+        self.any_owner = any_owner
+        self.reconnect_delay = reconnect_delay
+        self.history = history
+        self.received = 0
+        self._callbacks = collections.defaultdict(list)
+        self._seen = collections.OrderedDict()  # id -> {action: event}
+        self._names = collections.OrderedDict()  # name -> id
+        self._waiters = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._connected = threading.Event()
+        self._stream = None
+        self._since = None
+        self._last = 0
+        self._thread = None
+
+    def filters(self):
+        """@returns the filters of the events stream."""
+        from .registry import LABEL
+        label = LABEL if self.any_owner \
+            else OWNER_LABEL + '=' + self.launcher.owner
+        return {'type': ['container'], 'label': [label]}
+
+    def start(self, timeout: float = 5.):
+        """
+        @brief Opens the events stream in a background thread.
+        @param[in]  timeout  Seconds to wait for the stream to be open, so
+                             that the events of the containers launched
+                             after this call are not missed.
+        @returns self.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                name='dockerx-events')
+            self._thread.start()
+        self._connected.wait(timeout)
+        return self
+
+    def close(self):
+        """@brief Closes the events stream and stops the background thread."""
+        self._stop.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._stream = self.launcher.client.events(decode=True,
+                    filters=self.filters(), since=self._since)
+                self._connected.set()
+                for event in self._stream:
+                    self._dispatch(event)
+                    if self._stop.is_set():
+                        break
+            except Exception:
+                pass
+            finally:
+                self._connected.clear()
+                self._stream = None
+            self._stop.wait(self.reconnect_delay)
+
+    def on(self, action: str, callback):
+        """
+        @brief Registers a callable 'callback(event)'.
+        @param[in]  action  Docker action, e.g. 'start', 'die' or 'oom'. None
+                            to be called for every event.
+        """
+        with self._lock:
+            self._callbacks[action].append(callback)
+
+    def _dispatch(self, event: dict):
+        action = event.get('Action') or event.get('status')
+        cid = event.get('id') or event.get('Actor', {}).get('ID')
+        if not action or not cid:
+            return
+        # After a reconnection, the events of the last second are replayed
+        stamp = event.get('timeNano') or 0
+        if stamp and stamp <= self._last:
+            return
+        self._last = max(self._last, stamp)
+        if event.get('time') is not None:
+            self._since = event['time']
+
+        # Keep the registry up to date
+        if action == 'destroy':
+            self.launcher.forget(cid)
+        elif STATUS.get(action) is not None:
+            self.launcher.registry.set_status(cid, STATUS[action])
+
+        with self._lock:
+            self.received += 1
+            seen = self._seen.setdefault(cid, {})
+            seen[action] = event
+            self._seen.move_to_end(cid)
+            while len(self._seen) > self.history:
+                self._seen.popitem(last=False)
+            name = event.get('Actor', {}).get('Attributes', {}).get('name')
+            if name:
+                self._names[name] = cid
+                self._names.move_to_end(name)
+                while len(self._names) > self.history:
+                    self._names.popitem(last=False)
+            callbacks = self._callbacks.get(action, []) \
+                + self._callbacks.get(None, [])
+            ready = [w for w in self._waiters
+                     if w[0] in (cid, name) and action in w[1]]
+            for waiter in ready:
+                self._waiters.remove(waiter)
+
+        for waiter in ready:
+            waiter[2](event)
+        for callback in callbacks:
+            callback(event)
+
+    def _find(self, ref: str, actions: tuple):
+        """@returns the last event of 'ref' among 'actions', or None."""
+        cid = self._names.get(ref, ref)
+        seen = self._seen.get(cid, {})
+        for action in actions:
+            if action in seen:
+                return seen[action]
+        return None
+
+    def _register(self, container, actions, resolve):
+        ref = getattr(container, 'id', container)
+        actions = (actions,) if isinstance(actions, str) else tuple(actions)
+        with self._lock:
+            event = self._find(ref, actions)
+            if event is None:
+                waiter = (ref, actions, resolve)
+                self._waiters.append(waiter)
+                return None, waiter
+        return event, None
+
+    def _unregister(self, waiter):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def wait_for(self, container, actions, timeout: float = None):
+        """
+        @brief Blocks until a container goes through one of 'actions'.
+
+        @param[in]  container  Docker container object, id or name.
+        @param[in]  actions    Action or list of actions, e.g. 'die' or
+                               ('die', 'oom').
+        @param[in]  timeout    Seconds to wait, None to wait forever.
+
+        @returns the event. If the container already went through the action
+                 its last event is returned right away.
+        """
+        done = threading.Event()
+        result = []
+
+        def resolve(event):
+            result.append(event)
+            done.set()
+
+        event, waiter = self._register(container, actions, resolve)
+        if event is not None:
+            return event
+        if not done.wait(timeout):
+            self._unregister(waiter)
+            raise TimeoutError('[ERROR] The container did not reach ' \
+                + repr(actions) + ' in ' + str(timeout) + ' seconds.')
+        return result[0]
+
+    async def wait_for_async(self, container, actions, timeout: float = None):
+        """@brief asyncio version of wait_for(), it does not block the loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(event):
+            loop.call_soon_threadsafe(
+                lambda: future.done() or future.set_result(event))
+
+        event, waiter = self._register(container, actions, resolve)
+        if event is not None:
+            return event
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._unregister(waiter)
+            raise TimeoutError('[ERROR] The container did not reach ' \
+                + repr(actions) + ' in ' + str(timeout) + ' seconds.')
@@ -0,0 +1,201 @@
+##
+# @brief  In-memory index of the local Docker images, and parallel pre-pull.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details Without an index, the first launch of a missing image stalls on
+#          an implicit pull, and concurrent launches of that image pull it
+#          once each. The ImageIndex lists the local images once, keeps
+#          the ids of their tags and digests in memory, and funnels all the
+#          pulls through a single future per image, so concurrent callers
+#          that need the same image wait for the same pull. An image that
+#          is not in the index is looked up in the engine before it is
+#          pulled (or reported missing), so images built or tagged after
+#          the refresh are still found.
+
+import threading
+import concurrent.futures
+
+
+def normalise(name: str):
+    """
+    @returns the canonical reference of an image, e.g. 'ubuntu' ->
+             'ubuntu:latest' and 'docker.io/library/ubuntu:20.04' ->
+             'ubuntu:20.04'.
+    """
+    for prefix in ('docker.io/library/', 'index.docker.io/library/',
+                   'docker.io/', 'index.docker.io/'):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+            break
+    if '@' not in name and ':' not in name.rsplit('/', 1)[-1]:
+        name += ':latest'
+    return name
+
+
+class ImageIndex:
+    """@brief Index of the images present in a Docker Engine."""
+
+    def __init__(self, client, max_workers: int = 4):
+        """
+        @param[in]  client       docker.DockerClient, or a callable that
+                                 returns it (so that the client can be
+                                 created lazily).
+        @param[in]  max_workers  Images pulled at the same time.
+        """
+        self._client = client
+        self.max_workers = max_workers
+        self.complete = False
+        self._ids = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def client(self):
+        return self._client() if callable(self._client) else self._client
+
+    def refresh(self):
+        """
+        @brief Lists the local images of the engine, after this call the
+               index knows which images are missing.
+        @returns the number of references (tags and digests) indexed.
+        """
+        # The low-level call is a single request, images.list() of the SDK
+        # would inspect each image
+        ids = {}
+        for image in self.client.api.images():
+            ids[image['Id']] = image['Id']
+            for ref in image.get('RepoTags') or []:
+                ids[normalise(ref)] = image['Id']
+            for ref in image.get('RepoDigests') or []:
+                ids[normalise(ref)] = image['Id']
+        with self._lock:
+            self._ids = ids
+            self.complete = True
+        return len(ids)
+
+    def add(self, name: str, image_id: str = None):
+        """@brief Records that an image is present locally."""
+        with self._lock:
+            self._ids[normalise(name)] = image_id
+
+    def discard(self, name: str):
+        """@brief Records that an image is not present (e.g. it was removed)."""
+        with self._lock:
+            self._ids.pop(normalise(name), None)
+
+    def present(self, name: str):
+        """@returns True if the image is known to be present locally."""
+        with self._lock:
+            return normalise(name) in self._ids
+
+    def missing(self, name: str):
+        """
+        @returns True if the image is known to be missing, i.e. the index
+                 has been refreshed, the image is not in it, and the engine
+                 confirms that it does not have it (it may have been built,
+                 tagged or loaded after the refresh, or be referenced by a
+                 short id), see lookup().
+        """
+        with self._lock:
+            if not self.complete or normalise(name) in self._ids:
+                return False
+        return self.lookup(name) is None
+
+    def lookup(self, name: str):
+        """
+        @brief Asks the engine for an image that is not in the index, and
+               indexes it if the engine has it.
+        @returns the id of the image, or None if the engine does not have it.
+        """
+        from docker.errors import NotFound
+        try:
+            image_id = self.client.api.inspect_image(name)['Id']
+        except NotFound:
+            return None
+        self.add(name, image_id)
+        self.add(image_id, image_id)
+        return image_id
+
+    def get(self, name: str):
+        """@returns the id of a local image, or None if it is not indexed."""
+        with self._lock:
+            return self._ids.get(normalise(name))
+
+    def pull(self, name: str):
+        """
+        @brief Pulls an image in the background. If the image is already
+               being pulled, no new pull is started.
+        @returns a concurrent.futures.Future with the id of the image.
+        """
+        name = normalise(name)
+        with self._lock:
+            future = self._inflight.get(name)
+            if future is None:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='dockerx-pull')
+                future = self._executor.submit(self._pull, name)
+                self._inflight[name] = future
+        return future
+
+    def _pull(self, name: str):
+        try:
+            image = self.client.images.pull(name)
+            with self._lock:
+                self._ids[name] = image.id
+            return image.id
+        finally:
+            with self._lock:
+                self._inflight.pop(name, None)
+
+    def prefetch(self, names: list, refresh: bool = True):
+        """
+        @brief Pulls the images that are not present locally, in parallel.
+
+        @param[in]  names    List of image names.
+        @param[in]  refresh  List the local images first, unless the index
+                             is already complete.
+
+        @returns a dictionary {name: image id or exception}, with the names
+                 as given.
+        """
+        if refresh and not self.complete:
+            self.refresh()
+        futures = {}
+        for name in names:
+            if name not in futures and not self.present(name) \
+                    and self.lookup(name) is None:
+                futures[name] = self.pull(name)
+        results = {}
+        for name in names:
+            if name in futures:
+                try:
+                    results[name] = futures[name].result()
+                except Exception as e:
+                    results[name] = e
+            else:
+                results[name] = self.get(name)
+        return results
+
+    def ensure(self, name: str, pull: bool = True):
+        """
+        @brief Makes sure that an image is present locally.
+
+        @param[in]  name  Image name.
+        @param[in]  pull  Pull the image if it is missing. If False, a
+                          missing image raises docker.errors.ImageNotFound.
+
+        @returns the id of the image (None if it was indexed without id).
+        """
+        if not self.complete:
+            self.refresh()
+        if not self.missing(name):
+            return self.get(name)
+        if not pull:
+            from docker.errors import ImageNotFound
+            raise ImageNotFound('[ERROR] The image ' + name + ' is not ' \
+                + 'present locally and pulling it is disabled.')
+        return self.pull(name).result()
@@ -0,0 +1,317 @@
+##
+# @brief  Snapshot of the network interfaces of the host and their addresses.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details Finding the IP of 'docker0' used to take a call to if_nameindex()
+#          to check that the interface exists, another one to check it
+#          again, and a new UDP socket for a SIOCGIFADDR ioctl, on every
+#          launch. HostNetwork enumerates all the interfaces with their IPv4
+#          and IPv6 addresses at once, with a single netlink RTM_GETADDR
+#          dump (or, where netlink is not available, /proc/net/if_inet6 and
+#          one SIOCGIFADDR ioctl per interface), and caches the result. The
+#          snapshot is dropped after 'ttl' seconds, or as soon as the kernel
+#          notifies a change of the links or addresses.
+
+import os
+import time
+import errno
+import socket
+import struct
+import threading
+
+# Netlink constants (linux/netlink.h, linux/rtnetlink.h)
+NETLINK_ROUTE = 0
+NLMSG_HDR = struct.Struct('=IHHII')
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+RTM_NEWADDR = 20
+RTM_GETADDR = 22
+IFADDRMSG = struct.Struct('=BBBBI')
+RTATTR = struct.Struct('=HH')
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+# Scope of the IPv6 link-local addresses, only usable with a zone index
+RT_SCOPE_LINK = 253
+
+# ioctl to get the (primary) IPv4 address of an interface
+SIOCGIFADDR = 0x8915
+
+
+def _align(length: int):
+    return (length + 3) & ~3
+
+
+class Interface:
+    """@brief Network interface of the host."""
+
+    __slots__ = ('name', 'index', 'ipv4', 'ipv6')
+
+    def __init__(self, name: str, index: int):
+        self.name = name
+        self.index = index
+        self.ipv4 = []  # Primary address first
+        self.ipv6 = []  # Global addresses before link-local ones
+
+    def address(self):
+        """
+        @returns the IPv4 address of the interface, or its first IPv6 address
+                 if it does not have one, or None.
+        """
+        if self.ipv4:
+            return self.ipv4[0]
+        return self.ipv6[0] if self.ipv6 else None
+
+    def __repr__(self):
+        return 'Interface(name=%r, index=%d, ipv4=%r, ipv6=%r)' % (self.name,
+            self.index, self.ipv4, self.ipv6)
+
+
+def parse_addr_messages(data: bytes):
+    """
+    @brief Parses the RTM_NEWADDR messages of a netlink dump.
+    @param[in]  data  Bytes received from the netlink socket.
+    @returns a tuple (addresses, done), where 'addresses' is a list of
+             tuples (ifindex, family, address, scope), and 'done' is True if
+             the dump finished.
+    """
+    addresses = []
+    offset = 0
+    while offset + NLMSG_HDR.size <= len(data):
+        length, msg_type, _, _, _ = NLMSG_HDR.unpack_from(data, offset)
+        if length < NLMSG_HDR.size:
+            break
+        if msg_type == NLMSG_DONE:
+            return addresses, True
+        if msg_type == NLMSG_ERROR:
+            code, = struct.unpack_from('=i', data, offset + NLMSG_HDR.size)
+            if code:
+                raise OSError(-code, os.strerror(-code))
+        elif msg_type == RTM_NEWADDR:
+            start = offset + NLMSG_HDR.size
+            family, _, _, scope, index = IFADDRMSG.unpack_from(data, start)
+            attrs = {}
+            pos = start + IFADDRMSG.size
+            while pos + RTATTR.size <= offset + length:
+                rta_len, rta_type = RTATTR.unpack_from(data, pos)
+                if rta_len < RTATTR.size:
+                    break
+                attrs[rta_type] = data[pos + RTATTR.size:pos + rta_len]
+                pos += _align(rta_len)
+
+            # IFA_LOCAL is the address of the interface, IFA_ADDRESS is
+            # the peer on point-to-point links
+            raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+            if raw is not None and family in (socket.AF_INET,
+                    socket.AF_INET6):
+                addresses.append((index, family,
+                    socket.inet_ntop(family, raw), scope))
+        offset += _align(length)
+    return addresses, False
+
+
+def dump_addresses_netlink(timeout: float = 1.):
+    """
+    @brief Gets all the IPv4 and IPv6 addresses of the host with one
+           RTM_GETADDR netlink dump.
+    @returns a list of tuples (ifindex, family, address, scope).
+    """
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW,
+            NETLINK_ROUTE) as sock:
+        sock.settimeout(timeout)
+        sock.bind((0, 0))
+        request = NLMSG_HDR.pack(NLMSG_HDR.size + IFADDRMSG.size,
+            RTM_GETADDR, NLM_F_REQUEST | NLM_F_DUMP, 1, 0) \
+            + IFADDRMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+        sock.send(request)
+        addresses = []
+        while True:
+            chunk, done = parse_addr_messages(sock.recv(1 << 16))
+            addresses += chunk
+            if done:
+                return addresses
+
+
+def read_proc_inet6(path: str = '/proc/net/if_inet6'):
+    """
+    @returns a list of tuples (ifindex, family, address, scope) with the
+             IPv6 addresses listed in /proc/net/if_inet6.
+    """
+    addresses = []
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return addresses
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 6:
+            continue
+        raw = bytes.fromhex(fields[0])
+        scope = RT_SCOPE_LINK if int(fields[3], 16) == 0x20 else 0
+        addresses.append((int(fields[1], 16), socket.AF_INET6,
+            socket.inet_ntop(socket.AF_INET6, raw), scope))
+    return addresses
+
+
+def dump_addresses_fallback(interfaces: list):
+    """
+    @brief Gets the addresses of the host without netlink: the primary IPv4
+           address of each interface with SIOCGIFADDR (all the ioctls share
+           one socket), and the IPv6 ones from /proc/net/if_inet6.
+    @param[in]  interfaces  List of tuples (ifindex, name).
+    @returns a list of tuples (ifindex, family, address, scope).
+    """
+    import fcntl
+    addresses = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for index, name in interfaces:
+            request = struct.pack('256s', name[:15].encode('utf-8'))
+            try:
+                reply = fcntl.ioctl(sock.fileno(), SIOCGIFADDR, request)
+            except OSError:
+                continue
+            addresses.append((index, socket.AF_INET,
+                socket.inet_ntoa(reply[20:24]), 0))
+    return addresses + read_proc_inet6()
+
+
+class HostNetwork:
+    """@brief Cached snapshot of the interfaces of the host."""
+
+    def __init__(self, ttl: float = 30., watch: bool = True):
+        """
+        @param[in]  ttl    Seconds that a snapshot is valid.
+        @param[in]  watch  Subscribe to the netlink notifications of the
+                           kernel to drop the snapshot as soon as a link or
+                           address changes.
+        """
+        self.ttl = ttl
+        self.watch = watch
+        self.refreshes = 0
+        self.netlink = None  # Set on the first refresh
+        self._snapshot = None
+        self._stamp = 0.
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def refresh(self):
+        """
+        @brief Enumerates the interfaces and their addresses.
+        @returns the dictionary {name: Interface}.
+        """
+        interfaces = socket.if_nameindex()
+        by_index = {index: Interface(name, index)
+                    for index, name in interfaces}
+        try:
+            addresses = dump_addresses_netlink()
+            netlink = True
+        except (OSError, AttributeError):
+            addresses = dump_addresses_fallback(interfaces)
+            netlink = False
+        link_local = []
+        for index, family, address, scope in addresses:
+            iface = by_index.get(index)
+            if iface is None:
+                continue
+            if family == socket.AF_INET:
+                iface.ipv4.append(address)
+            elif scope == RT_SCOPE_LINK:
+                link_local.append((iface, address))
+            else:
+                iface.ipv6.append(address)
+        for iface, address in link_local:
+            iface.ipv6.append(address)
+
+        snapshot = {iface.name: iface for iface in by_index.values()}
+        with self._lock:
+            self._snapshot = snapshot
+            self._stamp = time.monotonic()
+            self.netlink = netlink
+            self.refreshes += 1
+        if self.watch and netlink:
+            self._start_watcher()
+        return snapshot
+
+    def snapshot(self):
+        """
+        @returns the dictionary {name: Interface}, refreshed if it has
+                 expired or has been invalidated.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None \
+                    and time.monotonic() - self._stamp < self.ttl:
+                return snapshot
+        return self.refresh()
+
+    def invalidate(self):
+        """@brief Drops the snapshot, the next lookup enumerates again."""
+        with self._lock:
+            self._snapshot = None
+
+    def get(self, ifname: str):
+        """@returns the Interface called 'ifname', or None."""
+        return self.snapshot().get(ifname)
+
+    def exists(self, ifname: str):
+        """@returns True if the interface exists. Otherwise, False."""
+        return ifname in self.snapshot()
+
+    def address(self, ifname: str):
+        """
+        @returns the IPv4 address of an interface (or its IPv6 address if it
+                 has no IPv4 address), or None if it does not exist or has
+                 no addresses.
+        """
+        iface = self.get(ifname)
+        return iface.address() if iface is not None else None
+
+    def _start_watcher(self):
+        with self._lock:
+            if self._watcher is not None:
+                return
+            try:
+                sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW,
+                    NETLINK_ROUTE)
+                sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR \
+                    | RTMGRP_IPV6_IFADDR))
+            except OSError:
+                self.watch = False
+                return
+            sock.settimeout(0.5)
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch,
+                args=(sock,), daemon=True, name='dockerx-netlink')
+            self._watcher.start()
+
+    def _watch(self, sock: socket.socket):
+        with sock:
+            while not self._stop.is_set():
+                try:
+                    data = sock.recv(1 << 16)
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    # The kernel dropped notifications, be conservative
+                    if e.errno == errno.ENOBUFS:
+                        self.invalidate()
+                        continue
+                    break
+                if data:
+                    self.invalidate()
+
+    def close(self):
+        """@brief Stops watching the netlink notifications."""
+        self._stop.set()
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.join()
+            self._watcher = None
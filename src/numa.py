@@ -0,0 +1,335 @@
+##
+# @brief  NUMA topology of the host and allocation of pinned CPUs.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details The topology is read from /sys/devices/system/node: the CPUs of
+#          each NUMA node ('cpulist') and its memory ('meminfo'). The
+#          CpuAllocator hands out sets of CPUs for the 'cpuset_cpus' and
+#          'cpuset_mems' options of the containers. Each allocation is
+#          placed on the NUMA node with the most free CPUs (so concurrent
+#          launches are spread across the nodes) and its memory is bound to
+#          the same node. The allocator remembers the CPUs that it has
+#          handed out until they are released, so no CPU is given to two
+#          containers.
+
+import os
+import re
+import threading
+
+
+# Multipliers of the units of the sizes, e.g. '256m'
+SIZE_UNITS = {'b': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+
+
+def parse_size(size):
+    """
+    @param[in]  size  Number of bytes, or a string like '512m', '1g' or
+                      '4gb' (the suffixes of the docker SDK).
+    @returns the number of bytes.
+    """
+    if isinstance(size, int):
+        return size
+    value = str(size).strip().lower()
+    if value.endswith('b') and value[-2:-1] in SIZE_UNITS:
+        value = value[:-1]
+    unit = value[-1:] if value[-1:] in SIZE_UNITS else 'b'
+    number = value[:-1] if value[-1:] in SIZE_UNITS else value
+    try:
+        return int(float(number) * SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError('[ERROR] Invalid size: ' + repr(size))
+
+
+def parse_cpulist(text: str):
+    """
+    @param[in]  text  List in the format of sysfs and cpusets, e.g.
+                      '0-3,8-11'.
+    @returns the sorted list of integers, e.g. [0, 1, 2, 3, 8, 9, 10, 11].
+    """
+    items = set()
+    for part in text.strip().split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition('-')
+        try:
+            if sep:
+                items.update(range(int(first), int(last) + 1))
+            else:
+                items.add(int(first))
+        except ValueError:
+            raise ValueError('[ERROR] Invalid CPU list: ' + repr(text))
+    return sorted(items)
+
+
+def format_cpulist(items):
+    """@returns the compact list of integers, e.g. [0, 1, 2, 5] -> '0-2,5'."""
+    ranges = []
+    for item in sorted(set(items)):
+        if ranges and item == ranges[-1][1] + 1:
+            ranges[-1][1] = item
+        else:
+            ranges.append([item, item])
+    return ','.join(str(a) if a == b else str(a) + '-' + str(b)
+                    for a, b in ranges)
+
+
+class NumaNode:
+    """@brief NUMA node of the host."""
+
+    __slots__ = ('id', 'cpus', 'mem_total')
+
+    def __init__(self, node_id: int, cpus: list, mem_total: int = 0):
+        """
+        @param[in]  node_id    Number of the node.
+        @param[in]  cpus       List of the CPUs of the node.
+        @param[in]  mem_total  Bytes of memory of the node, 0 if unknown.
+        """
+        self.id = node_id
+        self.cpus = cpus
+        self.mem_total = mem_total
+
+    def __repr__(self):
+        return 'NumaNode(id=%d, cpus=%r, mem_total=%d)' % (self.id,
+            format_cpulist(self.cpus), self.mem_total)
+
+
+def read_node_memory(path: str):
+    """@returns the bytes of 'MemTotal' in the meminfo of a node, or 0."""
+    try:
+        with open(path) as f:
+            for line in f:
+                m = re.match(r'Node\s+\d+\s+MemTotal:\s+(\d+)\s*kB', line)
+                if m:
+                    return int(m.group(1)) << 10
+    except OSError:
+        pass
+    return 0
+
+
+def read_topology(root: str = '/sys/devices/system/node'):
+    """
+    @brief Reads the NUMA nodes of the host. Without NUMA information (e.g.
+           a kernel without NUMA support), all the CPUs usable by this
+           process are a single node 0.
+    @param[in]  root  Folder of the nodes in sysfs.
+    @returns the list of NumaNode objects, sorted by id, of the nodes that
+             have CPUs.
+    """
+    nodes = []
+    try:
+        names = os.listdir(root)
+    except OSError:
+        names = []
+    for name in names:
+        m = re.fullmatch(r'node(\d+)', name)
+        if not m:
+            continue
+        path = os.path.join(root, name)
+        try:
+            with open(os.path.join(path, 'cpulist')) as f:
+                cpus = parse_cpulist(f.read())
+        except OSError:
+            continue
+        if cpus:
+            nodes.append(NumaNode(int(m.group(1)), cpus,
+                read_node_memory(os.path.join(path, 'meminfo'))))
+    if not nodes:
+        cpus = sorted(os.sched_getaffinity(0)) \
+            if hasattr(os, 'sched_getaffinity') \
+            else list(range(os.cpu_count() or 1))
+        nodes.append(NumaNode(0, cpus))
+    return sorted(nodes, key=lambda node: node.id)
+
+
+def engine_topology(info: dict):
+    """
+    @brief Topology of the host of a Docker engine known only by its /info,
+           e.g. an engine of another host: its 'NCPU' CPUs (numbered from 0)
+           in a single NUMA node 0 with 'MemTotal' bytes.
+    @param[in]  info  Dictionary returned by the /info endpoint.
+    @returns the list of NumaNode objects.
+    """
+    ncpu = int(info.get('NCPU') or 0)
+    if ncpu < 1:
+        raise RuntimeError('[ERROR] The Docker engine did not report its ' \
+            + 'number of CPUs.')
+    return [NumaNode(0, list(range(ncpu)), int(info.get('MemTotal') or 0))]
+
+
+class Allocation:
+    """@brief CPUs (and memory) handed out to a container."""
+
+    __slots__ = ('cpus', 'nodes', 'memory', 'owner')
+
+    def __init__(self, cpus: list, nodes: list, memory: int = 0):
+        self.cpus = cpus
+        self.nodes = nodes
+        self.memory = memory
+        self.owner = None  # Id of the container, see CpuAllocator.assign()
+
+    @property
+    def cpuset_cpus(self):
+        """@returns the value of the 'cpuset_cpus' option, e.g. '0-3'."""
+        return format_cpulist(self.cpus)
+
+    @property
+    def cpuset_mems(self):
+        """@returns the value of the 'cpuset_mems' option, e.g. '0'."""
+        return format_cpulist(self.nodes)
+
+    def __repr__(self):
+        return 'Allocation(cpus=%r, mems=%r, owner=%r)' % (self.cpuset_cpus,
+            self.cpuset_mems, self.owner)
+
+
+class CpuAllocator:
+    """@brief Hands out CPUs of the host without oversubscribing them."""
+
+    def __init__(self, root: str = '/sys/devices/system/node',
+            topology=None):
+        """
+        @param[in]  root      Folder of the NUMA nodes in sysfs, the 
+                              topology is read on first use.
+        @param[in]  topology  Callable that returns the list of NumaNode 
+                              objects instead of reading them from 'root',
+                              e.g. for the host of a remote engine (see
+                              engine_topology()). Called on first use.
+        """
+        self.root = root
+        self.topology = topology
+        self._nodes = None
+        self._busy = set()      # CPUs handed out
+        self._memory = {}       # Node id -> bytes handed out
+        self._owners = {}       # Container id -> Allocation
+        self._lock = threading.Lock()
+
+    @property
+    def nodes(self):
+        """@returns the list of NumaNode objects of the host."""
+        if self._nodes is None:
+            self._nodes = self.topology() if self.topology is not None \
+                else read_topology(self.root)
+        return self._nodes
+
+    def free(self, node: NumaNode = None):
+        """@returns the sorted list of free CPUs (of a node, or of all)."""
+        nodes = self.nodes if node is None else [node]
+        with self._lock:
+            return [cpu for n in nodes for cpu in n.cpus
+                    if cpu not in self._busy]
+
+    def allocate(self, cpus: int = 1, memory: int = 0, mems: str = None):
+        """
+        @brief Reserves CPUs for a container.
+
+        @details The CPUs are taken from the node with the most free CPUs
+                 that fits the request (and has 'memory' bytes left, if the
+                 memory of the nodes is known). If no single node fits, the
+                 CPUs are taken from several nodes, starting with the ones
+                 with the most free CPUs.
+
+        @param[in]  cpus    Number of CPUs.
+        @param[in]  memory  Bytes of memory of the container, 0 if unknown.
+        @param[in]  mems    NUMA nodes to choose from, e.g. '1' or '0-1', by
+                            default all of them.
+
+        @returns an Allocation. Raises RuntimeError if there are not enough
+                 free CPUs, and ValueError if the nodes of the CPUs do not
+                 have 'memory' bytes left.
+        """
+        if cpus < 1:
+            raise ValueError('[ERROR] At least one CPU must be allocated.')
+        candidates = self.nodes
+        if mems is not None:
+            allowed = set(parse_cpulist(str(mems)))
+            candidates = [node for node in candidates if node.id in allowed]
+            if not candidates:
+                raise ValueError('[ERROR] The host has no NUMA node with ' \
+                    + 'CPUs in ' + repr(mems) + '.')
+        with self._lock:
+            free = {node.id: [c for c in node.cpus if c not in self._busy]
+                    for node in candidates}
+
+            def memory_left(node):
+                if not node.mem_total:
+                    return float('inf')
+                return node.mem_total - self._memory.get(node.id, 0)
+
+            # Most free CPUs first, the node id breaks ties
+            ranked = sorted(candidates, key=lambda node:
+                (-len(free[node.id]), node.id))
+            fits = [node for node in ranked if len(free[node.id]) >= cpus
+                    and memory_left(node) >= memory]
+            if fits:
+                chosen = [(fits[0], free[fits[0].id][:cpus])]
+            else:
+                chosen = []
+                needed = cpus
+                for node in ranked:
+                    if needed and free[node.id]:
+                        take = free[node.id][:needed]
+                        chosen.append((node, take))
+                        needed -= len(take)
+                if needed:
+                    raise RuntimeError('[ERROR] Cannot pin ' + str(cpus) \
+                        + ' CPUs, only ' + str(cpus - needed) + ' of ' \
+                        + str(sum(len(n.cpus) for n in candidates)) \
+                        + ' are free.')
+                left = sum(memory_left(node) for node, _ in chosen)
+                if left < memory:
+                    raise ValueError('[ERROR] Cannot bind ' + str(memory) \
+                        + ' bytes of memory to the NUMA nodes ' \
+                        + format_cpulist(node.id for node, _ in chosen) \
+                        + ', only ' + str(left) + ' are left.')
+            allocation = Allocation(sorted(c for _, t in chosen for c in t),
+                sorted(node.id for node, _ in chosen), memory)
+            self._busy.update(allocation.cpus)
+            share = memory // len(chosen)
+            for node, _ in chosen:
+                self._memory[node.id] = self._memory.get(node.id, 0) + share
+            return allocation
+
+    def assign(self, allocation: Allocation, owner: str):
+        """@brief Records the container that owns an allocation."""
+        with self._lock:
+            allocation.owner = owner
+            self._owners[owner] = allocation
+
+    def release(self, allocation_or_owner):
+        """
+        @brief Frees the CPUs of an allocation.
+        @param[in]  allocation_or_owner  Allocation, or the id of the
+                                         container that owns it.
+        @returns the Allocation released, or None if there was none.
+        """
+        with self._lock:
+            allocation = allocation_or_owner
+            if not isinstance(allocation, Allocation):
+                allocation = self._owners.pop(allocation_or_owner, None)
+                if allocation is None:
+                    return None
+            elif allocation.owner is not None:
+                self._owners.pop(allocation.owner, None)
+            if not set(allocation.cpus) <= self._busy:
+                return None
+            self._busy.difference_update(allocation.cpus)
+            share = allocation.memory // len(allocation.nodes)
+            for node_id in allocation.nodes:
+                self._memory[node_id] = max(0,
+                    self._memory.get(node_id, 0) - share)
+            return allocation
+
+    def allocations(self):
+        """@returns a dictionary {container id: Allocation}."""
+        with self._lock:
+            return dict(self._owners)
+
+    def stats(self):
+        """@returns a dictionary {node id: {'cpus', 'free', 'memory'}}."""
+        nodes = self.nodes
+        with self._lock:
+            return {node.id: {'cpus': len(node.cpus),
+                'free': sum(1 for c in node.cpus if c not in self._busy),
+                'memory': self._memory.get(node.id, 0)} for node in nodes}
@@ -0,0 +1,339 @@
+##
+# @brief  Pool of pre-created containers, handed out without a cold launch.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details A ContainerPool keeps a few containers per image already created,
+#          started and wired to the X11 server (the options come from
+#          DockerLauncher.prepare_environment()). In 'pause' mode the idle
+#          containers are frozen with 'docker pause' so they do not use any
+#          CPU, and acquire() only has to unpause one. The command of the
+#          user is run with 'docker exec', as the main process of a pooled
+#          container is just a placeholder (e.g. 'sleep infinity').
+#          Every hand-out triggers a refill in the background, and idle
+#          containers are evicted when they get too old, or when the pool
+#          holds more than 'capacity' containers (least recently used images
+#          first).
+
+import time
+import warnings
+import threading
+import collections
+import concurrent.futures
+
+# My imports
+from .cache import X11EnvironmentCache
+from . import tracing
+
+
+class ContainerPool:
+    """@brief Warm pool of containers on top of a DockerLauncher."""
+
+    modes = ('pause', 'running')
+
+    def __init__(self, launcher, size: int = 2, mode: str = 'pause',
+            max_idle: float = 600., capacity: int = None,
+            command: str = 'sleep infinity', max_workers: int = 4,
+            maintenance_interval: float = 30., history: int = 1024):
+        """
+        @param[in]  launcher              DockerLauncher used to create the
+                                          containers.
+        @param[in]  size                  Idle containers kept per image.
+        @param[in]  mode                  'pause' to freeze the idle
+                                          containers, or 'running' to keep
+                                          them running.
+        @param[in]  max_idle              Seconds after which an idle
+                                          container is evicted.
+        @param[in]  capacity              Maximum number of idle containers
+                                          in the pool (all images), None for
+                                          no limit.
+        @param[in]  command               Main process of the pooled
+                                          containers, it must keep them alive.
+        @param[in]  max_workers           Containers created at the same time
+                                          when refilling the pool.
+        @param[in]  maintenance_interval  Seconds between evictions of idle
+                                          containers by a background thread,
+                                          None to disable the thread.
+        @param[in]  history               Number of hand-out latencies kept
+                                          for the statistics.
+        """
+        if mode not in ContainerPool.modes:
+            raise ValueError('[ERROR] The pool mode must be one of: ' \
+                + ', '.join(ContainerPool.modes) + '.')
+        self.launcher = launcher
+        self.size = size
+        self.mode = mode
+        self.max_idle = max_idle
+        self.capacity = capacity
+        self.command = command
+        self.hits = 0
+        self.misses = 0
+        self.refill_errors = 0
+        self._latencies = collections.deque(maxlen=history)
+        self._images = collections.OrderedDict()  # Least recently used first
+        self._idle = {}
+        self._inflight = collections.Counter()
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='dockerx-pool')
+        self._closed = threading.Event()
+        self._maintenance = None
+        if maintenance_interval is not None:
+            self._maintenance = threading.Thread(target=self._maintain,
+                args=(maintenance_interval,), daemon=True)
+            self._maintenance.start()
+
+    def warm(self, image_name: str, size: int = None, wait: bool = True,
+            ifname: str = 'docker0', nvidia_runtime: bool = False,
+            volumes: dict = {}, env_vars: dict = {}, network: str = None):
+        """
+        @brief Starts keeping 'size' idle containers of an image.
+
+        @param[in]  image_name  Name of the Docker image.
+        @param[in]  size        Idle containers of this image, by default
+                                the 'size' of the pool.
+        @param[in]  wait        Wait until the containers are created.
+        @param[in]  ifname, nvidia_runtime, volumes, env_vars, network
+                                Same as in DockerLauncher.launch_container().
+
+        @returns the number of containers being created.
+        """
+        spec = {'size': self.size if size is None else size,
+            'launch': {'ifname': ifname, 'nvidia_runtime': nvidia_runtime,
+                       'volumes': volumes, 'env_vars': env_vars,
+                       'network': network}}
+        spec['options'], spec['key'] = self._options(spec['launch'])
+        with self._lock:
+            self._images[image_name] = spec
+            self._images.move_to_end(image_name)
+            self._idle.setdefault(image_name, collections.deque())
+        futures = self._refill(image_name)
+        if wait:
+            concurrent.futures.wait(futures)
+        return len(futures)
+
+    @staticmethod
+    def _options(launch: dict):
+        """@returns the docker options of a spec and their X11 cache key."""
+        key = X11EnvironmentCache.key(launch['ifname'])
+        options = ContainerPool._prepare(launch)
+        return options, key
+
+    @staticmethod
+    def _prepare(launch: dict):
+        from .dl import DockerLauncher
+        return DockerLauncher.prepare_environment(launch['ifname'],
+            launch['nvidia_runtime'], launch['volumes'], launch['env_vars'],
+            launch['network'])
+
+    def acquire(self, image_name: str, command: str = None):
+        """
+        @brief Hands out a running container of an image.
+
+        @details If the pool has an idle container of the image, it is
+                 unpaused (in 'pause' mode) and 'command' is run in it with
+                 'docker exec'. Otherwise, the container is launched cold
+                 with 'command' as its main process. In both cases, the pool
+                 is refilled in the background.
+
+        @param[in]  image_name  Name of the Docker image.
+        @param[in]  command     Command to run in the container.
+
+        @returns the Docker container object.
+        """
+        tic = time.perf_counter()
+        with self._lock:
+            spec = self._images.get(image_name)
+            if spec is not None:
+                self._images.move_to_end(image_name)
+            idle = self._idle.get(image_name)
+            container = idle.popleft()[0] if idle else None
+
+        # The X11 setup changed since the containers were created, e.g. a
+        # new ssh -X session, so they point to a display that is gone
+        if spec is not None and spec['key'] \
+                != X11EnvironmentCache.key(spec['launch']['ifname']):
+            stale = [container] if container is not None else []
+            with self._lock:
+                stale += [c for c, _ in self._idle.get(image_name, ())]
+                self._idle[image_name] = collections.deque()
+            container = None
+            self._discard(stale)
+            options, key = self._options(spec['launch'])
+            with self._lock:
+                spec['options'], spec['key'] = options, key
+
+        # A pooled container that cannot be woken up is thrown away, and
+        # the container is launched cold
+        if container is not None:
+            try:
+                with tracing.span('pool_hit'):
+                    if self.mode == 'pause':
+                        container.unpause()
+                        self.launcher.registry.set_status(container.id,
+                            'running')
+                    if command is not None:
+                        container.exec_run(command, detach=True)
+            except Exception as e:
+                warnings.warn('[WARN] Could not hand out a pooled ' \
+                    + 'container of ' + image_name + ': ' + str(e))
+                self._discard([container])
+                container = None
+
+        with self._lock:
+            if container is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            options = dict(spec['options']) if spec is not None else None
+
+        if container is None:
+            with tracing.span('pool_miss'):
+                if spec is None:
+                    container = self.launcher.launch_container(image_name,
+                        command=command)
+                else:
+                    container = self.launcher._run(image_name, command, None,
+                        options)
+
+        with self._lock:
+            self._latencies.append(time.perf_counter() - tic)
+        if spec is not None:
+            self._refill(image_name)
+        return container
+
+    def _refill(self, image_name: str):
+        """
+        @brief Schedules the creation of the containers missing in the pool
+               of an image, taking into account those already being created.
+        @returns the list of futures of the containers scheduled.
+        """
+        futures = []
+        with self._lock:
+            spec = self._images.get(image_name)
+            if spec is None or self._closed.is_set():
+                return futures
+            missing = spec['size'] - len(self._idle[image_name]) \
+                - self._inflight[image_name]
+            for _ in range(max(0, missing)):
+                self._inflight[image_name] += 1
+                futures.append(self._executor.submit(self._create, image_name,
+                    spec))
+        return futures
+
+    def _create(self, image_name: str, spec: dict):
+        container = None
+        with self._lock:
+            options = dict(spec['options'])
+        try:
+            container = self.launcher._run(image_name, self.command, None,
+                options)
+            if self.mode == 'pause':
+                container.pause()
+                self.launcher.registry.set_status(container.id, 'paused')
+        except Exception as e:
+            with self._lock:
+                self.refill_errors += 1
+            warnings.warn('[WARN] Could not create a pooled container of ' \
+                + image_name + ': ' + str(e))
+            self._discard([container] if container is not None else [])
+            container = None
+        finally:
+            with self._lock:
+                self._inflight[image_name] -= 1
+                current = self._images.get(image_name) is spec
+                if container is not None and current \
+                        and not self._closed.is_set():
+                    self._idle[image_name].append((container,
+                        time.monotonic()))
+                    container = None
+        # The pool was closed or the image re-warmed in the meantime
+        if container is not None:
+            self._discard([container])
+        self.evict_idle()
+
+    def evict_idle(self):
+        """
+        @brief Removes the idle containers older than 'max_idle' seconds,
+               and those above the 'capacity' of the pool (from the least
+               recently used images).
+        @returns the number of containers evicted.
+        """
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for idle in self._idle.values():
+                while idle and now - idle[0][1] > self.max_idle:
+                    evicted.append(idle.popleft()[0])
+            if self.capacity is not None:
+                excess = sum(len(idle) for idle in self._idle.values()) \
+                    - self.capacity
+                for image_name in self._images:
+                    idle = self._idle[image_name]
+                    while excess > 0 and idle:
+                        evicted.append(idle.popleft()[0])
+                        excess -= 1
+        self._discard(evicted)
+        return len(evicted)
+
+    def _discard(self, containers: list):
+        """@brief Removes containers that will not be handed out."""
+        for container in containers:
+            try:
+                container.remove(force=True)
+            except Exception:
+                pass
+            self.launcher.forget(container.id)
+
+    def _maintain(self, interval: float):
+        while not self._closed.wait(interval):
+            self.evict_idle()
+
+    def idle(self, image_name: str = None):
+        """@returns the number of idle containers (of an image, or in total)."""
+        with self._lock:
+            if image_name is not None:
+                return len(self._idle.get(image_name, ()))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def stats(self):
+        """
+        @returns a dictionary with the hits, misses and hit rate of the pool,
+                 the number of idle containers per image and the latency (in
+                 seconds) of the last hand-outs.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            total = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else None,
+                'refill_errors': self.refill_errors,
+                'idle': {name: len(idle) for name, idle in self._idle.items()},
+            }
+        latency = {'count': len(latencies)}
+        if latencies:
+            pick = lambda q: latencies[min(len(latencies) - 1,
+                int(q * len(latencies)))]
+            latency.update({'mean': sum(latencies) / len(latencies),
+                'p50': pick(0.5), 'p95': pick(0.95)})
+        stats['handout_latency'] = latency
+        return stats
+
+    def close(self):
+        """@brief Stops the refills and removes all the idle containers."""
+        self._closed.set()
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            idle = [c for q in self._idle.values() for c, _ in q]
+            self._idle = {name: collections.deque() for name in self._idle}
+        self._discard(idle)
+        if self._maintenance is not None:
+            self._maintenance.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
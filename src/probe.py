@@ -0,0 +1,341 @@
+##
+# @brief  Bounded, parallel detection of the X11 server in the DISPLAY.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details The TCP and unix socket transports are probed at the same time.
+#          If both of them answer, TCP is preferred (see PREFERENCE), so the
+#          result does not depend on which probe finished first. A transport
+#          only counts as positive if the peer replies to the X11 connection
+#          setup request, so a random service listening on port 6000+n is
+#          not mistaken for an X server. All the probes are bounded by a
+#          deadline.
+
+import os
+import re
+import time
+import socket
+import struct
+import threading
+import concurrent.futures
+
+# My imports
+from . import x11env
+
+# X11 connection setup request: little-endian byte order, protocol 11.0 and
+# no authorization. The server answers with an 8-byte header whose first
+# byte is 0 (Failed), 1 (Success) or 2 (Authenticate).
+X11_SETUP_REQUEST = struct.pack('<BxHHHHxx', ord('l'), 11, 0, 0, 0)
+
+# Transports in order of preference when several of them answer
+PREFERENCE = ('tcp', 'unix')
+
+
+class ProbeResult:
+    """@brief Outcome of probing the X11 server of a display."""
+
+    def __init__(self, transport: str, timings: dict, elapsed: float):
+        """
+        @param[in]  transport  'tcp', 'unix' or None if no X server answered
+                               before the deadline.
+        @param[in]  timings    Dictionary with the time (in seconds) that
+                               each probe took, None if it did not finish
+                               before the deadline or was not run.
+        @param[in]  elapsed    Total time (in seconds) of the detection.
+        """
+        self.transport = transport
+        self.timings = timings
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return 'ProbeResult(transport=%r, timings=%r, elapsed=%.6f)' % (
+            self.transport, self.timings, self.elapsed)
+
+
+def is_x11_setup_reply(header: bytes):
+    """
+    @param[in]  header  First 8 bytes sent by the server after the setup
+                        request.
+    @returns True if 'header' is a valid reply of an X11 server.
+    """
+    if len(header) < 8:
+        return False
+    status = header[0]
+    if status == 2:
+        return True
+    major, = struct.unpack_from('<H', header, 2)
+    return status in (0, 1) and major == 11
+
+
+class ProbeCanceller:
+    """
+    @brief Aborts the probes that are still running once the transport has
+           been decided, so that their threads do not outlive the call.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._sockets = []
+        self._lock = threading.Lock()
+
+    def register(self, sock: socket.socket):
+        """@brief Tracks the socket of a probe, raises OSError if cancelled."""
+        with self._lock:
+            if self.cancelled:
+                raise OSError('[ERROR] The probe was cancelled.')
+            self._sockets.append(sock)
+
+    def cancel(self):
+        """@brief Wakes up the probes blocked on their sockets."""
+        with self._lock:
+            self.cancelled = True
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def preferred(results: dict):
+    """
+    @param[in]  results  Dictionary {transport: True if an X server answered,
+                         False if not, None if the probe has not finished}.
+    @returns a tuple (decided, transport). 'decided' is False while a more
+             preferred transport than the positive ones (if any) is still 
+             being probed.
+    """
+    for name in PREFERENCE:
+        positive = results.get(name)
+        if positive is None:
+            return False, None
+        if positive:
+            return True, name
+    return True, None
+
+
+def x11_handshake(sock: socket.socket):
+    """
+    @brief Sends the X11 connection setup request through a connected
+           socket and checks the reply.
+    @returns True if the peer is an X11 server. Otherwise, False.
+    """
+    sock.sendall(X11_SETUP_REQUEST)
+    header = b''
+    while len(header) < 8:
+        chunk = sock.recv(8 - len(header))
+        if not chunk:
+            break
+        header += chunk
+    return is_x11_setup_reply(header)
+
+
+def parse_display(display: str):
+    """
+    @param[in]  display  X11 display, e.g. '192.168.1.7:10.0' or ':1'.
+    @returns a tuple (host, offset) with the host ('' for local displays) and
+             the display number, or (None, None) if the display is invalid.
+    """
+    m = re.match(r'^(.*):(\d+)(?:\.\d+)?$', display or '')
+    if m is None:
+        return None, None
+    host = m.group(1)
+    if host.startswith('[') and host.endswith(']'):
+        host = host[1:-1]
+    return host, int(m.group(2))
+
+
+def unix_socket_path(offset: int, unix_socket_dir: str = '/tmp/.X11-unix'):
+    """@returns the path of the unix socket of the display number 'offset'."""
+    return os.path.join(unix_socket_dir, 'X' + str(offset))
+
+
+def probe_tcp(host: str, port: int, timeout: float, handshake: bool = True,
+        canceller: ProbeCanceller = None):
+    """
+    @brief Checks whether an X11 server is listening on host:port.
+    @param[in]  canceller  ProbeCanceller that can abort the probe.
+    @returns True if it is. Otherwise, False.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        infos = socket.getaddrinfo(host or 'localhost', port,
+            type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        return False
+    for af, socktype, proto, _, sockaddr in infos:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            with socket.socket(af, socktype, proto) as sock:
+                if canceller is not None:
+                    canceller.register(sock)
+                sock.settimeout(remaining)
+                sock.connect(sockaddr)
+                return x11_handshake(sock) if handshake else True
+        except OSError:
+            continue
+    return False
+
+
+def probe_unix(path: str, timeout: float, handshake: bool = True,
+        canceller: ProbeCanceller = None):
+    """
+    @brief Checks whether an X11 server is listening on a unix socket.
+    @param[in]  canceller  ProbeCanceller that can abort the probe.
+    @returns True if it is. Otherwise, False.
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            if canceller is not None:
+                canceller.register(sock)
+            sock.settimeout(timeout)
+            sock.connect(path)
+            return x11_handshake(sock) if handshake else True
+    except OSError:
+        return False
+
+
+def probe_display(display: str = None, unix_socket_dir: str = '/tmp/.X11-unix',
+        timeout: float = 2., handshake: bool = True, base_port: int = 6000):
+    """
+    @brief Probes the TCP and unix socket transports of a display in
+           parallel, and returns as soon as the preferred transport that
+           answers is known (see PREFERENCE). The probes still running
+           are aborted before returning.
+
+    @param[in]  display          X11 display, by default the DISPLAY
+                                 environment variable.
+    @param[in]  unix_socket_dir  Folder of the X11 unix sockets.
+    @param[in]  timeout          Deadline (in seconds) of the detection.
+    @param[in]  handshake        Require an X11 connection setup reply, set
+                                 it to False to accept any listening socket.
+    @param[in]  base_port        TCP port of the display number 0.
+
+    @returns a ProbeResult.
+    """
+    tic = time.monotonic()
+    if display is None:
+        display = x11env.get('DISPLAY')
+    host, offset = parse_display(display)
+    timings = {'tcp': None, 'unix': None}
+    if offset is None:
+        return ProbeResult(None, timings, time.monotonic() - tic)
+
+    def timed(name, func, *args):
+        start = time.monotonic()
+        positive = func(*args)
+        timings[name] = time.monotonic() - start
+        return name, positive
+
+    canceller = ProbeCanceller()
+    ex = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    futures = [
+        ex.submit(timed, 'tcp', probe_tcp, host, base_port + offset, timeout,
+                  handshake, canceller),
+        ex.submit(timed, 'unix', probe_unix,
+                  unix_socket_path(offset, unix_socket_dir), timeout,
+                  handshake, canceller),
+    ]
+
+    results = {name: None for name in PREFERENCE}
+    decided, transport = False, None
+    pending = set(futures)
+    try:
+        while pending and not decided:
+            remaining = timeout - (time.monotonic() - tic)
+            if remaining <= 0:
+                break
+            done, pending = concurrent.futures.wait(pending, remaining,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name, positive = future.result()
+                results[name] = positive
+            decided, transport = preferred(results)
+    finally:
+        canceller.cancel()
+        ex.shutdown(wait=True)
+
+    # Deadline reached: the best transport among those that answered
+    if not decided:
+        transport = next((name for name in PREFERENCE if results[name]),
+                         None)
+    return ProbeResult(transport, dict(timings), time.monotonic() - tic)
+
+
+async def _aprobe_stream(connect, timeout: float, handshake: bool):
+    import asyncio
+    try:
+        reader, writer = await asyncio.wait_for(connect(), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        if not handshake:
+            return True
+        writer.write(X11_SETUP_REQUEST)
+        await writer.drain()
+        header = await asyncio.wait_for(reader.readexactly(8), timeout)
+        return is_x11_setup_reply(header)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return False
+    finally:
+        writer.close()
+
+
+async def aprobe_display(display: str = None,
+        unix_socket_dir: str = '/tmp/.X11-unix', timeout: float = 2.,
+        handshake: bool = True, base_port: int = 6000):
+    """
+    @brief asyncio version of probe_display(), it does not block the event
+           loop.
+    @returns a ProbeResult.
+    """
+    import asyncio
+    tic = time.monotonic()
+    if display is None:
+        display = x11env.get('DISPLAY')
+    host, offset = parse_display(display)
+    timings = {'tcp': None, 'unix': None}
+    if offset is None:
+        return ProbeResult(None, timings, time.monotonic() - tic)
+
+    async def timed(name, coro):
+        start = time.monotonic()
+        positive = await coro
+        timings[name] = time.monotonic() - start
+        return name, positive
+
+    path = unix_socket_path(offset, unix_socket_dir)
+    tcp = _aprobe_stream(lambda: asyncio.open_connection(host or 'localhost',
+        base_port + offset), timeout, handshake)
+    unix = _aprobe_stream(lambda: asyncio.open_unix_connection(path),
+        timeout, handshake)
+    pending = {asyncio.ensure_future(timed('tcp', tcp)),
+               asyncio.ensure_future(timed('unix', unix))}
+
+    results = {name: None for name in PREFERENCE}
+    decided, transport = False, None
+    try:
+        while pending and not decided:
+            remaining = timeout - (time.monotonic() - tic)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining,
+                return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name, positive = task.result()
+                results[name] = positive
+            decided, transport = preferred(results)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    if not decided:
+        transport = next((name for name in PREFERENCE if results[name]),
+                         None)
+    return ProbeResult(transport, dict(timings), time.monotonic() - tic)
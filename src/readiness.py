@@ -0,0 +1,305 @@
+##
+# @brief  Probes that tell when the application of a container is ready.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details A started container is not necessarily showing its GUI yet. The
+#          probes block until an event says that it is ready, instead of
+#          polling with sleeps: the 'health_status: healthy' event of the
+#          HEALTHCHECK of the image, a line of the logs that matches a
+#          pattern, or the connection of one of the processes of the
+#          container to the X server (seen by the dockerx.relay.X11Relay of
+#          the display). The streams that the probes read are closed when
+#          the deadline expires, so no probe waits longer than the timeout.
+
+import os
+import re
+import time
+import threading
+
+
+class ReadinessProbe:
+    """@brief Base class of the readiness probes."""
+
+    # Name of the probe, used in the error messages
+    name = 'probe'
+
+    def prepare(self, launcher):
+        """
+        @brief Called before the container is created, so that the probe
+               does not miss the events that happen while it starts.
+        @param[in]  launcher  dockerx.DockerLauncher of the container.
+        @returns a context passed to wait(), so that the same probe can be
+                 used by concurrent launches.
+        """
+        return None
+
+    def wait(self, launcher, container, context, deadline: float):
+        """
+        @brief Blocks until the application of the container is ready.
+        @param[in]  launcher   dockerx.DockerLauncher of the container.
+        @param[in]  container  Docker container object (already started).
+        @param[in]  context    Value returned by prepare().
+        @param[in]  deadline   time.monotonic() at which to give up.
+        @returns nothing. Raises TimeoutError when the deadline expires and
+                 RuntimeError if the container exits before being ready.
+        """
+        raise NotImplementedError
+
+    def timeout_error(self, container):
+        return TimeoutError('[ERROR] The container ' + container.short_id \
+            + ' was not ready (' + self.name + ') before the deadline.')
+
+    def __repr__(self):
+        return self.__class__.__name__ + '()'
+
+
+def remaining(deadline: float):
+    """@returns the seconds left until a time.monotonic() deadline (>= 0)."""
+    return max(0., deadline - time.monotonic())
+
+
+class StreamDeadline:
+    """@brief Closes a blocking stream when a deadline expires."""
+
+    def __init__(self, stream, deadline: float):
+        self.expired = False
+        self._stream = stream
+        self._closed = False
+        self._lock = threading.Lock()
+        self._timer = threading.Timer(remaining(deadline), self._expire)
+        self._timer.daemon = True
+
+    def _expire(self):
+        self.expired = True
+        self.close()
+
+    def close(self):
+        """@brief Closes the stream (only once)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._stream.close()
+        except (OSError, AttributeError):
+            # The response had already been consumed
+            pass
+
+    def __enter__(self):
+        self._timer.start()
+        return self
+
+    def __exit__(self, *args):
+        self._timer.cancel()
+        self.close()
+
+
+class HealthProbe(ReadinessProbe):
+    """
+    @brief Waits for the HEALTHCHECK of the image (or of the 'healthcheck'
+           option) to report the container as healthy.
+    """
+
+    name = 'health'
+
+    def prepare(self, launcher):
+        # Events are replayed from this second on, see wait()
+        return int(time.time())
+
+    def wait(self, launcher, container, context, deadline: float):
+        stream = launcher.client.events(decode=True, since=context,
+            filters={'type': ['container'], 'container': [container.id]})
+        with StreamDeadline(stream, deadline) as timer:
+            try:
+                for event in stream:
+                    action = event.get('Action') or event.get('status', '')
+                    if action == 'health_status: healthy':
+                        return
+                    if action == 'die':
+                        raise RuntimeError('[ERROR] The container ' \
+                            + container.short_id + ' exited before it ' \
+                            + 'was healthy.')
+            except (OSError, AttributeError, ValueError):
+                # The stream was closed under the reader by the deadline
+                if not timer.expired:
+                    raise
+        raise self.timeout_error(container)
+
+
+class LogProbe(ReadinessProbe):
+    """@brief Waits for a line of the logs of the container to match."""
+
+    name = 'log'
+
+    def __init__(self, pattern, stdout: bool = True, stderr: bool = True):
+        """
+        @param[in]  pattern  Regular expression (string or compiled) searched
+                             in each line of the logs.
+        @param[in]  stdout   Search the standard output.
+        @param[in]  stderr   Search the standard error.
+        """
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) \
+            else pattern
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def wait(self, launcher, container, context, deadline: float):
+        stream = container.logs(stream=True, follow=True, stdout=self.stdout,
+            stderr=self.stderr)
+        pending = ''
+        with StreamDeadline(stream, deadline) as timer:
+            try:
+                for chunk in stream:
+                    lines = (pending + chunk.decode('utf-8', 'replace')) \
+                        .split('\n')
+                    pending = lines.pop()
+                    for line in lines:
+                        if self.pattern.search(line):
+                            return
+
+                    # Prompts and progress messages do not end in a newline
+                    if pending and self.pattern.search(pending):
+                        return
+            except (OSError, AttributeError, ValueError):
+                if not timer.expired:
+                    raise
+        if timer.expired:
+            raise self.timeout_error(container)
+        raise RuntimeError('[ERROR] The container ' + container.short_id \
+            + ' exited before printing a line that matches ' \
+            + repr(self.pattern.pattern) + '.')
+
+    def __repr__(self):
+        return 'LogProbe(%r)' % self.pattern.pattern
+
+
+def parent_pid(pid: int, proc: str = '/proc'):
+    """@returns the parent of a process, or None if it does not exist."""
+    try:
+        with open(os.path.join(proc, str(pid), 'status')) as f:
+            for line in f:
+                if line.startswith('PPid:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def pid_in_container(pid: int, container_id: str, init_pid: int = None,
+        proc: str = '/proc', max_depth: int = 64):
+    """
+    @brief Tells whether a process of the host belongs to a container.
+
+    @details A process belongs to the container if its cgroup contains the
+             id of the container (cgroupfs and systemd drivers), or if it
+             descends from the first process of the container ('init_pid',
+             i.e. container.attrs['State']['Pid']).
+
+    @param[in]  pid           Process id in the host.
+    @param[in]  container_id  Full id of the container.
+    @param[in]  init_pid      Process id of the container in the host.
+    @param[in]  proc          Mount point of procfs.
+    @param[in]  max_depth     Maximum number of ancestors visited.
+
+    @returns True if the process belongs to the container. Otherwise, False.
+    """
+    if not pid:
+        return False
+    try:
+        with open(os.path.join(proc, str(pid), 'cgroup')) as f:
+            if container_id in f.read():
+                return True
+    except OSError:
+        pass
+    # Every process descends from the init of the host
+    if not init_pid or init_pid <= 1:
+        return False
+    for _ in range(max_depth):
+        if pid == init_pid:
+            return True
+        if pid is None or pid <= 1:
+            return False
+        pid = parent_pid(pid, proc)
+    return False
+
+
+class X11Probe(ReadinessProbe):
+    """
+    @brief Waits for a process of the container to connect to the X server.
+
+    @details The connections are seen by the dockerx.relay.X11Relay that
+             forwards the display to the container, which identifies the
+             client process with SO_PEERCRED. Therefore, the display must
+             go through a relay, see DockerLauncher.enable_relay().
+    """
+
+    name = 'x11'
+
+    def prepare(self, launcher):
+        # Connections older than the launch do not count
+        return time.monotonic()
+
+    @staticmethod
+    def find_relay(launcher, container):
+        """@returns the X11Relay whose socket is mounted in the container."""
+        binds = container.attrs.get('HostConfig', {}).get('Binds') or []
+        sources = {bind.split(':')[0] for bind in binds}
+        for x11_relay in launcher.x11_relays.relays():
+            if x11_relay.directory in sources:
+                return x11_relay
+        return None
+
+    def wait(self, launcher, container, context, deadline: float):
+        x11_relay = X11Probe.find_relay(launcher, container)
+        if x11_relay is None:
+            raise ValueError('[ERROR] The X11 readiness probe needs the ' \
+                + 'display to go through a dockerx relay, see ' \
+                + 'DockerLauncher.enable_relay().')
+        container.reload()
+        init_pid = container.attrs.get('State', {}).get('Pid')
+        connected = threading.Event()
+
+        def on_connect(pid, stamp):
+            if stamp >= context \
+                    and pid_in_container(pid, container.id, init_pid):
+                connected.set()
+
+        # Listen first and then look at the history, so that a connection
+        # made in between is not missed
+        x11_relay.add_listener(on_connect)
+        try:
+            for pid, stamp in x11_relay.peers():
+                on_connect(pid, stamp)
+            if not connected.wait(remaining(deadline)):
+                raise self.timeout_error(container)
+        finally:
+            x11_relay.remove_listener(on_connect)
+
+
+def parse(value):
+    """
+    @brief Converts the 'wait_ready' option of the launches into probes.
+    @param[in]  value  None, a ReadinessProbe, one of the strings 'health',
+                       'x11' or 'log:<regular expression>', or a list of
+                       them. The container is ready when all the probes
+                       have passed.
+    @returns a list of ReadinessProbe objects.
+    """
+    if value is None or value is False:
+        return []
+    if isinstance(value, ReadinessProbe):
+        return [value]
+    if isinstance(value, str):
+        if value == 'health':
+            return [HealthProbe()]
+        if value == 'x11':
+            return [X11Probe()]
+        if value.startswith('log:'):
+            return [LogProbe(value[4:])]
+        raise ValueError('[ERROR] Unknown readiness probe: ' + repr(value) \
+            + '. Use \'health\', \'x11\' or \'log:<regex>\'.')
+    probes = []
+    for item in value:
+        probes += parse(item)
+    return probes
@@ -0,0 +1,277 @@
+##
+# @brief  Registry of the containers launched by a DockerLauncher.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details The containers are indexed by id, name and image, and the
+#          registry keeps at most 'retention' of them: when it is full, the
+#          oldest containers that are no longer running are forgotten. The
+#          containers that may still be running are never forgotten, so the
+#          registry grows past 'retention' if all of them are alive.
+#          Every container launched by dockerx carries the labels LABEL and
+#          OWNER_LABEL, so a process that restarts can find (adopt) the
+#          containers launched by its previous incarnation.
+
+import time
+import threading
+import collections
+import collections.abc
+
+# My imports
+from .images import normalise
+
+# Label set on every container launched by dockerx
+LABEL = 'dockerx'
+
+# Label with the owner of the launcher that launched the container
+OWNER_LABEL = 'dockerx.owner'
+
+# Statuses of containers that will not run again by themselves
+TERMINATED = ('exited', 'dead', 'removed')
+
+
+def container_name(attrs: dict):
+    """
+    @returns the name of a container from its attributes, either those of
+             'docker inspect' or those of 'docker ps'.
+    """
+    name = attrs.get('Name') or (attrs.get('Names') or [None])[0]
+    return name.lstrip('/') if name else None
+
+
+def container_status(attrs: dict):
+    """@returns the status of a container, e.g. 'running' or 'exited'."""
+    state = attrs.get('State')
+    if isinstance(state, dict):
+        return state.get('Status')
+    return state
+
+
+def container_image(attrs: dict):
+    """@returns the name of the image of a container."""
+    config = attrs.get('Config')
+    if isinstance(config, dict) and config.get('Image'):
+        return config['Image']
+    return attrs.get('Image')
+
+
+class ContainerRecord:
+    """@brief Entry of the registry."""
+
+    __slots__ = ('container', 'id', 'name', 'image', 'status', 'labels',
+                 'updated')
+
+    def __init__(self, container, image: str = None, status: str = None):
+        attrs = getattr(container, 'attrs', None) or {}
+        self.container = container
+        self.id = container.id
+        self.name = container_name(attrs)
+        self.image = image or container_image(attrs)
+        self.status = status or container_status(attrs)
+        labels = attrs.get('Labels')
+        if labels is None:
+            labels = (attrs.get('Config') or {}).get('Labels')
+        self.labels = labels or {}
+        self.updated = time.monotonic()
+
+    def __repr__(self):
+        return 'ContainerRecord(id=%r, name=%r, image=%r, status=%r)' % (
+            self.id[:12], self.name, self.image, self.status)
+
+
+class ContainerRegistry:
+    """@brief Containers indexed by id, name and image."""
+
+    def __init__(self, retention: int = 1024, on_evict=None):
+        """
+        @param[in]  retention  Maximum number of containers remembered, None
+                               for no limit.
+        @param[in]  on_evict   Callable 'on_evict(record)' called (without
+                               holding the lock of the registry) for each 
+                               terminated container forgotten to keep the
+                               registry within 'retention'.
+        """
+        self.retention = retention
+        self.on_evict = on_evict
+        self._by_id = collections.OrderedDict()  # Oldest first
+        self._by_name = {}
+        self._by_image = collections.defaultdict(set)
+        self._lock = threading.RLock()
+
+    def add(self, container, image: str = None, status: str = None):
+        """
+        @brief Registers a container (or updates it if already registered).
+        @param[in]  container  Docker container object.
+        @param[in]  image      Name of the image, by default the one in the
+                               attributes of the container.
+        @param[in]  status     Status of the container, by default the one in
+                               the attributes of the container.
+        @returns the ContainerRecord.
+        """
+        record = ContainerRecord(container, image, status)
+        with self._lock:
+            self._unindex(self._by_id.pop(record.id, None))
+            self._by_id[record.id] = record
+            if record.name:
+                self._by_name[record.name] = record
+            if record.image:
+                self._by_image[normalise(record.image)].add(record.id)
+            evicted = self._trim()
+        if self.on_evict is not None:
+            for victim in evicted:
+                self.on_evict(victim)
+        return record
+
+    def _unindex(self, record):
+        if record is None:
+            return
+        if record.name and self._by_name.get(record.name) is record:
+            del self._by_name[record.name]
+        if record.image:
+            ids = self._by_image.get(normalise(record.image))
+            if ids is not None:
+                ids.discard(record.id)
+                if not ids:
+                    del self._by_image[normalise(record.image)]
+
+    def _trim(self):
+        """@returns the list of terminated ContainerRecords evicted."""
+        if self.retention is None or len(self._by_id) <= self.retention:
+            return []
+        excess = len(self._by_id) - self.retention
+        victims = [r for r in self._by_id.values()
+                   if r.status in TERMINATED][:excess]
+        for record in victims:
+            self._unindex(self._by_id.pop(record.id))
+        return victims
+
+    def get(self, ref: str):
+        """
+        @param[in]  ref  Id, unique id prefix or name of the container.
+        @returns the ContainerRecord, or None if it is not registered.
+        """
+        with self._lock:
+            record = self._by_id.get(ref) or self._by_name.get(ref)
+            if record is None and ref:
+                matches = [r for cid, r in self._by_id.items()
+                           if cid.startswith(ref)]
+                if len(matches) == 1:
+                    record = matches[0]
+            return record
+
+    def by_image(self, image: str):
+        """@returns the ContainerRecords of an image, oldest first."""
+        with self._lock:
+            ids = self._by_image.get(normalise(image), ())
+            return [r for cid, r in self._by_id.items() if cid in ids]
+
+    def set_status(self, ref: str, status: str):
+        """
+        @brief Updates the status of a registered container.
+        @returns the ContainerRecord, or None if it is not registered.
+        """
+        with self._lock:
+            record = self.get(ref)
+            if record is not None:
+                record.status = status
+                record.updated = time.monotonic()
+            return record
+
+    def remove(self, ref: str):
+        """
+        @brief Forgets a container.
+        @returns the ContainerRecord removed, or None if it was not
+                 registered.
+        """
+        with self._lock:
+            record = self.get(ref)
+            if record is not None:
+                del self._by_id[record.id]
+                self._unindex(record)
+            return record
+
+    def records(self, status: str = None):
+        """
+        @param[in]  status  Only return the containers with this status.
+        @returns the list of ContainerRecords, oldest first.
+        """
+        with self._lock:
+            return [r for r in self._by_id.values()
+                    if status is None or r.status == status]
+
+    def containers(self):
+        """@returns the list of Docker container objects, oldest first."""
+        with self._lock:
+            return [r.container for r in self._by_id.values()]
+
+    def __contains__(self, ref: str):
+        return self.get(ref) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self.records())
+
+
+class ContainerList(collections.abc.MutableSequence):
+    """
+    @brief List of the Docker container objects of a registry, oldest first.
+
+    @details It keeps the list API of DockerLauncher.launched_containers:
+             appending a container registers it, and removing one forgets
+             it. Containers are always appended as the newest, whatever the
+             index of insert().
+    """
+
+    def __init__(self, registry: ContainerRegistry, forget=None):
+        """
+        @param[in]  registry  ContainerRegistry of the containers.
+        @param[in]  forget    Callable 'forget(id)' that drops a container
+                              from the registry, by default
+                              registry.remove().
+        """
+        self.registry = registry
+        self.forget = forget if forget is not None else registry.remove
+
+    def __getitem__(self, index):
+        return self.registry.containers()[index]
+
+    def __setitem__(self, index, container):
+        if isinstance(index, slice):
+            raise TypeError('[ERROR] The launched containers cannot be ' \
+                + 'assigned by slice.')
+        self.forget(self.registry.records()[index].id)
+        self.registry.add(container)
+
+    def __delitem__(self, index):
+        records = self.registry.records()[index]
+        if not isinstance(index, slice):
+            records = [records]
+        for record in records:
+            self.forget(record.id)
+
+    def __len__(self):
+        return len(self.registry)
+
+    def insert(self, index: int, container):
+        self.registry.add(container)
+
+    def remove(self, container):
+        if self.registry.get(container.id) is None:
+            raise ValueError('[ERROR] The container ' + container.id[:12] \
+                + ' is not in the list.')
+        self.forget(container.id)
+
+    def clear(self):
+        for record in self.registry.records():
+            self.forget(record.id)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, ContainerList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
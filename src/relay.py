@@ -0,0 +1,553 @@
+##
+# @brief  Local relay that exposes a TCP X11 display as a unix socket.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details With 'ssh -X', the X server of a display like 'localhost:10' is
+#          the X11 port of sshd. Without the relay, the containers connect to
+#          it over TCP through the docker0 bridge, which requires sshd to
+#          listen on every interface ('X11UseLocalhost no'). The X11Relay
+#          listens on a unix socket 'X<n>' in a folder of its own, which is
+#          mounted in the containers as '/tmp/.X11-unix' (like for local
+#          displays), and forwards every connection to the TCP display from
+#          the host. The bytes are moved with splice() through a pipe, so
+#          they do not go through user space, or with a large preallocated
+#          buffer where splice() is not available. A few upstream
+#          connections can be opened in advance, so a new client does not
+#          wait for the TCP handshake.
+
+import os
+import re
+import time
+import errno
+import socket
+import struct
+import hashlib
+import tempfile
+import threading
+import collections
+
+# fcntl command to resize a pipe (Linux)
+F_SETPIPE_SZ = 1031
+
+
+def splice_available():
+    """@returns True if os.splice() is available (Linux, Python >= 3.10)."""
+    return hasattr(os, 'splice')
+
+
+class RelayConnection:
+    """@brief Counters of a connection forwarded by the relay."""
+
+    __slots__ = ('id', 'pid', 'opened', 'closed', 'connect_time', 'bytes_in',
+                 'bytes_out', 'first_request', 'first_reply', 'splice')
+
+    def __init__(self, cid: int, connect_time: float, splice: bool,
+            pid: int = None):
+        """
+        @param[in]  cid           Sequential id of the connection.
+        @param[in]  connect_time  Seconds that it took to get an upstream
+                                  connection for the client.
+        @param[in]  splice        True if the bytes are moved with splice().
+        @param[in]  pid           Process id (in the host) of the client.
+        """
+        self.id = cid
+        self.pid = pid
+        self.opened = time.monotonic()
+        self.closed = None
+        self.connect_time = connect_time
+        self.bytes_in = 0       # Client -> X server
+        self.bytes_out = 0      # X server -> client
+        self.first_request = None
+        self.first_reply = None
+        self.splice = splice
+
+    @property
+    def latency(self):
+        """
+        @returns the seconds between the first bytes sent by the client and
+                 the first bytes of the reply of the X server, or None if
+                 there was no reply.
+        """
+        if self.first_request is None or self.first_reply is None:
+            return None
+        return self.first_reply - self.first_request
+
+    @property
+    def duration(self):
+        """@returns the seconds that the connection has been (was) open."""
+        return (self.closed or time.monotonic()) - self.opened
+
+    def as_dict(self):
+        """@returns the counters as a dictionary."""
+        return {'id': self.id, 'pid': self.pid, 'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'connect_time': self.connect_time, 'latency': self.latency,
+                'duration': self.duration, 'splice': self.splice,
+                'open': self.closed is None}
+
+    def __repr__(self):
+        return 'RelayConnection(id=%d, in=%d, out=%d, latency=%r)' % (
+            self.id, self.bytes_in, self.bytes_out, self.latency)
+
+
+class X11Relay:
+    """@brief Unix socket that forwards the connections to an X server."""
+
+    def __init__(self, upstream, display_number: int, directory: str = None,
+            spares: int = 0, buffer_size: int = 1 << 20,
+            use_splice: bool = True, connect_timeout: float = 5.,
+            history: int = 256, mode: int = 0o777):
+        """
+        @param[in]  upstream         Address of the X server, a tuple
+                                     (host, port) or the path of a unix
+                                     socket.
+        @param[in]  display_number   Number of the display in the
+                                     containers, the socket is
+                                     '<directory>/X<display_number>'.
+        @param[in]  directory        Folder of the socket. By default, a
+                                     folder of its own in the temporary
+                                     folder, see default_directory().
+        @param[in]  spares           Number of upstream connections opened
+                                     in advance.
+        @param[in]  buffer_size      Bytes moved per system call.
+        @param[in]  use_splice       Move the bytes with splice() if it is
+                                     available.
+        @param[in]  connect_timeout  Seconds to wait for the upstream
+                                     connection.
+        @param[in]  history          Number of closed connections whose
+                                     counters are kept.
+        @param[in]  mode             Permissions of the socket. By default,
+                                     anyone can connect, as the users of 
+                                     the containers are not the user of 
+                                     the host.
+        """
+        self.upstream = upstream
+        self.display_number = display_number
+        self.directory = directory if directory is not None \
+            else X11Relay.default_directory(upstream, display_number)
+        self.path = os.path.join(self.directory, 'X' + str(display_number))
+        self.spares = spares
+        self.buffer_size = buffer_size
+        self.use_splice = use_splice and splice_available()
+        self.connect_timeout = connect_timeout
+        self.mode = mode
+        self.accepted = 0
+        self.failed = 0
+        self.spare_hits = 0
+        self._active = {}
+        self._closed = collections.deque(maxlen=history)
+        self._peers = collections.deque(maxlen=history)  # (pid, monotonic)
+        self._listeners = []
+        self._totals = {'bytes_in': 0, 'bytes_out': 0}
+        self._spares = collections.deque()
+        self._refilling = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sock = None
+        self._thread = None
+
+    @staticmethod
+    def default_directory(upstream, display_number: int):
+        """
+        @returns '<tmp>/dockerx-relay-<uid>/<upstream>-<hash>', the default
+                 folder of the socket of a relay.
+        """
+        key = repr((upstream, display_number)).encode()
+        name = re.sub(r'[^A-Za-z0-9.]', '_', X11Relay.describe(upstream)) \
+            + '-' + hashlib.sha256(key).hexdigest()[:12]
+        return os.path.join(tempfile.gettempdir(),
+            'dockerx-relay-' + str(os.getuid()), name)
+
+    @staticmethod
+    def describe(upstream):
+        """@returns the address of the X server as a string."""
+        if isinstance(upstream, str):
+            return upstream
+        return upstream[0] + ':' + str(upstream[1])
+
+    @property
+    def running(self):
+        """@returns True if the relay is accepting connections."""
+        return self._thread is not None and not self._stop.is_set()
+
+    def start(self):
+        """
+        @brief Creates the unix socket and starts accepting connections.
+        @returns self.
+        """
+        if self._thread is not None:
+            return self
+        os.makedirs(os.path.dirname(self.directory), mode=0o700,
+            exist_ok=True)
+        os.makedirs(self.directory, exist_ok=True)
+        os.chmod(self.directory, 0o755)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+
+        os.chmod(self.path, self.mode)
+        self._sock.listen(128)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, daemon=True,
+            name='dockerx-relay')
+        self._thread.start()
+        self._refill()
+        return self
+
+    def close(self):
+        """
+        @brief Stops accepting connections, closes the connections in
+               progress and deletes the socket.
+        """
+        self._stop.set()
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            pairs = list(self._active.values())
+            spares = list(self._spares)
+            self._spares.clear()
+        for sock in spares:
+            sock.close()
+        for _, client, server in pairs:
+            for sock in (client, server):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        try:
+            os.unlink(self.path)
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _connect(self):
+        """@returns a new socket connected to the X server."""
+        if isinstance(self.upstream, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.connect_timeout)
+            try:
+                sock.connect(self.upstream)
+            except OSError:
+                sock.close()
+                raise
+        else:
+            sock = socket.create_connection(self.upstream,
+                self.connect_timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(None)
+        return sock
+
+    def _refill(self):
+        """@brief Opens the missing spare connections in the background."""
+        with self._lock:
+            if self._refilling or len(self._spares) >= self.spares \
+                    or self._stop.is_set():
+                return
+            self._refilling = True
+        threading.Thread(target=self._fill, daemon=True).start()
+
+    def _fill(self):
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    if len(self._spares) >= self.spares:
+                        break
+                try:
+                    sock = self._connect()
+                except OSError:
+                    break
+                with self._lock:
+                    if self._stop.is_set():
+                        sock.close()
+                        break
+                    self._spares.append(sock)
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _upstream(self):
+        """
+        @returns a connection to the X server, a spare one if there is one
+                 that the X server has not closed.
+        """
+        while True:
+            with self._lock:
+                sock = self._spares.popleft() if self._spares else None
+            if sock is None:
+                return self._connect()
+            if X11Relay._alive(sock):
+                with self._lock:
+                    self.spare_hits += 1
+                return sock
+            sock.close()
+
+    @staticmethod
+    def _alive(sock: socket.socket):
+        """@returns False if the peer closed an idle connection."""
+        try:
+            data = sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        return len(data) > 0
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                if self._stop.is_set():
+                    break
+                continue
+            threading.Thread(target=self._open, args=(client,),
+                daemon=True).start()
+
+    @staticmethod
+    def peer_pid(sock: socket.socket):
+        """@returns the process id of the peer of a unix socket, or None."""
+        try:
+            creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                struct.calcsize('3i'))
+        except (OSError, AttributeError):
+            return None
+        return struct.unpack('3i', creds)[0] or None
+
+    def add_listener(self, callback):
+        """
+        @brief Registers a callable 'callback(pid, stamp)', called when a
+               client connected to the X server through the relay. 'stamp'
+               is the time.monotonic() of the connection.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """@brief Unregisters a callable added with add_listener()."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def peers(self):
+        """
+        @returns a list of tuples (pid, stamp) of the recent clients connected
+                 to the X server, oldest first.
+        """
+        with self._lock:
+            return list(self._peers)
+
+    def _open(self, client: socket.socket):
+        """@brief Connects a client to the X server and forwards its bytes."""
+        tic = time.monotonic()
+        pid = X11Relay.peer_pid(client)
+        try:
+            server = self._upstream()
+        except OSError:
+            with self._lock:
+                self.failed += 1
+            client.close()
+            return
+        self._refill()
+        with self._lock:
+            self.accepted += 1
+            conn = RelayConnection(self.accepted, time.monotonic() - tic,
+                self.use_splice, pid)
+            self._active[conn.id] = [2, client, server]
+            self._peers.append((pid, tic))
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback(pid, tic)
+        threading.Thread(target=self._forward, daemon=True,
+            args=(conn, server, client, False)).start()
+        self._forward(conn, client, server, True)
+
+    def _forward(self, conn: RelayConnection, src: socket.socket,
+            dst: socket.socket, request: bool):
+        """
+        @brief Moves the bytes of one direction of a connection until the
+               source closes it.
+        @param[in]  request  True for the client -> X server direction.
+        """
+        try:
+            if conn.splice:
+                try:
+                    self._splice(conn, src, dst, request)
+                except OSError as e:
+                    # Nothing was moved yet, the sockets do not support it
+                    if e.errno not in (errno.EINVAL, errno.ENOSYS) \
+                            or conn.bytes_in or conn.bytes_out:
+                        raise
+                    conn.splice = False
+                    self._copy(conn, src, dst, request)
+            else:
+                self._copy(conn, src, dst, request)
+        except OSError:
+            pass
+        finally:
+            try:
+                dst.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+            self._done(conn)
+
+    def _splice(self, conn, src, dst, request):
+        rfd, wfd = os.pipe()
+        try:
+            try:
+                import fcntl
+                fcntl.fcntl(wfd, F_SETPIPE_SZ, self.buffer_size)
+            except OSError:
+                pass
+            flags = os.SPLICE_F_MOVE
+            while True:
+                n = os.splice(src.fileno(), wfd, self.buffer_size,
+                    flags=flags)
+                if n == 0:
+                    break
+                self._count(conn, n, request)
+                while n > 0:
+                    n -= os.splice(rfd, dst.fileno(), n, flags=flags)
+        finally:
+            os.close(rfd)
+            os.close(wfd)
+
+    def _copy(self, conn, src, dst, request):
+        buf = bytearray(self.buffer_size)
+        view = memoryview(buf)
+        while True:
+            n = src.recv_into(buf)
+            if n == 0:
+                break
+            self._count(conn, n, request)
+            dst.sendall(view[:n])
+
+    def _count(self, conn: RelayConnection, n: int, request: bool):
+        now = time.monotonic()
+        if request:
+            conn.bytes_in += n
+            if conn.first_request is None:
+                conn.first_request = now
+        else:
+            conn.bytes_out += n
+            if conn.first_reply is None:
+                conn.first_reply = now
+
+    def _done(self, conn: RelayConnection):
+        """@brief Closes the connection once both directions are done."""
+        with self._lock:
+            entry = self._active.get(conn.id)
+            if entry is None:
+                return
+            entry[0] -= 1
+            if entry[0] > 0:
+                return
+            del self._active[conn.id]
+            conn.closed = time.monotonic()
+            self._closed.append(conn)
+            self._totals['bytes_in'] += conn.bytes_in
+            self._totals['bytes_out'] += conn.bytes_out
+        entry[1].close()
+        entry[2].close()
+
+    def connections(self):
+        """@returns the counters of the recent connections, oldest first."""
+        with self._lock:
+            return list(self._closed)
+
+    def stats(self):
+        """@returns a dictionary with the counters of the relay."""
+        with self._lock:
+            latencies = [c.latency for c in self._closed
+                         if c.latency is not None]
+            return {
+                'upstream'   : X11Relay.describe(self.upstream),
+                'path'       : self.path,
+                'splice'     : self.use_splice,
+                'accepted'   : self.accepted,
+                'active'     : len(self._active),
+                'failed'     : self.failed,
+                'spares'     : len(self._spares),
+                'spare_hits' : self.spare_hits,
+                'bytes_in'   : self._totals['bytes_in'],
+                'bytes_out'  : self._totals['bytes_out'],
+                'latency_max': max(latencies) if latencies else None,
+            }
+
+
+class RelayManager:
+    """@brief Process-wide relays, one per X server and display number."""
+
+    def __init__(self, spares: int = 0, directory: str = None):
+        """
+        @param[in]  spares     Upstream connections opened in advance by
+                               each relay, see X11Relay.
+        @param[in]  directory  Parent folder of the sockets of the relays,
+                               by default '<tmp>/dockerx-relay-<uid>'.
+        """
+        self.spares = spares
+        self.directory = directory
+        self._relays = {}
+        self._lock = threading.Lock()
+        self._atexit = False
+
+    def get(self, upstream, display_number: int, mode: int = 0o777):
+        """
+        @param[in]  upstream        Address of the X server, see X11Relay.
+        @param[in]  display_number  Number of the display in the containers.
+        @param[in]  mode            Permissions of the socket of the relay
+                                    when it is started, see X11Relay.
+        @returns the running X11Relay of an X server, it is started if
+                 needed.
+        """
+        key = (upstream, display_number)
+        with self._lock:
+            relay = self._relays.get(key)
+            if relay is not None and relay.running \
+                    and os.path.exists(relay.path):
+                return relay
+            if relay is not None:
+                relay.close()
+            directory = None
+            if self.directory is not None:
+                directory = os.path.basename(
+                    X11Relay.default_directory(upstream, display_number))
+                directory = os.path.join(self.directory, directory)
+            relay = X11Relay(upstream, display_number, directory,
+                spares=self.spares, mode=mode).start()
+            self._relays[key] = relay
+            if not self._atexit:
+                import atexit
+                atexit.register(self.close)
+                self._atexit = True
+            return relay
+
+    def relays(self):
+        """@returns the list of relays."""
+        with self._lock:
+            return list(self._relays.values())
+
+    def close(self):
+        """@brief Closes all the relays."""
+        with self._lock:
+            relays = list(self._relays.values())
+            self._relays.clear()
+        for relay in relays:
+            relay.close()
+
+    def __len__(self):
+        return len(self._relays)
@@ -4,11 +4,13 @@
 @date   2 March 2021.
 """
 import argparse
+import json
+import os
 import sys
-import docker
 
 # My imports
 import dockerx
+from dockerx import daemon
 
 
 def help_msg(param: str):
@@ -27,6 +29,38 @@ def help_msg(param: str):
         '--env'    : 'Syntax: \'<key>=<value>\'.',
         '--network': 'Connect a container to a network. ' \
                      'Syntax: --network <value> (e.g. --network host)',
+        '--prefetch': 'Pull this image in advance (in parallel with the ' \
+                      + 'rest of prefetched images). Can be repeated. ' \
+                      + 'If no --image is given, dockerx exits after ' \
+                      + 'pulling.',
+        '--prefetch-file': 'File with the names of the images to pull in ' \
+                           + 'advance, one per line (lines starting with ' \
+                           + '# are ignored).',
+        '--no-pull': 'Fail instead of pulling the image if it is not ' \
+                     + 'present locally.',
+        '--manifest': 'JSON or YAML file describing many containers to ' \
+                      + 'launch concurrently, see the README.',
+        '--json': 'Write the results of the --manifest launch as JSON to ' \
+                  + 'this file (- for stdout).',
+        '--max-workers': 'Containers of the --manifest launched at the ' \
+                         + 'same time. Default is 8.',
+        '--shm': 'Render with the MIT-SHM extension of a local X server ' \
+                 + '(shares the IPC namespace of the host): 0, 1 or auto. ' \
+                 + 'Default is 0.',
+        '--shm-size': 'Size of /dev/shm in the container, e.g. 1g.',
+        '--wait-ready': 'Wait until the application is ready: health ' \
+                        + '(healthcheck of the image) or log:<regex> (a ' \
+                        + 'line of the logs matches). Can be repeated.',
+        '--ready-timeout': 'Seconds to wait for --wait-ready. Default is ' \
+                           + '30.',
+        '--cpuset': 'CPUs of the container, e.g. 0-3, or auto to pin it ' \
+                    + 'to free CPUs of the least loaded NUMA node.',
+        '--cpus': 'Number of CPUs pinned with --cpuset auto (implies it). ' \
+                  + 'Default is 1.',
+        '--mems': 'NUMA nodes of the memory of the container, e.g. 0.',
+        '--memory': 'Memory limit of the container, e.g. 4g.',
+        '--no-daemon': 'Launch from this process even if a dockerx daemon ' \
+                       + 'is running (see python -m dockerx.daemon).',
     }
     return msg[param]
 
@@ -34,7 +68,7 @@ def help_msg(param: str):
 def parse_command_line_parameters(parser):
     parser.add_argument('--name', required=False, default=None, type=str, 
                         help=help_msg('--name'))
-    parser.add_argument('--image', required=True, type=str, 
+    parser.add_argument('--image', required=False, default=None, type=str, 
                         help=help_msg('--image'))
     parser.add_argument('--nvidia', required=False, default=False, type=int,
                         help=help_msg('--nvidia'))
@@ -46,26 +80,126 @@ def parse_command_line_parameters(parser):
                         default=[], help=help_msg('--env'))
     parser.add_argument('--network', required=False, default=None, type=str, 
                         help=help_msg('--network'))
+    parser.add_argument('--prefetch', required=False, action='append', 
+                        type=str, default=[], help=help_msg('--prefetch'))
+    parser.add_argument('--prefetch-file', required=False, default=None, 
+                        type=str, help=help_msg('--prefetch-file'))
+    parser.add_argument('--no-pull', required=False, action='store_true',
+                        help=help_msg('--no-pull'))
+    parser.add_argument('--manifest', required=False, default=None, type=str,
+                        help=help_msg('--manifest'))
+    parser.add_argument('--json', required=False, default=None, type=str,
+                        help=help_msg('--json'))
+    parser.add_argument('--max-workers', required=False, default=8, type=int,
+                        help=help_msg('--max-workers'))
+    parser.add_argument('--shm', required=False, default='0', 
+                        choices=['0', '1', 'auto'], help=help_msg('--shm'))
+    parser.add_argument('--shm-size', required=False, default=None, type=str,
+                        help=help_msg('--shm-size'))
+    parser.add_argument('--wait-ready', required=False, action='append',
+                        type=str, default=[], help=help_msg('--wait-ready'))
+    parser.add_argument('--ready-timeout', required=False, default=30., 
+                        type=float, help=help_msg('--ready-timeout'))
+    parser.add_argument('--cpuset', required=False, default=None, type=str,
+                        help=help_msg('--cpuset'))
+    parser.add_argument('--cpus', required=False, default=None, type=int,
+                        help=help_msg('--cpus'))
+    parser.add_argument('--mems', required=False, default=None, type=str,
+                        help=help_msg('--mems'))
+    parser.add_argument('--memory', required=False, default=None, type=str,
+                        help=help_msg('--memory'))
+    parser.add_argument('--no-daemon', required=False, action='store_true',
+                        help=help_msg('--no-daemon'))
 
     args = parser.parse_args()
+    if args.prefetch_file is not None:
+        args.prefetch += read_image_list(args.prefetch_file)
+    if args.image is None and not args.prefetch and args.manifest is None:
+        parser.error('the following arguments are required: --image')
+    if args.image is not None and args.manifest is not None:
+        parser.error('--image and --manifest cannot be used together')
     args.nvidia = bool(int(args.nvidia))
+    args.shm = parse_shm(args.shm)
     args.command = None if args.command == 'None' else args.command
     return args
 
 
-def parse_env(list_of_args: list[str]):
+def parse_shm(value):
+    """
+    @param[in]  value  0, 1, 'auto', or a boolean (in manifests).
+    @returns the 'shm' argument of DockerLauncher.launch_container().
+    """
+    if isinstance(value, str):
+        if value.lower() == 'auto':
+            return 'auto'
+        value = int(value)
+    return bool(value)
+
+
+def read_image_list(path: str):
+    """
+    @param[in]  path  Path to a file with one image name per line.
+    @returns the list of image names in the file.
+    """
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+def prefetch(dl, image_names: list[str]):
+    """
+    @brief Pulls the images in parallel and prints the outcome of each pull.
+    @returns True if all the images are present locally. Otherwise, False.
+    """
+    ok = True
+    for name, result in dl.prefetch(image_names).items():
+        if isinstance(result, Exception):
+            ok = False
+            sys.stderr.write('[ERROR] Could not pull ' + name + ': ' \
+                + str(result) + '\n')
+        else:
+            sys.stdout.write('[INFO] ' + name + ' is ready: ' \
+                + str(result) + '\n')
+    return ok
+
+
+def parse_env(list_of_args):
     """
     @brief Convert the list of --env strings passed in the command line into
            a dictionary for dockerx.DockerLauncher.launch_container().
 
-    @param[in]  list_of_args  List of strings like 'DEEP=LEARNING'.
+    @details Only the first '=' separates the key from the value, so values
+             can contain '=' (e.g. 'OPTS=--level=3'). As in 'docker run',
+             a key without '=' takes its value from the environment of the
+             host, and is skipped if it is not defined there.
+
+    @param[in]  list_of_args  List of strings like 'DEEP=LEARNING', or a
+                              dictionary (the form used in manifests).
 
     @returns the dictionary of environment variables.
     """
-    return { s.split('=')[0]: s.split('=')[1] for s in list_of_args }
+    if isinstance(list_of_args, dict):
+        return {str(k): str(v) for k, v in list_of_args.items()}
+    env = {}
+    for s in list_of_args:
+        key, sep, value = s.partition('=')
+        if not key:
+            raise ValueError('[ERROR] Invalid environment variable: ' \
+                + repr(s))
+        if sep:
+            env[key] = value
+        elif key in os.environ:
+            env[key] = os.environ[key]
+    return env
+
+
+# Volume modes accepted by Docker, e.g. 'ro' or 'rw,z'
+VOLUME_MODES = ('ro', 'rw', 'z', 'Z', 'shared', 'slave', 'private', 
+                'rshared', 'rslave', 'rprivate', 'nocopy', 'consistent',
+                'cached', 'delegated')
 
 
-def parse_vol(list_of_args: list[str]):
+def parse_vol(list_of_args):
     """
     @brief Convert the list of --volume strings passed in the command line
            into a dictionary for dockerx.DockerLauncher.launch_container().
@@ -73,13 +207,187 @@ def parse_vol(list_of_args: list[str]):
     @details There are two types of volumes that we can pass to 
              DockerLauncher, a Docker volume or a bind volume.
              The key is either the host path or a volume name.
+
+             The syntax is '<source>:<target>[:<mode>]'. The target is the
+             part after the last ':' (once the optional mode is removed), so
+             the source can contain ':'.
              
-    @param[in]  list_of_args  List of strings like '/tmp/unix:/foo/unix'.
+    @param[in]  list_of_args  List of strings like '/tmp/unix:/foo/unix' or
+                              '/data:/data:ro', or a dictionary (the form 
+                              used in manifests) {source: target} or 
+                              {source: {'bind': target, 'mode': mode}}.
 
     @returns the dictionary of volumes.
     """
-    return { s.split(':')[0]: {'bind': s.split(':')[1], 'mode': 'rw'} \
-        for s in list_of_args }
+    if isinstance(list_of_args, dict):
+        vol = {}
+        for src, dst in list_of_args.items():
+            if isinstance(dst, dict):
+                vol[src] = {'bind': dst['bind'], 'mode': dst.get('mode', 'rw')}
+            else:
+                vol[src] = {'bind': dst, 'mode': 'rw'}
+        return vol
+    vol = {}
+    for s in list_of_args:
+        rest, mode = s, 'rw'
+        head, sep, tail = s.rpartition(':')
+        if sep and tail and all(m in VOLUME_MODES for m in tail.split(',')):
+            rest, mode = head, tail
+        src, sep, dst = rest.rpartition(':')
+        if not sep or not src or not dst:
+            raise ValueError('[ERROR] Invalid volume, the syntax is ' \
+                + '<source>:<target>[:<mode>]: ' + repr(s))
+        vol[src] = {'bind': dst, 'mode': mode}
+    return vol
+
+
+# Keys of the containers in a manifest, and the corresponding arguments of
+# dockerx.DockerLauncher.launch_container()
+MANIFEST_KEYS = {
+    'image'  : 'image_name',
+    'command': 'command',
+    'env'    : 'env_vars',
+    'volumes': 'volumes',
+    'network': 'network',
+    'nvidia' : 'nvidia_runtime',
+    'name'   : 'name',
+    'ifname' : 'ifname',
+    'pull'   : 'pull',
+    'shm'    : 'shm',
+    'shm_size': 'shm_size',
+    'wait_ready': 'wait_ready',
+    'ready_timeout': 'ready_timeout',
+    'cpuset' : 'cpuset',
+    'cpus'   : 'cpus',
+    'mems'   : 'mems',
+    'memory' : 'mem_limit',
+}
+
+
+def load_manifest(path: str):
+    """
+    @brief Reads a manifest of containers.
+
+    @details The manifest is a JSON (or YAML, if PyYAML is installed) file
+             with either a list of containers or a dictionary with the keys
+             'containers' (the list) and 'defaults' (keys shared by all the
+             containers), e.g.:
+
+             {"defaults": {"nvidia": true, "env": {"TZ": "UTC"}},
+              "containers": [
+                 {"image": "ubuntu", "command": "xclock", "name": "clock"},
+                 {"image": "ubuntu", "command": "xeyes",
+                  "volumes": ["/data:/data:ro"], "env": ["OPTS=--a=b"]}]}
+
+    @param[in]  path  Path to the manifest, the extension '.yaml' or '.yml'
+                      selects the YAML parser.
+
+    @returns the list of specs for dockerx.DockerLauncher.launch_many().
+    """
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError('[ERROR] Reading YAML manifests requires '
+                    'PyYAML, install it with: python3 -m pip install pyyaml')
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    if isinstance(manifest, dict):
+        defaults = manifest.get('defaults') or {}
+        containers = manifest.get('containers')
+    else:
+        defaults, containers = {}, manifest
+    if not isinstance(containers, list):
+        raise ValueError('[ERROR] The manifest must contain a list of ' \
+            + 'containers.')
+
+    specs = []
+    for i, container in enumerate(containers):
+        container = dict(defaults, **container)
+        unknown = set(container) - set(MANIFEST_KEYS)
+        if unknown:
+            raise ValueError('[ERROR] Unknown keys in the container ' \
+                + str(i) + ' of the manifest: ' + ', '.join(sorted(unknown)))
+        if 'image' not in container:
+            raise ValueError('[ERROR] The container ' + str(i) \
+                + ' of the manifest has no image.')
+        spec = {MANIFEST_KEYS[k]: v for k, v in container.items()}
+        spec['env_vars'] = parse_env(spec.get('env_vars', {}))
+        spec['volumes'] = parse_vol(spec.get('volumes', {}))
+        spec['nvidia_runtime'] = bool(spec.get('nvidia_runtime', False))
+        if 'shm' in spec:
+            spec['shm'] = parse_shm(spec['shm'])
+        specs.append(spec)
+    return specs
+
+
+def launch_result(res, index: int = 0):
+    """
+    @param[in]  res    dockerx.dl.LaunchResult.
+    @param[in]  index  Position of the container in the manifest.
+    @returns a dictionary with the outcome of the launch, ready to be dumped
+             as JSON (or sent by the dockerx daemon).
+    """
+    timings = res.timings or {}
+    return {
+        'index': index,
+        'name': res.spec.get('name'),
+        'image': res.spec['image_name'],
+        'ok': res.ok,
+        'container_id': res.container.id if res.ok else None,
+        'error': None if res.ok else str(res.error),
+        'elapsed': timings.get('launch_container'),
+        'shm': res.shm,
+        'time_to_ready': res.time_to_ready,
+        'cpuset': res.allocation.cpuset_cpus if res.allocation \
+            else res.spec.get('cpuset'),
+        'numa_nodes': res.allocation.cpuset_mems if res.allocation else None,
+    }
+
+
+def launch_manifest(dl, specs: list, max_workers: int = 8):
+    """
+    @brief Launches the containers of a manifest concurrently.
+    @returns a list of dictionaries (one per container) with the outcome of
+             each launch, ready to be dumped as JSON.
+    """
+    results = dl.launch_many(specs, max_workers=max_workers)
+    return [launch_result(res, i) for i, res in enumerate(results)]
+
+
+def print_summary(results: list, out=sys.stdout):
+    """@brief Prints a table with the outcome of each launch."""
+    rows = [('#', 'NAME', 'IMAGE', 'STATUS', 'CONTAINER', 'TIME (ms)')]
+    for r in results:
+        rows.append((str(r['index']), r['name'] or '-', r['image'],
+            'ok' if r['ok'] else 'error: ' + r['error'].split('\n')[0],
+            r['container_id'][:12] if r['ok'] else '-',
+            '%.1f' % (1e3 * r['elapsed']) if r['elapsed'] else '-'))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        out.write('  '.join(c.ljust(w) for c, w in zip(row, widths)).rstrip() \
+            + '\n')
+    ok = sum(r['ok'] for r in results)
+    out.write('\n' + str(ok) + '/' + str(len(results)) \
+        + ' containers launched.\n')
+
+
+def is_launch_error(e: Exception):
+    """
+    @returns True if the exception is a failed launch to report without a
+             traceback, the same way whether the launch ran in the daemon
+             (daemon.DaemonError) or in this process (errors of the Docker
+             Engine, invalid options, readiness timeouts).
+    """
+    if isinstance(e, (TimeoutError, RuntimeError, ValueError)):
+        return True
+
+    # The docker SDK is only imported if this process launched something
+    errors = sys.modules.get('docker.errors')
+    return errors is not None and isinstance(e, errors.DockerException)
 
 
 def main():
@@ -87,20 +395,92 @@ def main():
     parser = argparse.ArgumentParser()
     args = parse_command_line_parameters(parser)
 
+    # Send the launches to the resident daemon if there is one, so that this
+    # process does not import the docker SDK nor detect the X server.
+    # Otherwise, the tracer times each launch for the summary of --manifest
+    dl = None if args.no_daemon else daemon.connect()
+    if dl is not None and not dl.same_engine():
+        # DOCKER_HOST or DOCKER_CONTEXT select another engine in this shell
+        dl.close()
+        dl = None
+    if dl is None:
+        dl = dockerx.DockerLauncher(
+            tracer=dockerx.Tracer() if args.manifest else None)
+
+    # Pull images in advance
+    if args.prefetch:
+        ok = prefetch(dl, args.prefetch)
+        if args.image is None and args.manifest is None:
+            sys.exit(0 if ok else 1)
+
+    # Launch all the containers of the manifest concurrently
+    if args.manifest is not None:
+        specs = load_manifest(args.manifest)
+        for spec in specs:
+            if args.no_pull:
+                spec['pull'] = False
+            if args.shm:
+                spec.setdefault('shm', args.shm)
+            if args.shm_size is not None:
+                spec.setdefault('shm_size', args.shm_size)
+            if args.wait_ready:
+                spec.setdefault('wait_ready', args.wait_ready)
+                spec.setdefault('ready_timeout', args.ready_timeout)
+            for key, value in (('cpuset', args.cpuset), ('cpus', args.cpus),
+                    ('mems', args.mems), ('mem_limit', args.memory)):
+                if value is not None:
+                    spec.setdefault(key, value)
+        if isinstance(dl, daemon.DaemonClient):
+            results = dl.launch_many(specs, args.max_workers)
+        else:
+            results = launch_manifest(dl, specs, args.max_workers)
+        print_summary(results, sys.stderr if args.json == '-' else sys.stdout)
+        if args.json == '-':
+            json.dump(results, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+        elif args.json is not None:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+        sys.exit(0 if all(r['ok'] for r in results) else 1)
+
     # Launch docker container
-    dl = dockerx.DockerLauncher()
-    container = dl.launch_container(args.image, command=args.command, 
+    try:
+        kwargs = dict(image_name=args.image, command=args.command, 
             nvidia_runtime=args.nvidia, env_vars=parse_env(args.env),
             volumes=parse_vol(args.volume), name=args.name, 
-            network=args.network)
+            network=args.network, pull=not args.no_pull, shm=args.shm,
+            shm_size=args.shm_size, wait_ready=args.wait_ready or None,
+            ready_timeout=args.ready_timeout, cpuset=args.cpuset, 
+            cpus=args.cpus, mems=args.mems, mem_limit=args.memory)
+        if isinstance(dl, daemon.DaemonClient):
+            result = dl.launch(**kwargs)
+        else:
+            result = launch_result(dl.launch_container(return_result=True,
+                                                       **kwargs))
+    except Exception as e:
+        if not is_launch_error(e):
+            raise
+        sys.stderr.write(str(e) + '\n')
+        sys.exit(1)
+    container_id = result['container_id']
         
     # Print info for the user
+    if args.shm:
+        sys.stdout.write('\n[INFO] MIT-SHM rendering is ' \
+            + ('enabled.' if result['shm'] else 'not available for this ' \
+            + 'display.') + '\n')
+    if result['numa_nodes'] is not None:
+        sys.stdout.write('\n[INFO] Pinned to the CPUs ' + result['cpuset'] \
+            + ' (NUMA node ' + result['numa_nodes'] + ').\n')
+    if result['time_to_ready'] is not None:
+        sys.stdout.write('\n[INFO] The container was ready in %.3f s.\n' \
+            % result['time_to_ready'])
     sys.stdout.write("\nTo get a container terminal run:  ") 
-    sys.stdout.write('docker exec -it ' + container.id[:12]  + " /bin/bash\n") 
+    sys.stdout.write('docker exec -it ' + container_id[:12]  + " /bin/bash\n") 
     sys.stdout.write("To kill the container run:  ")
-    sys.stdout.write('      docker kill ' + container.id[:12] + "\n")
+    sys.stdout.write('      docker kill ' + container_id[:12] + "\n")
     sys.stdout.write("To remove the container run:  ")
-    sys.stdout.write('    docker rm ' + container.id[:12] + "\n\n")
+    sys.stdout.write('    docker rm ' + container_id[:12] + "\n\n")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,481 @@
+##
+# @brief  Streaming resource telemetry of the launched containers.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details A 'GET /containers/<id>/stats' stream per container costs one
+#          connection (and one thread) per container for as long as it
+#          runs. The StatsCollector reads the streams with a fixed pool of
+#          'max_streams' workers instead: each worker follows one running
+#          container of the registry of the launcher, and if other
+#          containers are waiting for a stream it moves on to the next one
+#          after 'dwell' seconds (round robin). The CPU usage is computed
+#          from two consecutive samples of the collector (not from the
+#          'precpu_stats' of the engine), so it stays right when a stream is
+#          handed to another container. The last 'history' samples of each
+#          container are kept in a ring buffer, and are summarised by
+#          metrics() (Python API) and prometheus() (text format of the
+#          Prometheus exposition, optionally served over HTTP by serve()).
+#          Only the containers whose status is 'running' in the registry are
+#          followed (e.g. not the paused containers of a ContainerPool).
+#          Without an EventMonitor, the statuses of the registry are not
+#          updated when a container exits by itself, so the collector
+#          inspects the container when its stream ends and updates its
+#          status.
+
+import time
+import threading
+import collections
+import http.server
+
+# My imports
+from .registry import container_status
+
+
+class Sample:
+    """@brief Resource usage of a container at some point in time."""
+
+    __slots__ = ('time', 'cpu_total', 'system_cpu', 'online_cpus',
+                 'cpu_percent', 'memory', 'memory_limit', 'rx_bytes',
+                 'tx_bytes', 'pids')
+
+    def __init__(self, stats: dict, now: float = None):
+        """
+        @param[in]  stats  One object of the stats stream of the engine.
+        @param[in]  now    time.monotonic() of the sample, by default now.
+        """
+        self.time = time.monotonic() if now is None else now
+        cpu = stats.get('cpu_stats') or {}
+        self.cpu_total = (cpu.get('cpu_usage') or {}).get('total_usage', 0)
+        self.system_cpu = cpu.get('system_cpu_usage', 0)
+        self.online_cpus = cpu.get('online_cpus') \
+            or len((cpu.get('cpu_usage') or {}).get('percpu_usage') or ()) \
+            or 1
+        self.cpu_percent = None  # Set by the collector, see cpu_percent()
+
+        # As 'docker stats', the page cache that can be reclaimed is not
+        # counted ('inactive_file' with cgroups v2, 'total_inactive_file'
+        # with cgroups v1)
+        memory = stats.get('memory_stats') or {}
+        extra = memory.get('stats') or {}
+        cache = extra.get('inactive_file', extra.get('total_inactive_file', 0))
+        self.memory = max(0, memory.get('usage', 0) - cache)
+        self.memory_limit = memory.get('limit', 0)
+
+        networks = (stats.get('networks') or {}).values()
+        self.rx_bytes = sum(n.get('rx_bytes', 0) for n in networks)
+        self.tx_bytes = sum(n.get('tx_bytes', 0) for n in networks)
+        self.pids = (stats.get('pids_stats') or {}).get('current', 0)
+
+    def __repr__(self):
+        return 'Sample(cpu_percent=%r, memory=%d, rx_bytes=%d, ' \
+            'tx_bytes=%d)' % (self.cpu_percent, self.memory, self.rx_bytes,
+                              self.tx_bytes)
+
+
+def cpu_percent(previous: Sample, sample: Sample):
+    """
+    @returns the CPU usage between two samples as 'docker stats' (100 is one
+             CPU busy), or None if it cannot be computed.
+    """
+    system = sample.system_cpu - previous.system_cpu
+    used = sample.cpu_total - previous.cpu_total
+    if system <= 0 or used < 0:
+        return None
+    return 100. * used / system * sample.online_cpus
+
+
+def rate(first: Sample, last: Sample, attr: str):
+    """@returns the increase per second of a counter between two samples."""
+    elapsed = last.time - first.time
+    delta = getattr(last, attr) - getattr(first, attr)
+    if elapsed <= 0 or delta < 0:
+        return None
+    return delta / elapsed
+
+
+class History:
+    """@brief Ring buffer with the last samples of a container."""
+
+    __slots__ = ('id', 'name', 'image', 'samples')
+
+    def __init__(self, cid: str, name: str = None, image: str = None,
+            size: int = 120):
+        self.id = cid
+        self.name = name
+        self.image = image
+        self.samples = collections.deque(maxlen=size)
+
+    def add(self, sample: Sample):
+        if self.samples:
+            sample.cpu_percent = cpu_percent(self.samples[-1], sample)
+        self.samples.append(sample)
+
+    def summary(self, window: float = None):
+        """
+        @param[in]  window  Seconds of history summarised, by default all
+                            the samples in the buffer.
+        @returns a dictionary with the last values and the aggregates of
+                 the window.
+        """
+        samples = list(self.samples)
+        last = samples[-1]
+        if window is not None:
+            samples = [s for s in samples if s.time >= last.time - window]
+        first = samples[0]
+        cpu = [s.cpu_percent for s in samples if s.cpu_percent is not None]
+        return {
+            'name': self.name,
+            'image': self.image,
+            'samples': len(samples),
+            'age': time.monotonic() - last.time,
+            'cpu_percent': last.cpu_percent,
+            'cpu_percent_mean': sum(cpu) / len(cpu) if cpu else None,
+            'cpu_percent_max': max(cpu) if cpu else None,
+            'memory': last.memory,
+            'memory_max': max(s.memory for s in samples),
+            'memory_limit': last.memory_limit,
+            'rx_bytes': last.rx_bytes,
+            'tx_bytes': last.tx_bytes,
+            'rx_rate': rate(first, last, 'rx_bytes'),
+            'tx_rate': rate(first, last, 'tx_bytes'),
+            'pids': last.pids,
+        }
+
+
+def escape_label(value) -> str:
+    """@returns the value of a Prometheus label, escaped."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+# Metrics of each container in prometheus(): (name, type, help, key)
+PROMETHEUS_METRICS = (
+    ('dockerx_container_cpu_percent', 'gauge',
+     'CPU usage of the container, 100 is one CPU busy.', 'cpu_percent'),
+    ('dockerx_container_memory_bytes', 'gauge',
+     'Memory used by the container, without the inactive page cache.',
+     'memory'),
+    ('dockerx_container_memory_limit_bytes', 'gauge',
+     'Memory limit of the container.', 'memory_limit'),
+    ('dockerx_container_network_receive_bytes_total', 'counter',
+     'Bytes received by the container.', 'rx_bytes'),
+    ('dockerx_container_network_transmit_bytes_total', 'counter',
+     'Bytes sent by the container.', 'tx_bytes'),
+    ('dockerx_container_pids', 'gauge',
+     'Number of processes of the container.', 'pids'),
+)
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """@brief Serves StatsCollector.prometheus() on '/metrics'."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.collector.prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StatsCollector:
+    """@brief Samples the resource usage of the containers of a launcher."""
+
+    def __init__(self, launcher, max_streams: int = 4, history: int = 120,
+            dwell: float = 10., refresh: float = 1.):
+        """
+        @param[in]  launcher     DockerLauncher whose running containers are
+                                 sampled. The streams use connections of
+                                 the pool of its client.
+        @param[in]  max_streams  Maximum number of stats streams open at the
+                                 same time.
+        @param[in]  history      Samples kept per container.
+        @param[in]  dwell        Seconds that a stream follows a container
+                                 before moving on to another one, if some
+                                 container is waiting for a stream.
+        @param[in]  refresh      Seconds between reads of the registry of
+                                 the launcher.
+        """
+        if max_streams < 1:
+            raise ValueError('[ERROR] The collector needs at least one ' \
+                + 'stream.')
+        self.launcher = launcher
+        self.max_streams = max_streams
+        self.history = history
+        self.dwell = dwell
+        self.refresh = refresh
+        self.received = 0       # Samples recorded
+        self.opened = 0         # Streams opened
+        self.errors = 0         # Streams that failed
+        self.busy = 0.          # Seconds spent recording samples
+        self._histories = {}    # Container id -> History
+        self._queue = collections.deque()   # Ids waiting for a stream
+        self._streaming = {}    # Id -> open stream
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._http = None
+
+    def start(self):
+        """@brief Starts sampling in background threads. @returns self."""
+        if not self._threads:
+            self._stop.clear()
+            self.sync()
+            self._threads = [threading.Thread(target=self._schedule,
+                daemon=True, name='dockerx-telemetry')]
+            self._threads += [threading.Thread(target=self._work, daemon=True,
+                name='dockerx-telemetry-' + str(i))
+                for i in range(self.max_streams)]
+            for thread in self._threads:
+                thread.start()
+        return self
+
+    def close(self):
+        """
+        @brief Stops sampling and the HTTP endpoint. A stream is closed
+               after its next sample (every second with Docker).
+        """
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+            streams = [s for s in self._streaming.values() if s is not None]
+        for stream in streams:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def sync(self):
+        """
+        @brief Reads the registry of the launcher: the running containers
+               are queued for a stream, and the history of the containers
+               that are no longer registered is dropped.
+        """
+        records = self.launcher.registry.records()
+        with self._cond:
+            registered = {r.id for r in records}
+            for cid in [c for c in self._histories if c not in registered]:
+                del self._histories[cid]
+            for record in records:
+                if record.id not in self._histories:
+                    self._histories[record.id] = History(record.id,
+                        record.name, record.image, self.history)
+                if record.status == 'running' \
+                        and record.id not in self._streaming \
+                        and record.id not in self._queue:
+                    self._queue.append(record.id)
+            self._queue = collections.deque(c for c in self._queue
+                                            if c in registered)
+            self._cond.notify_all()
+
+    def _schedule(self):
+        while not self._stop.wait(self.refresh):
+            try:
+                self.sync()
+            except Exception:
+                pass
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop.is_set():
+                    self._cond.wait()
+                if self._stop.is_set():
+                    return
+                cid = self._queue.popleft()
+                self._streaming[cid] = None
+            rotated = False
+            try:
+                rotated = self._follow(cid)
+            except Exception:
+                with self._cond:
+                    self.errors += 1
+            finally:
+                # A stream that ended (or failed) is opened again by sync()
+                # only if the container is still running
+                if not rotated and not self._stop.is_set():
+                    self.check(cid)
+                with self._cond:
+                    self._streaming.pop(cid, None)
+                    if rotated and cid in self._histories:
+                        self._queue.append(cid)
+                        self._cond.notify()
+
+    def check(self, cid: str):
+        """
+        @brief Updates the status of a container in the registry of the
+               launcher from a fresh inspect.
+        @returns the status of the container, 'removed' if it no longer
+                 exists, or None if it could not be inspected.
+        """
+        from docker.errors import NotFound
+        try:
+            attrs = self.launcher.client.api.inspect_container(cid)
+        except NotFound:
+            status = 'removed'
+        except Exception:
+            return None
+        else:
+            status = container_status(attrs)
+        self.launcher.registry.set_status(cid, status)
+        return status
+
+    def open_stream(self, cid: str):
+        """
+        @returns an iterator over the stats of a container that can be
+                 closed from another thread. APIClient.stats() returns a
+                 plain generator, closing it leaves the connection open, so
+                 the stream is built like APIClient.events() does.
+        """
+        from docker.types.daemon import CancellableStream
+        api = self.launcher.client.api
+        response = api._get(api._url('/containers/{0}/stats', cid),
+                            params={'stream': True}, stream=True)
+        api._raise_for_status(response)
+        return CancellableStream(api._stream_helper(response, decode=True),
+                                 response)
+
+    def _follow(self, cid: str):
+        """
+        @brief Records the samples of the stats stream of a container.
+        @returns True if the stream was left for another container, False
+                 if it ended.
+        """
+        with self._cond:
+            self.opened += 1
+        started = time.monotonic()
+        stream = self.open_stream(cid)
+        with self._cond:
+            self._streaming[cid] = stream
+        try:
+            for stats in stream:
+                if self._stop.is_set():
+                    return False
+                self.record(cid, stats)
+                record = self.launcher.registry.get(cid)
+                if record is None or record.status != 'running':
+                    return False
+                if self._queue \
+                        and time.monotonic() - started >= self.dwell:
+                    return True
+        finally:
+            stream.close()
+        return False
+
+    def record(self, cid: str, stats: dict):
+        """
+        @brief Adds a sample to the history of a container.
+        @param[in]  cid    Id of the container.
+        @param[in]  stats  Object of the stats stream of the engine.
+        @returns the Sample, or None if the container is not followed.
+        """
+        tic = time.perf_counter()
+        sample = Sample(stats)
+        with self._cond:
+            history = self._histories.get(cid)
+            if history is not None:
+                history.add(sample)
+                self.received += 1
+            self.busy += time.perf_counter() - tic
+        return sample if history is not None else None
+
+    def samples(self, cid: str):
+        """@returns the list of Samples of a container, oldest first."""
+        with self._cond:
+            history = self._histories.get(cid)
+            return list(history.samples) if history is not None else []
+
+    def metrics(self, window: float = None):
+        """
+        @param[in]  window  Seconds of history aggregated, by default the
+                            whole ring buffer.
+        @returns a dictionary {container id: History.summary()} of the
+                 containers with samples.
+        """
+        with self._cond:
+            return {cid: history.summary(window)
+                    for cid, history in self._histories.items()
+                    if history.samples}
+
+    def totals(self, window: float = None):
+        """@returns the sum of the usage of all the containers."""
+        metrics = self.metrics(window).values()
+        return {
+            'containers': len(metrics),
+            'cpu_percent': sum(m['cpu_percent'] or 0. for m in metrics),
+            'memory': sum(m['memory'] for m in metrics),
+            'rx_rate': sum(m['rx_rate'] or 0. for m in metrics),
+            'tx_rate': sum(m['tx_rate'] or 0. for m in metrics),
+        }
+
+    def stats(self):
+        """@returns the counters of the collector itself."""
+        with self._cond:
+            return {'streams': len(self._streaming),
+                    'queued': len(self._queue),
+                    'containers': len(self._histories),
+                    'received': self.received, 'opened': self.opened,
+                    'errors': self.errors, 'busy': self.busy}
+
+    def prometheus(self):
+        """@returns the metrics in the Prometheus text exposition format."""
+        metrics = self.metrics()
+        lines = []
+        for name, kind, help_text, key in PROMETHEUS_METRICS:
+            lines.append('# HELP ' + name + ' ' + help_text)
+            lines.append('# TYPE ' + name + ' ' + kind)
+            for cid, m in metrics.items():
+                if m[key] is None:
+                    continue
+                lines.append('%s{id="%s",name="%s",image="%s"} %s' % (name,
+                    cid[:12], escape_label(m['name'] or ''),
+                    escape_label(m['image'] or ''), repr(float(m[key]))))
+        stats = self.stats()
+        for name, kind, help_text, value in (
+                ('dockerx_telemetry_streams', 'gauge',
+                 'Stats streams open.', stats['streams']),
+                ('dockerx_telemetry_samples_total', 'counter',
+                 'Samples recorded by the collector.', stats['received']),
+                ('dockerx_telemetry_errors_total', 'counter',
+                 'Stats streams that failed.', stats['errors'])):
+            lines.append('# HELP ' + name + ' ' + help_text)
+            lines.append('# TYPE ' + name + ' ' + kind)
+            lines.append(name + ' ' + str(value))
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 0, host: str = '127.0.0.1'):
+        """
+        @brief Serves prometheus() on 'http://host:port/metrics' in a
+               background thread, until close().
+        @param[in]  port  TCP port, 0 for any free port.
+        @param[in]  host  Address to listen on, only this host by default.
+        @returns the (host, port) of the endpoint.
+        """
+        if self._http is None:
+            self._http = http.server.ThreadingHTTPServer((host, port),
+                                                         MetricsHandler)
+            self._http.daemon_threads = True
+            self._http.collector = self
+            threading.Thread(target=self._http.serve_forever, daemon=True,
+                             name='dockerx-metrics').start()
+        return self._http.server_address[:2]
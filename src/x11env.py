@@ -0,0 +1,70 @@
+##
+# @brief  DISPLAY and XAUTHORITY of the X11 client that a launch is for.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details The X11 setup of the containers is derived from the DISPLAY and
+#          XAUTHORITY variables of the process. The dockerx daemon launches
+#          containers for many shells, each one with its own display, so it
+#          runs every request inside 'with x11env.override(environment):'.
+#          The override is stored in a context variable, so it follows the
+#          thread or asyncio task that launches the container (like the
+#          traces of dockerx.tracing), and concurrent requests do not see
+#          each other's display.
+
+import os
+import contextlib
+import contextvars
+
+# Variables that describe the X11 client
+KEYS = ('DISPLAY', 'XAUTHORITY')
+
+_current = contextvars.ContextVar('dockerx_x11env', default=None)
+
+
+def get(key: str, default: str = None):
+    """
+    @param[in]  key      'DISPLAY' or 'XAUTHORITY'.
+    @param[in]  default  Value returned if the variable is not defined.
+    @returns the value of the variable for the current launch: the one of
+             the active override(), or else the one of os.environ.
+    """
+    environment = _current.get()
+    if environment is None:
+        return os.environ.get(key, default)
+    return environment.get(key, default)
+
+
+def current():
+    """@returns the dictionary {key: value} of the variables of KEYS."""
+    return {key: get(key) for key in KEYS if get(key) is not None}
+
+
+def environ():
+    """
+    @returns the environment for subprocesses that talk to the X server
+             (e.g. xhost): os.environ with the variables of the active
+             override(), or None (inherit os.environ) if there is none.
+    """
+    environment = _current.get()
+    if environment is None:
+        return None
+    env = {k: v for k, v in os.environ.items() if k not in KEYS}
+    env.update(environment)
+    return env
+
+
+@contextlib.contextmanager
+def override(environment: dict):
+    """
+    @brief Uses the DISPLAY and XAUTHORITY of 'environment' (instead of
+           those of os.environ) inside the 'with' block.
+    @param[in]  environment  Dictionary with the keys of KEYS. A missing
+                             key counts as not defined.
+    """
+    token = _current.set({key: environment[key] for key in KEYS
+                          if environment.get(key) is not None})
+    try:
+        yield
+    finally:
+        _current.reset(token)
@@ -0,0 +1,340 @@
+##
+# @brief  Reader and writer of Xauthority files.
+# @author Luis Carlos Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+# @date   17 October 2026.
+#
+# @details An Xauthority file is a sequence of entries with the layout
+#          (all integers are unsigned 16-bit big-endian):
+#
+#            family | len | address | len | number | len | name | len | data
+#
+#          where 'number' is the display number as an ASCII string, 'name'
+#          is the authorization protocol (e.g. 'MIT-MAGIC-COOKIE-1') and
+#          'data' is the cookie. This module replaces the calls to
+#          'xauth nlist' and 'xauth nmerge' that dockerx used to make.
+
+import os
+import re
+import socket
+import struct
+import hashlib
+import tempfile
+import threading
+import collections
+
+# My imports
+from . import x11env
+
+# Address families used in Xauthority files (see Xauth.h)
+FAMILY_INTERNET = 0
+FAMILY_INTERNET6 = 6
+FAMILY_LOCAL = 256
+FAMILY_WILD = 65535
+
+
+class XauthEntry:
+    """@brief Entry of an Xauthority file."""
+
+    def __init__(self, family: int, address: bytes, number: bytes,
+            name: bytes, data: bytes):
+        """
+        @param[in]  family   Address family, e.g. FAMILY_LOCAL.
+        @param[in]  address  Hostname for FAMILY_LOCAL, packed IP address for
+                             FAMILY_INTERNET(6).
+        @param[in]  number   Display number as bytes, e.g. b'10'.
+        @param[in]  name     Authorization protocol, e.g. b'MIT-MAGIC-COOKIE-1'.
+        @param[in]  data     Authorization data (i.e. the cookie).
+        """
+        self.family = family
+        self.address = address
+        self.number = number
+        self.name = name
+        self.data = data
+
+    def pack(self):
+        """@returns the binary representation of the entry."""
+        out = struct.pack('>H', self.family)
+        for field in (self.address, self.number, self.name, self.data):
+            out += struct.pack('>H', len(field)) + field
+        return out
+
+    def wildcard(self):
+        """
+        @returns a copy of the entry with the FAMILY_WILD family, which
+                 matches any address. This is what allows an X client running
+                 inside a container (i.e. with a different hostname and IP) to
+                 use the cookie of the host.
+        """
+        return XauthEntry(FAMILY_WILD, self.address, self.number, self.name,
+                          self.data)
+
+    def __eq__(self, other):
+        return isinstance(other, XauthEntry) and self.pack() == other.pack()
+
+    def __repr__(self):
+        return 'XauthEntry(family=%d, address=%r, number=%r, name=%r)' % (
+            self.family, self.address, self.number, self.name)
+
+
+def default_path():
+    """@returns the path to the Xauthority file of the user."""
+    return x11env.get('XAUTHORITY',
+        os.path.join(os.path.expanduser('~'), '.Xauthority'))
+
+
+def parse(raw: bytes):
+    """
+    @brief Parses the contents of an Xauthority file.
+    @returns a list of XauthEntry objects.
+    """
+    entries = []
+    pos = 0
+    try:
+        while pos < len(raw):
+            family, = struct.unpack_from('>H', raw, pos)
+            pos += 2
+            fields = []
+            for _ in range(4):
+                length, = struct.unpack_from('>H', raw, pos)
+                pos += 2
+                if pos + length > len(raw):
+                    raise ValueError('truncated field')
+                fields.append(raw[pos:pos + length])
+                pos += length
+            entries.append(XauthEntry(family, *fields))
+    except (struct.error, ValueError):
+        raise ValueError('[ERROR] Corrupted Xauthority data at byte ' \
+            + str(pos) + '.')
+    return entries
+
+
+def read_entries(path: str = None):
+    """
+    @param[in]  path  Path to the Xauthority file, by default the one of the
+                      user.
+    @returns the list of entries of the file, empty if it does not exist.
+    """
+    try:
+        with open(path or default_path(), 'rb') as f:
+            return parse(f.read())
+    except FileNotFoundError:
+        return []
+
+
+def write_entries(path: str, entries: list, mode: int = None):
+    """
+    @brief Writes an Xauthority file atomically, i.e. readers see either the
+           previous contents or the new ones, never a partially written file.
+
+    @param[in]  path     Path to the Xauthority file.
+    @param[in]  entries  List of XauthEntry objects.
+    @param[in]  mode     Permissions of the file. By default, those of the
+                         existing file are kept, or 0o644 (masked by the
+                         umask) are used for a new file.
+    """
+    if mode is None:
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o644 & ~umask
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+        prefix='.' + os.path.basename(path) + '-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b''.join(entry.pack() for entry in entries))
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def parse_display(display: str):
+    """
+    @param[in]  display  X11 display, e.g. 'localhost:10.0' or ':1'.
+    @returns a tuple (host, number) such as ('localhost', '10').
+    """
+    m = re.match(r'^(.*):(\d+)(?:\.\d+)?$', display)
+    if m is None:
+        raise ValueError('[ERROR] Invalid X11 display: ' + repr(display))
+    host = m.group(1)
+    if host.startswith('[') and host.endswith(']'):
+        host = host[1:-1]
+    return host, m.group(2)
+
+
+def display_addresses(host: str):
+    """
+    @brief Computes the (family, address) pairs that Xauthority entries can
+           have for a display host, in order of preference.
+
+    @details Mimics the lookup of the 'xauth' tool: local displays are
+             registered under the hostname of the machine (FAMILY_LOCAL),
+             remote ones under their IP address.
+
+    @returns a list of (family, address) tuples.
+    """
+    hostname = socket.gethostname()
+    if host in ('', 'unix', 'localhost', hostname) \
+            or host.startswith('127.') or host == '::1':
+        return [(FAMILY_LOCAL, hostname.encode())]
+
+    addresses = []
+    for af, family in ((socket.AF_INET, FAMILY_INTERNET),
+                       (socket.AF_INET6, FAMILY_INTERNET6)):
+        try:
+            addresses.append((family, socket.inet_pton(af, host)))
+            return addresses
+        except OSError:
+            pass
+    try:
+        infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        infos = []
+    for af, _, _, _, sockaddr in infos:
+        family = FAMILY_INTERNET if af == socket.AF_INET else FAMILY_INTERNET6
+        addr = (family, socket.inet_pton(af, sockaddr[0]))
+        if addr not in addresses:
+            addresses.append(addr)
+    return addresses
+
+
+def find_cookie(display: str, path: str = None,
+        name: bytes = b'MIT-MAGIC-COOKIE-1'):
+    """
+    @brief Native replacement for 'xauth nlist <display>'.
+
+    @param[in]  display  X11 display, e.g. os.environ['DISPLAY'].
+    @param[in]  path     Xauthority file, by default the one of the user.
+    @param[in]  name     Authorization protocol of the cookie.
+
+    @returns the XauthEntry for the display, or None if there is none.
+    """
+    host, number = parse_display(display)
+    entries = [e for e in read_entries(path)
+        if e.name == name and e.number in (number.encode(), b'')]
+    for family, address in display_addresses(host):
+        for entry in entries:
+            if entry.family == family and entry.address == address:
+                return entry
+    for entry in entries:
+        if entry.family == FAMILY_WILD:
+            return entry
+    return None
+
+
+def merge_entry(path: str, entry: XauthEntry):
+    """
+    @brief Native replacement for 'xauth -f <path> nmerge', i.e. adds the
+           entry to the file replacing any entry for the same family, address
+           and display number.
+    """
+    entries = [e for e in read_entries(path) if (e.family, e.address,
+        e.number) != (entry.family, entry.address, entry.number)]
+    entries.append(entry)
+    write_entries(path, entries)
+
+
+class XauthFileStore:
+    """
+    @brief Per-display Xauthority files for the containers.
+
+    @details Each file contains exactly one entry (the cookie of a display
+             with a wildcard family) and its name includes a hash of the
+             entry, so a file is never modified once written: if the cookie
+             of a display changes, a new file is written (atomically) and
+             the previous one is deleted when no container uses it anymore.
+             Launches of the same display with the same cookie reuse the
+             file without writing anything.
+    """
+
+    def __init__(self, directory: str = None):
+        """
+        @param[in]  directory  Folder of the files, by default
+                               '<tmp>/dockerx-xauth-<uid>'.
+        """
+        self.directory = directory
+        self.writes = 0
+        self._refs = collections.Counter()
+        self._current = {}  # display -> path
+        self._lock = threading.Lock()
+
+    def folder(self):
+        """@returns the folder of the files, it is created if needed."""
+        directory = self.directory or os.path.join(tempfile.gettempdir(),
+            'dockerx-xauth-' + str(os.getuid()))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        return directory
+
+    def path_for(self, display: str, entry: XauthEntry = None):
+        """@returns the path of the file of a display and entry."""
+        digest = hashlib.sha256(entry.pack() if entry is not None else b'')
+        name = re.sub(r'[^A-Za-z0-9.]', '_', display) + '-' \
+            + digest.hexdigest()[:16] + '.xauth'
+        return os.path.join(self.folder(), name)
+
+    def get(self, display: str, entry: XauthEntry = None):
+        """
+        @brief Writes (if needed) the file of a display.
+        @param[in]  display  X11 display, e.g. os.environ['DISPLAY'].
+        @param[in]  entry    XauthEntry to put in the file, None for an empty
+                             file.
+        @returns the path of the file.
+        """
+        path = self.path_for(display, entry)
+        with self._lock:
+            if not os.path.isfile(path):
+                write_entries(path, [entry] if entry is not None else [])
+                self.writes += 1
+            previous = self._current.get(display)
+            self._current[display] = path
+            if previous is not None and previous != path:
+                self._delete_if_unused(previous)
+        return path
+
+    def owns(self, path: str):
+        """@returns True if the file was written by this store."""
+        with self._lock:
+            return path in self._current.values() or path in self._refs
+
+    def acquire(self, path: str):
+        """@brief Records that a container uses the file."""
+        with self._lock:
+            self._refs[path] += 1
+
+    def release(self, path: str):
+        """
+        @brief Records that a container that used the file is gone. The file
+               is deleted if it is not used and is not the current file of
+               its display.
+        """
+        with self._lock:
+            if self._refs[path] > 0:
+                self._refs[path] -= 1
+            self._delete_if_unused(path)
+
+    def _delete_if_unused(self, path: str):
+        if self._refs[path] > 0 or path in self._current.values():
+            return
+        del self._refs[path]
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self):
+        """
+        @brief Deletes all the files that are not used by any container,
+               including the current ones.
+        @returns the number of files deleted.
+        """
+        with self._lock:
+            unused = [p for p in self._current.values() if not self._refs[p]]
+            self._current = {d: p for d, p in self._current.items()
+                             if p not in unused}
+            for path in unused:
+                self._delete_if_unused(path)
+        return len(unused)
@@ -0,0 +1,711 @@
+"""
+@brief  Local stand-in for the Docker Engine API, served over a unix socket.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+
+@details Implements the subset of the Engine API used by dockerx, keeping
+         the containers and images in memory. Both the docker SDK and the
+         dockerx.aio client can talk to it, e.g.:
+
+             engine = FakeEngine(images=['ubuntu:latest']).start()
+             client = docker.DockerClient(base_url=engine.base_url,
+                                          version='1.41')
+             ...
+             engine.stop()
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import shutil
+import struct
+import hashlib
+import tempfile
+import threading
+import itertools
+import socketserver
+import http.server
+import urllib.parse
+
+
+class FakeEngineHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return 'unix'
+
+    def send_json(self, status, data=None):
+        body = b'' if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        if data is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_json(status, {'message': message})
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length) if length else b''
+        return json.loads(raw) if raw else None
+
+    def dispatch(self, method):
+        """@brief Calls the route handler of the request."""
+        engine = self.server.engine
+        url = urllib.parse.urlsplit(self.path)
+        path = re.sub(r'^/v[0-9.]+', '', url.path)
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        body = self.read_body()
+        with engine.lock:
+            engine.requests.append((method, path))
+        if engine.latency:
+            time.sleep(engine.latency)
+        for route_method, pattern, handler in engine.routes:
+            m = re.fullmatch(pattern, path)
+            if route_method == method and m:
+                return handler(self, query, body, *m.groups())
+        self.send_error_json(404, 'page not found: ' + method + ' ' + path)
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def do_HEAD(self):
+        self.dispatch('HEAD')
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeEngine:
+    """@brief In-memory Docker Engine API server."""
+
+    api_version = '1.41'
+
+    def __init__(self, images=(), latency: float = 0., socket_path=None):
+        """
+        @param[in]  images       Names of the images present in the engine.
+        @param[in]  latency      Delay (in seconds) added to every request.
+        @param[in]  socket_path  Path of the unix socket, a temporary one is
+                                 used by default.
+        """
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = []
+        self.containers = {}
+        self.images = {}
+        self.pulls = []
+        self.execs = {}
+        self.subscribers = []
+        self.event_log = []
+        self.logs = {}  # Container id -> [(stream, bytes)]
+        self.log_followers = []
+        self.pull_delay = 0.
+        self.usage = {}  # Container id -> {'cpu', 'memory', 'rx', 'tx'}
+        self.stats_interval = 1.
+        self.stats_streams = 0
+        self.max_stats_streams = 0
+        self._stats_epoch = {}
+        self.init_pid = 0
+        self.start_error = None  # Message of the 500 of the next starts
+        self.networks = {'default', 'bridge', 'host', 'none'}
+        self._stopping = threading.Event()
+        self._ids = itertools.count(1)
+        for image in images:
+            self.add_image(image)
+
+        self._tmpdir = None
+        if socket_path is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='dockerx-engine-')
+            socket_path = os.path.join(self._tmpdir, 'docker.sock')
+        self.socket_path = socket_path
+        self.base_url = 'unix://' + socket_path
+        self.server = None
+
+        r = r'/containers/([^/]+)'
+        self.routes = [
+            ('GET', r'/_ping', FakeEngine.ping),
+            ('HEAD', r'/_ping', FakeEngine.ping),
+            ('GET', r'/version', FakeEngine.version),
+            ('GET', r'/info', FakeEngine.info),
+            ('POST', r'/containers/create', FakeEngine.create),
+            ('GET', r'/containers/json', FakeEngine.list_containers),
+            ('POST', r + '/start', FakeEngine.start_container),
+            ('POST', r + '/stop', FakeEngine.stop_container),
+            ('POST', r + '/kill', FakeEngine.stop_container),
+            ('POST', r + '/wait', FakeEngine.wait_container),
+            ('POST', r + '/pause', FakeEngine.pause_container),
+            ('POST', r + '/unpause', FakeEngine.unpause_container),
+            ('POST', r + '/exec', FakeEngine.create_exec),
+            ('POST', r'/exec/([^/]+)/start', FakeEngine.start_exec),
+            ('GET', r'/exec/([^/]+)/json', FakeEngine.inspect_exec),
+            ('GET', r + '/json', FakeEngine.inspect_container),
+            ('GET', r + '/logs', FakeEngine.logs),
+            ('GET', r + '/stats', FakeEngine.stats),
+            ('DELETE', r, FakeEngine.remove_container),
+            ('GET', r'/images/json', FakeEngine.list_images),
+            ('POST', r'/images/create', FakeEngine.pull_image),
+            ('GET', r'/images/(.+)/json', FakeEngine.inspect_image),
+            ('GET', r'/events', FakeEngine.events),
+        ]
+
+    # --- Lifecycle of the server ---------------------------------------------
+
+    def start(self):
+        """@brief Starts serving in a background thread. @returns self."""
+        self.server = UnixHTTPServer(self.socket_path, FakeEngineHandler)
+        self.server.engine = self
+        threading.Thread(target=self.server.serve_forever, args=(0.05,),
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        """@brief Stops the server and removes its socket."""
+        self._stopping.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+        elif os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # --- Helpers -------------------------------------------------------------
+
+    @staticmethod
+    def normalise_image(name: str):
+        """@returns the image name with an explicit tag, e.g. 'ubuntu:latest'."""
+        if ':' not in name.rsplit('/', 1)[-1] and '@' not in name:
+            name += ':latest'
+        return name
+
+    def add_image(self, name: str):
+        name = FakeEngine.normalise_image(name)
+        digest = 'sha256:' + hashlib.sha256(name.encode()).hexdigest()
+        self.images[name] = {'Id': digest, 'RepoTags': [name],
+            'RepoDigests': [name.split(':')[0] + '@' + digest],
+            'Created': int(time.time()), 'Size': 0, 'Labels': {}}
+
+    def find_image(self, name: str):
+        image = self.images.get(FakeEngine.normalise_image(name))
+        if image is None:
+            for candidate in self.images.values():
+                if name in (candidate['Id'], candidate['Id'][7:19]):
+                    return candidate
+        return image
+
+    def find_container(self, ref: str):
+        container = self.containers.get(ref)
+        if container is None:
+            for candidate in self.containers.values():
+                if candidate['Name'] == '/' + ref \
+                        or (len(ref) >= 12 and candidate['Id'].startswith(ref)):
+                    return candidate
+        return container
+
+    def count(self, method: str, pattern: str):
+        """@returns the number of requests that matched method and pattern."""
+        with self.lock:
+            return sum(1 for m, p in self.requests
+                       if m == method and re.fullmatch(pattern, p))
+
+    def set_state(self, container: dict, status: str, exit_code: int = 0):
+        state = container['State']
+        previous = state['Status']
+        state['Status'] = status
+        state['Running'] = status == 'running'
+        state['Paused'] = status == 'paused'
+        if status == 'exited':
+            state['ExitCode'] = exit_code
+        if status == 'running':
+            self.emit(container, 'unpause' if previous == 'paused' 
+                      else 'start')
+        elif status == 'paused':
+            self.emit(container, 'pause')
+        elif status == 'exited' and previous != 'exited':
+            self.emit(container, 'die', exitCode=str(exit_code))
+            for cid, followers in list(self.log_followers):
+                if cid == container['Id']:
+                    followers.put(None)
+
+    def emit(self, container: dict, action: str, **attributes):
+        """@brief Sends a container event to the /events subscribers."""
+        attributes.update(container['Config']['Labels'])
+        attributes.update({'image': container['Config']['Image'],
+                           'name': container['Name'].lstrip('/')})
+        now = time.time()
+        event = {'Type': 'container', 'Action': action, 'status': action,
+            'id': container['Id'], 'from': container['Config']['Image'],
+            'Actor': {'ID': container['Id'], 'Attributes': attributes},
+            'scope': 'local', 'time': int(now), 'timeNano': int(now * 1e9)}
+        self.event_log.append(event)
+        for subscriber in list(self.subscribers):
+            subscriber.put(event)
+
+    def oom(self, ref: str):
+        """@brief Simulates a container killed by the OOM killer."""
+        with self.lock:
+            container = self.find_container(ref)
+            self.emit(container, 'oom')
+            self.set_state(container, 'exited', 137)
+
+    def health(self, ref: str, status: str = 'healthy'):
+        """@brief Simulates a result of the healthcheck of a container."""
+        with self.lock:
+            container = self.find_container(ref)
+            container['State']['Health'] = {'Status': status}
+            self.emit(container, 'health_status: ' + status)
+
+    def log(self, ref: str, data: str, stream: int = 1):
+        """
+        @brief Appends output of a container (1 = stdout, 2 = stderr) and 
+               sends it to the clients that follow its logs.
+        """
+        with self.lock:
+            container = self.find_container(ref)
+            record = (stream, data.encode())
+            self.logs.setdefault(container['Id'], []).append(record)
+            for cid, followers in list(self.log_followers):
+                if cid == container['Id']:
+                    followers.put(record)
+
+    # --- Routes --------------------------------------------------------------
+
+    @staticmethod
+    def ping(req, query, body):
+        req.send_response(200)
+        req.send_header('Content-Type', 'text/plain')
+        req.send_header('Content-Length', '2')
+        req.end_headers()
+        if req.command != 'HEAD':
+            req.wfile.write(b'OK')
+
+    @staticmethod
+    def version(req, query, body):
+        req.send_json(200, {'ApiVersion': FakeEngine.api_version,
+            'MinAPIVersion': '1.12', 'Version': '20.10.0', 'Os': 'linux'})
+
+    @staticmethod
+    def info(req, query, body):
+        engine = req.server.engine
+        with engine.lock:
+            states = [c['State']['Status'] for c in engine.containers.values()]
+        req.send_json(200, {
+            'Containers': len(states),
+            'ContainersRunning': states.count('running'),
+            'ContainersPaused': states.count('paused'),
+            'ContainersStopped': states.count('exited'),
+            'Images': len(engine.images),
+            'NCPU': getattr(engine, 'ncpu', 8),
+            'MemTotal': getattr(engine, 'mem_total', 16 * 2 ** 30),
+            'Name': getattr(engine, 'name', 'fake-engine'),
+        })
+
+    @staticmethod
+    def create(req, query, body):
+        engine = req.server.engine
+        with engine.lock:
+            image = engine.find_image(body['Image'])
+            if image is None:
+                return req.send_error_json(404,
+                    'No such image: ' + body['Image'])
+            network = (body.get('HostConfig') or {}).get('NetworkMode')
+            if network and network not in engine.networks \
+                    and not network.startswith('container:'):
+                return req.send_error_json(404,
+                    'network ' + network + ' not found')
+            name = query.get('name')
+            if name and engine.find_container(name) is not None:
+                return req.send_error_json(409, 'Conflict. The container ' \
+                    + 'name "/' + name + '" is already in use.')
+            cid = hashlib.sha256(str(next(engine._ids)).encode()).hexdigest()
+            name = name or 'fake_' + cid[:8]
+            engine.containers[cid] = {
+                'Id': cid, 'Name': '/' + name, 'Image': image['Id'],
+                'Created': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'Config': {'Image': body['Image'], 'Cmd': body.get('Cmd'),
+                           'Env': body.get('Env') or [], 'Tty': False,
+                           'Labels': body.get('Labels') or {}},
+                'HostConfig': body.get('HostConfig') or {},
+                'State': {'Status': 'created', 'Running': False,
+                          'Paused': False, 'ExitCode': 0, 'Pid': 0},
+            }
+            engine.emit(engine.containers[cid], 'create')
+        req.send_json(201, {'Id': cid, 'Warnings': []})
+
+    @staticmethod
+    def container_or_404(req, ref):
+        container = req.server.engine.find_container(ref)
+        if container is None:
+            req.send_error_json(404, 'No such container: ' + ref)
+        return container
+
+    @staticmethod
+    def start_container(req, query, body, ref):
+        engine = req.server.engine
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            if engine.start_error is not None:
+                return req.send_error_json(500, engine.start_error)
+            # Process id of the container in the host, see 'init_pid'
+            container['State']['Pid'] = engine.init_pid
+            engine.set_state(container, 'running')
+        req.send_json(204)
+
+    @staticmethod
+    def stop_container(req, query, body, ref):
+        engine = req.server.engine
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            engine.set_state(container, 'exited', 137)
+            if req.path.endswith('/stop') or '/stop?' in req.path:
+                engine.emit(container, 'stop')
+        req.send_json(204)
+
+    @staticmethod
+    def pause_container(req, query, body, ref):
+        engine = req.server.engine
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            if not container['State']['Running']:
+                return req.send_error_json(409, 'Container ' + ref \
+                    + ' is not running')
+            engine.set_state(container, 'paused')
+        req.send_json(204)
+
+    @staticmethod
+    def unpause_container(req, query, body, ref):
+        engine = req.server.engine
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            if not container['State']['Paused']:
+                return req.send_error_json(500, 'Container ' + ref \
+                    + ' is not paused')
+            engine.set_state(container, 'running')
+        req.send_json(204)
+
+    @staticmethod
+    def create_exec(req, query, body, ref):
+        engine = req.server.engine
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            if not container['State']['Running']:
+                return req.send_error_json(409, 'Container ' + ref \
+                    + ' is not running')
+            exec_id = hashlib.sha256(b'exec' \
+                + str(next(engine._ids)).encode()).hexdigest()
+            engine.execs[exec_id] = {'ID': exec_id, 'Running': False,
+                'ExitCode': None, 'ContainerID': container['Id'],
+                'ProcessConfig': {'entrypoint': body['Cmd'][0],
+                                  'arguments': body['Cmd'][1:]}}
+            container.setdefault('Execs', []).append(body['Cmd'])
+        req.send_json(201, {'Id': exec_id})
+
+    @staticmethod
+    def start_exec(req, query, body, exec_id):
+        engine = req.server.engine
+        with engine.lock:
+            if exec_id not in engine.execs:
+                return req.send_error_json(404, 'No such exec instance')
+            engine.execs[exec_id]['Running'] = True
+        req.send_json(200)
+
+    @staticmethod
+    def inspect_exec(req, query, body, exec_id):
+        engine = req.server.engine
+        with engine.lock:
+            if exec_id not in engine.execs:
+                return req.send_error_json(404, 'No such exec instance')
+            req.send_json(200, engine.execs[exec_id])
+
+    @staticmethod
+    def wait_container(req, query, body, ref):
+        container = FakeEngine.container_or_404(req, ref)
+        if container is not None:
+            req.send_json(200, {'StatusCode': container['State']['ExitCode']})
+
+    @staticmethod
+    def inspect_container(req, query, body, ref):
+        container = FakeEngine.container_or_404(req, ref)
+        if container is not None:
+            req.send_json(200, container)
+
+    @staticmethod
+    def remove_container(req, query, body, ref):
+        engine = req.server.engine
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            if container['State']['Running'] and query.get('force') not in \
+                    ('1', 'true', 'True'):
+                return req.send_error_json(409, 'You cannot remove a ' \
+                    + 'running container ' + container['Id'])
+            del engine.containers[container['Id']]
+            engine.emit(container, 'destroy')
+        req.send_json(204)
+
+    @staticmethod
+    def list_containers(req, query, body):
+        engine = req.server.engine
+        filters = json.loads(query.get('filters', '{}'))
+        show_all = query.get('all') in ('1', 'true', 'True')
+        out = []
+        with engine.lock:
+            for c in engine.containers.values():
+                status = c['State']['Status']
+                labels = c['Config']['Labels']
+                if not show_all and status != 'running':
+                    continue
+                if 'status' in filters and status not in filters['status']:
+                    continue
+                if 'label' in filters and not all(
+                        FakeEngine.label_matches(labels, f)
+                        for f in filters['label']):
+                    continue
+                out.append({'Id': c['Id'], 'Names': [c['Name']],
+                    'Image': c['Config']['Image'], 'ImageID': c['Image'],
+                    'Labels': labels, 'State': status,
+                    'Status': status})
+        req.send_json(200, out)
+
+    @staticmethod
+    def events(req, query, body):
+        """@brief Streams the container events until the engine stops."""
+        engine = req.server.engine
+        filters = json.loads(query.get('filters', '{}'))
+        events = queue.Queue()
+        with engine.lock:
+            # Replay the past events requested with 'since'
+            if query.get('since'):
+                for event in engine.event_log:
+                    if event['time'] >= int(float(query['since'])):
+                        events.put(event)
+            engine.subscribers.append(events)
+        req.send_response(200)
+        req.send_header('Content-Type', 'application/json')
+        req.send_header('Transfer-Encoding', 'chunked')
+        req.end_headers()
+        req.wfile.flush()
+        try:
+            while not engine._stopping.is_set():
+                try:
+                    event = events.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                attributes = event['Actor']['Attributes']
+                if 'type' in filters and event['Type'] not in filters['type']:
+                    continue
+                if 'event' in filters \
+                        and event['Action'] not in filters['event']:
+                    continue
+                if 'container' in filters and event['id'] not in \
+                        filters['container'] and attributes['name'] not in \
+                        filters['container']:
+                    continue
+                if 'label' in filters and not all(
+                        FakeEngine.label_matches(attributes, f)
+                        for f in filters['label']):
+                    continue
+                chunk = json.dumps(event).encode() + b'\n'
+                req.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                req.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            with engine.lock:
+                engine.subscribers.remove(events)
+            req.close_connection = True
+
+    @staticmethod
+    def logs(req, query, body, ref):
+        """
+        @brief Sends the output of a container as a multiplexed stream, and
+               keeps sending it until the container exits with 'follow'.
+        """
+        engine = req.server.engine
+        streams = {s for s, key in ((1, 'stdout'), (2, 'stderr'))
+                   if query.get(key) in ('1', 'true', 'True')}
+        records = queue.Queue()
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            for record in engine.logs.get(container['Id'], []):
+                records.put(record)
+            follow = query.get('follow') in ('1', 'true', 'True') \
+                and container['State']['Running']
+            entry = (container['Id'], records)
+            if follow:
+                engine.log_followers.append(entry)
+            else:
+                records.put(None)
+        req.send_response(200)
+        req.send_header('Content-Type',
+                        'application/vnd.docker.multiplexed-stream')
+        req.send_header('Transfer-Encoding', 'chunked')
+        req.end_headers()
+        req.wfile.flush()
+        try:
+            while not engine._stopping.is_set():
+                try:
+                    record = records.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if record is None:
+                    break
+                stream, data = record
+                if stream not in streams:
+                    continue
+                frame = struct.pack('>BxxxL', stream, len(data)) + data
+                req.wfile.write(b'%x\r\n%s\r\n' % (len(frame), frame))
+                req.wfile.flush()
+            req.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            pass
+        finally:
+            with engine.lock:
+                if entry in engine.log_followers:
+                    engine.log_followers.remove(entry)
+            req.close_connection = True
+
+    def stats_sample(self, container: dict):
+        """
+        @returns a sample of /stats for a container that uses 'cpu' CPUs,
+                 'memory' bytes, and receives (sends) 'rx' ('tx') bytes per
+                 second, see self.usage.
+        """
+        cid = container['Id']
+        usage = self.usage.get(cid, {})
+        ncpu = getattr(self, 'ncpu', 8)
+        elapsed = time.monotonic() - self._stats_epoch.setdefault(cid,
+            time.monotonic())
+        return {
+            'read': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'id': cid, 'name': container['Name'],
+            'cpu_stats': {
+                'cpu_usage': {'total_usage':
+                    int(usage.get('cpu', 0.) * elapsed * 1e9)},
+                'system_cpu_usage': int((1e3 + elapsed) * ncpu * 1e9),
+                'online_cpus': ncpu},
+            'memory_stats': {'usage': usage.get('memory', 0) + 4096,
+                'limit': getattr(self, 'mem_total', 16 * 2 ** 30),
+                'stats': {'inactive_file': 4096}},
+            'networks': {'eth0': {
+                'rx_bytes': int(usage.get('rx', 0) * elapsed),
+                'tx_bytes': int(usage.get('tx', 0) * elapsed)}},
+            'pids_stats': {'current': 1},
+        }
+
+    @staticmethod
+    def stats(req, query, body, ref):
+        """
+        @brief Sends a sample of the resource usage of a container every
+               'stats_interval' seconds while it runs, or a single one
+               without 'stream'.
+        """
+        engine = req.server.engine
+        stream = query.get('stream', 'true') in ('1', 'true', 'True')
+        with engine.lock:
+            container = FakeEngine.container_or_404(req, ref)
+            if container is None:
+                return
+            engine.stats_streams += 1
+            engine.max_stats_streams = max(engine.max_stats_streams,
+                                           engine.stats_streams)
+        req.send_response(200)
+        req.send_header('Content-Type', 'application/json')
+        req.send_header('Transfer-Encoding', 'chunked')
+        req.end_headers()
+        try:
+            while not engine._stopping.is_set():
+                with engine.lock:
+                    running = container['State']['Running']
+                    sample = engine.stats_sample(container)
+                chunk = json.dumps(sample).encode() + b'\n'
+                req.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                req.wfile.flush()
+                if not stream or not running:
+                    break
+                time.sleep(engine.stats_interval)
+            req.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            pass
+        finally:
+            with engine.lock:
+                engine.stats_streams -= 1
+            req.close_connection = True
+
+    @staticmethod
+    def label_matches(labels: dict, label_filter: str):
+        key, sep, value = label_filter.partition('=')
+        return key in labels and (not sep or labels[key] == value)
+
+    @staticmethod
+    def list_images(req, query, body):
+        engine = req.server.engine
+        with engine.lock:
+            req.send_json(200, list(engine.images.values()))
+
+    @staticmethod
+    def inspect_image(req, query, body, name):
+        engine = req.server.engine
+        image = engine.find_image(urllib.parse.unquote(name))
+        if image is None:
+            return req.send_error_json(404, 'No such image: ' + name)
+        req.send_json(200, image)
+
+    @staticmethod
+    def pull_image(req, query, body):
+        engine = req.server.engine
+        name = query['fromImage']
+        if query.get('tag'):
+            name += ':' + query['tag']
+        with engine.lock:
+            engine.pulls.append(name)
+        if engine.pull_delay:
+            time.sleep(engine.pull_delay)
+        if name.split(':')[0].startswith('missing'):
+            return req.send_error_json(404, 'pull access denied for ' + name)
+        with engine.lock:
+            engine.add_image(name)
+        req.send_response(200)
+        req.send_header('Content-Type', 'application/json')
+        req.send_header('Transfer-Encoding', 'chunked')
+        req.end_headers()
+        for msg in ({'status': 'Pulling from ' + name},
+                    {'status': 'Status: Downloaded newer image for ' + name}):
+            chunk = json.dumps(msg).encode() + b'\r\n'
+            req.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        req.wfile.write(b'0\r\n\r\n')
@@ -0,0 +1,108 @@
+"""
+@brief  Fake X11 server that answers the connection setup request.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+
+@details The server replies 'Failed' (i.e. no authorization) to every client,
+         which is enough for dockerx to recognise it as an X server. With
+         'silent=True' it accepts connections but never replies, like a
+         random service listening on an X11 port.
+"""
+
+import os
+import socket
+import struct
+import threading
+
+REASON = b'No protocol specified\n'
+
+
+def failed_reply():
+    """@returns the 'Failed' reply to an X11 connection setup request."""
+    padded = REASON + b'\0' * (-len(REASON) % 4)
+    return struct.pack('<BBHHH', 0, len(REASON), 11, 0, len(padded) // 4) \
+        + padded
+
+
+class FakeXServer:
+    """@brief Fake X11 server listening on a TCP port or a unix socket."""
+
+    def __init__(self, port: int = None, path: str = None,
+            host: str = '127.0.0.1', silent: bool = False, delay: float = 0.):
+        """
+        @param[in]  port    TCP port to listen on (0 picks a free one).
+        @param[in]  path    Path of the unix socket to listen on.
+        @param[in]  silent  Accept connections but never reply.
+        @param[in]  delay   Seconds to wait before replying.
+        """
+        self.silent = silent
+        self.delay = delay
+        self.path = path
+        self.connections = 0
+        self.on_connect = None
+        self._stop = threading.Event()
+        self._clients = []
+        if path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.bind(path)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.sock.bind((host, port or 0))
+            self.port = self.sock.getsockname()[1]
+        self.sock.listen(64)
+        self.sock.settimeout(0.05)
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.connections += 1
+            self._clients.append(conn)
+            if self.on_connect is not None:
+                self.on_connect(conn)
+            threading.Thread(target=self._handle, args=(conn,),
+                             daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            conn.settimeout(5)
+            request = conn.recv(12)
+            if not request or self.silent:
+                return
+            if self.delay:
+                self._stop.wait(self.delay)
+            conn.sendall(failed_reply())
+            # Echo anything else, like an X server answering requests
+            while not self._stop.is_set():
+                data = conn.recv(65536)
+                if not data:
+                    break
+                conn.sendall(data)
+            conn.close()
+        except OSError:
+            pass
+
+    def close(self):
+        self._stop.set()
+        self.sock.close()
+        for conn in self._clients:
+            try:
+                conn.close()
+            except OSError:
+                pass
+        self.thread.join()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,197 @@
+"""
+@brief  Unit tests for the asyncio launcher, run against a fake Docker Engine.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import asyncio
+import os
+import time
+import tempfile
+import threading
+
+# My imports
+import dockerx
+import dockerx.xauth
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestAsyncDockerLauncher(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.engine = FakeEngine(images=['ubuntu:latest']).start()
+        self.environ = unittest.mock.patch.dict(os.environ, {'DISPLAY': ':96'})
+        self.environ.start()
+
+    def tearDown(self):
+        self.environ.stop()
+        self.engine.stop()
+
+    async def test_launch_stop_remove(self):
+        async with dockerx.AsyncDockerLauncher(self.engine.base_url) as dl:
+            cid = await dl.launch_container('ubuntu', command='sleep infinity',
+                env_vars={'A': 'B=C'}, name='foo',
+                volumes={'/data': {'bind': '/mnt', 'mode': 'ro'}})
+            attrs = await dl.inspect(cid)
+            self.assertEqual(attrs['Name'], '/foo')
+            self.assertTrue(attrs['State']['Running'])
+            self.assertEqual(attrs['Config']['Cmd'], ['sleep', 'infinity'])
+            self.assertIn('A=B=C', attrs['Config']['Env'])
+            self.assertIn('QT_X11_NO_MITSHM=1', attrs['Config']['Env'])
+            self.assertEqual(attrs['HostConfig']['Binds'], ['/data:/mnt:ro'])
+            self.assertEqual(dl.launched_containers, [cid])
+
+            await dl.stop(cid)
+            attrs = await dl.inspect(cid)
+            self.assertEqual(attrs['State']['Status'], 'exited')
+            await dl.remove(cid)
+            self.assertEqual(self.engine.containers, {})
+            self.assertEqual(dl.launched_containers, [])
+
+    async def test_missing_image_is_pulled(self):
+        async with dockerx.AsyncDockerLauncher(self.engine.base_url) as dl:
+            await dl.launch_container('alpine:3.18')
+        self.assertEqual(self.engine.pulls, ['alpine:3.18'])
+
+    async def test_other_not_found_errors_are_not_pulled(self):
+        async with dockerx.AsyncDockerLauncher(self.engine.base_url) as dl:
+            with self.assertRaises(dockerx.EngineAPIError) as ctx:
+                await dl.launch_container('ubuntu', network='missing')
+        self.assertEqual(ctx.exception.status, 404)
+        self.assertEqual(self.engine.pulls, [])
+        self.assertEqual(self.engine.count('POST', '/containers/create'), 1)
+
+    async def test_errors(self):
+        async with dockerx.AsyncDockerLauncher(self.engine.base_url) as dl:
+            with self.assertRaises(dockerx.EngineAPIError) as ctx:
+                await dl.launch_container('missing')
+            with self.assertRaises(dockerx.EngineAPIError) as ctx:
+                await dl.stop('nope')
+            self.assertEqual(ctx.exception.status, 404)
+            await dl.launch_container('ubuntu', name='dup')
+            with self.assertRaises(dockerx.EngineAPIError) as ctx:
+                await dl.launch_container('ubuntu', name='dup')
+            self.assertEqual(ctx.exception.status, 409)
+
+    async def test_xauthority_file_is_held(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = dockerx.xauth.XauthFileStore(os.path.join(tmpdir, 'x'))
+            entry = dockerx.xauth.XauthEntry(dockerx.xauth.FAMILY_WILD, b'',
+                b'10', b'MIT-MAGIC-COOKIE-1', b'\x01' * 16)
+            path = store.get('localhost:10', entry)
+            x11 = {'transport': 'tcp', 'volumes': {path: {'bind': path,
+                'mode': 'rw'}}, 'environment': {'DISPLAY': 'localhost:10',
+                'XAUTHORITY': path}}
+
+            async def x11_setup(ifname, use_cache=True):
+                return x11
+
+            with unittest.mock.patch.object(dockerx.DockerLauncher,
+                    'xauth_files', store), \
+                    unittest.mock.patch.object(dockerx.AsyncDockerLauncher,
+                        'x11_setup', x11_setup):
+                async with dockerx.AsyncDockerLauncher(
+                        self.engine.base_url) as dl:
+                    cid = await dl.launch_container('ubuntu')
+                    self.assertEqual(store._refs[path], 1)
+
+                    # A synchronous launcher dropping its last reference
+                    # does not delete the file of the async container
+                    store.get('localhost:10', None)
+                    store.acquire(path)
+                    store.release(path)
+                    self.assertTrue(os.path.exists(path))
+                    await dl.remove(cid, force=True)
+                    self.assertFalse(os.path.exists(path))
+
+                    # A container that does not start releases the file
+                    path = store.get('localhost:10', entry)
+                    x11['volumes'] = {path: {'bind': path, 'mode': 'rw'}}
+                    self.engine.start_error = 'cannot start container'
+                    with self.assertRaises(dockerx.EngineAPIError):
+                        await dl.launch_container('ubuntu')
+                    self.assertEqual(store._refs[path], 0)
+                    self.assertEqual(self.engine.containers, {})
+                    self.assertEqual(dl._xauth_paths, {})
+
+    async def test_concurrency_limit_and_loop_not_blocked(self):
+        self.engine.latency = 0.1
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        async with dockerx.AsyncDockerLauncher(self.engine.base_url,
+                max_concurrency=4) as dl:
+            tic = time.monotonic()
+            ids = await asyncio.gather(*[dl.launch_container('ubuntu')
+                for _ in range(8)])
+            elapsed = time.monotonic() - tic
+        task.cancel()
+
+        # 8 launches x 2 requests, 4 at a time, 0.1 s each
+        self.assertEqual(len(set(ids)), 8)
+        self.assertGreaterEqual(elapsed, 0.4)
+        self.assertLess(elapsed, 1.2)
+        self.assertGreater(len(ticks), 20)
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), 0.1)
+
+    async def test_connections_are_reused(self):
+        async with dockerx.AsyncDockerLauncher(self.engine.base_url) as dl:
+            for _ in range(3):
+                await dl.launch_container('ubuntu')
+            self.assertEqual(len(dl.engine._idle), 1)
+
+    async def test_x11_setup_unix(self):
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                FakeXServer(path=os.path.join(tmpdir, 'X96')), \
+                unittest.mock.patch.object(dockerx.DockerLauncher,
+                    'x11_socket_dir', tmpdir), \
+                unittest.mock.patch('shutil.which', return_value=None), \
+                unittest.mock.patch.object(dockerx.DockerLauncher,
+                    'x11_setup_for', wraps=self.record_thread(
+                        dockerx.DockerLauncher.x11_setup_for)):
+            x11 = await dockerx.AsyncDockerLauncher.x11_setup('docker0',
+                use_cache=False)
+        self.assertEqual(x11['transport'], 'unix')
+        self.assertEqual(x11['environment']['DISPLAY'], ':96')
+
+        # The blocking part of the setup does not run on the event loop
+        self.assertNotEqual(self.threads, [threading.get_ident()])
+        self.assertEqual(len(self.threads), 1)
+
+    def record_thread(self, func):
+        self.threads = []
+
+        def wrapper(*args, **kwargs):
+            self.threads.append(threading.get_ident())
+            return func(*args, **kwargs)
+        return wrapper
+
+    def test_create_body(self):
+        body = dockerx.AsyncDockerLauncher.create_body('ubuntu', 'ls -l',
+            {'environment': {'A': 1}, 'volumes': {}, 'runtime': 'nvidia',
+             'network': 'host'})
+        self.assertEqual(body['Cmd'], ['ls', '-l'])
+        self.assertEqual(body['HostConfig']['Runtime'], 'nvidia')
+        self.assertEqual(body['HostConfig']['NetworkMode'], 'host')
+        with self.assertRaises(ValueError):
+            dockerx.AsyncDockerLauncher.create_body('ubuntu', None,
+                {'bogus': 1})
+
+    def test_split_image_name(self):
+        split = dockerx.AsyncDockerLauncher.split_image_name
+        self.assertEqual(split('ubuntu'), ('ubuntu', 'latest'))
+        self.assertEqual(split('ubuntu:22.04'), ('ubuntu', '22.04'))
+        self.assertEqual(split('localhost:5000/img'),
+                         ('localhost:5000/img', 'latest'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+@brief  Smoke test of the launch-latency benchmark suite.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import os
+import sys
+import json
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'benchmarks'))
+import bench_launch
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_suite_runs_offline(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.json')
+            with open(os.devnull, 'w') as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    status = bench_launch.main(['--iterations', '2',
+                        '--concurrency', '4', '--engine-latency', '0',
+                        '--json', path])
+                finally:
+                    sys.stdout = stdout
+            self.assertEqual(status, 0)
+            with open(path) as f:
+                results = json.load(f)
+        self.assertIn('startup[dockerx.run --help]', results)
+        self.assertIn('launch_container[tcp]', results)
+        self.assertIn('launch_many[unix,n=4]', results)
+        self.assertGreater(results['launch_many[unix,n=4]']['throughput'], 0)
+        self.assertIn('launch_many[unix,n=4,telemetry]', results)
+        self.assertIn('telemetry.record', results)
+
+    def test_compare(self):
+        baseline = {'a': {'median': 1.}, 'b': {'median': 1.}}
+        results = {'a': {'median': 1.4}, 'b': {'median': 1.6},
+                   'c': {'median': 9.}}
+        regressions = bench_launch.compare(results, baseline, 0.5)
+        self.assertEqual([name for name, _, _ in regressions], ['b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+@brief  Unit tests for the cache of the X11 setup.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import tempfile
+import time
+
+# My imports
+import dockerx
+
+
+def fake_setup(ifname, transport='unix', volumes=None):
+    return {'transport': transport, 'environment': {'DISPLAY': ':0'},
+            'volumes': volumes or {}}
+
+
+class TestX11EnvironmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xauth = os.path.join(self.tmpdir.name, '.Xauthority')
+        with open(self.xauth, 'wb'):
+            pass
+        self.environ = unittest.mock.patch.dict(os.environ,
+            {'DISPLAY': ':42', 'XAUTHORITY': self.xauth})
+        self.environ.start()
+        self.cache = dockerx.X11EnvironmentCache(ttl=60)
+
+    def tearDown(self):
+        self.environ.stop()
+        self.tmpdir.cleanup()
+
+    def test_hits_and_misses(self):
+        compute = unittest.mock.Mock(side_effect=fake_setup)
+        for _ in range(3):
+            self.cache.get('docker0', compute)
+        self.assertEqual(compute.call_count, 1)
+        self.assertEqual(self.cache.stats(),
+            {'hits': 2, 'misses': 1, 'size': 1})
+
+    def test_returned_value_is_a_copy(self):
+        self.cache.get('docker0', fake_setup)['environment']['DISPLAY'] = 'x'
+        value = self.cache.get('docker0', fake_setup)
+        self.assertEqual(value['environment']['DISPLAY'], ':0')
+
+    def test_key_changes(self):
+        compute = unittest.mock.Mock(side_effect=fake_setup)
+        self.cache.get('docker0', compute)
+        self.cache.get('eth0', compute)
+        os.environ['DISPLAY'] = ':43'
+        self.cache.get('docker0', compute)
+        mtime = os.stat(self.xauth).st_mtime_ns + 10 ** 9
+        os.utime(self.xauth, ns=(mtime, mtime))
+        self.cache.get('docker0', compute)
+        self.assertEqual(compute.call_count, 4)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_ttl(self):
+        self.cache.ttl = 0.05
+        compute = unittest.mock.Mock(side_effect=fake_setup)
+        self.cache.get('docker0', compute)
+        time.sleep(0.1)
+        self.cache.get('docker0', compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_invalidate(self):
+        compute = unittest.mock.Mock(side_effect=fake_setup)
+        self.cache.get('docker0', compute)
+        self.cache.invalidate(':1')
+        self.cache.get('docker0', compute)
+        self.assertEqual(compute.call_count, 1)
+        self.cache.invalidate(':42')
+        self.cache.get('docker0', compute)
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_missing_server_is_not_cached(self):
+        compute = unittest.mock.Mock(
+            side_effect=lambda i: fake_setup(i, transport=None))
+        self.cache.get('docker0', compute)
+        self.cache.get('docker0', compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_deleted_volume_invalidates_entry(self):
+        path = os.path.join(self.tmpdir.name, '.docker.xauth')
+        with open(path, 'wb'):
+            pass
+        volumes = {path: {'bind': path, 'mode': 'rw'}}
+        compute = unittest.mock.Mock(
+            side_effect=lambda i: fake_setup(i, volumes=volumes))
+        self.cache.get('docker0', compute)
+        os.remove(path)
+        self.cache.get('docker0', compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_launcher_skips_probing(self):
+        dl = dockerx.DockerLauncher
+        with unittest.mock.patch.object(dl, 'x11_cache', self.cache), \
+                unittest.mock.patch.object(dl, 'get_x11_server_socket_type',
+                    return_value='unix') as probe, \
+                unittest.mock.patch.object(dl, 'xhost_available',
+                    return_value=False), \
+                unittest.mock.patch.object(dockerx.X11EnvironmentCache,
+                    '_still_valid', return_value=True):
+            for _ in range(3):
+                options = dl.prepare_environment('docker0', False, {}, {},
+                                                 None)
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(options['environment']['DISPLAY'], ':42')
+        self.assertEqual(self.cache.hits, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+@brief  Unit tests for the registry of shared Docker clients.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import concurrent.futures
+import os
+import tempfile
+
+# My imports
+import dockerx
+import dockerx.clients as clients
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.registry = clients.ClientRegistry(max_pool_size=16)
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42',
+                'DOCKER_HOST': self.engine.base_url}),
+            unittest.mock.patch.object(clients, 'registry', self.registry),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        self.registry.close()
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def test_one_client_per_configuration(self):
+        client = clients.get_client()
+        self.assertIs(clients.get_client(), client)
+        self.assertEqual(client.version()['ApiVersion'],
+                         FakeEngine.api_version)
+        self.assertIsNot(clients.get_client(max_pool_size=2), client)
+        other = {'DOCKER_HOST': 'unix:///nonexistent.sock'}
+        self.assertIsNot(clients.get_client(environment=other,
+            version=FakeEngine.api_version), client)
+        self.assertEqual(self.registry.created, 3)
+
+        self.registry.discard(client)
+        self.assertIsNot(clients.get_client(), client)
+
+    def test_launchers_share_the_client(self):
+        first, second = dockerx.DockerLauncher(), dockerx.DockerLauncher()
+        self.assertIs(first.client, second.client)
+        self.assertEqual(len(self.registry), 1)
+
+        injected = clients.ClientRegistry().get(
+            version=FakeEngine.api_version)
+        self.assertIs(dockerx.DockerLauncher(client=injected).client,
+                      injected)
+        injected.close()
+
+    def test_concurrent_launches_reuse_the_pool(self):
+        self.engine.latency = 0.05
+        launchers = [dockerx.DockerLauncher() for _ in range(4)]
+        with self.assertNoLogs('urllib3', 'WARNING'):
+            with concurrent.futures.ThreadPoolExecutor(16) as ex:
+                containers = list(ex.map(
+                    lambda i: launchers[i % 4].launch_container('ubuntu'),
+                    range(16)))
+        self.assertEqual(len(self.engine.containers), 16)
+        self.assertEqual(len(set(c.id for c in containers)), 16)
+        self.assertEqual(self.registry.created, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
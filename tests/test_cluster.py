@@ -0,0 +1,201 @@
+"""
+@brief  Unit tests for the placement of containers across several engines.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import collections
+import os
+import tempfile
+
+# My imports
+import dockerx
+import dockerx.cluster as cluster
+import dockerx.clients as clients
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestClusterLauncher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engines = []
+        for name, ncpu, images in (('small', 2, ['ubuntu']),
+                                   ('big', 32, ['ubuntu']),
+                                   ('gpu', 8, ['ubuntu', 'gui-app'])):
+            engine = FakeEngine(images=images)
+            engine.name, engine.ncpu = name, ncpu
+            self.engines.append(engine.start())
+        self.registry = clients.ClientRegistry()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        self.registry.close()
+        for patch in self.patches:
+            patch.stop()
+        for engine in self.engines:
+            engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def cluster(self, policy='least-containers', **kwargs):
+        return dockerx.ClusterLauncher([{'base_url': e.base_url,
+            'name': e.name} for e in self.engines], policy,
+            registry=self.registry, **kwargs)
+
+    def placements(self, results):
+        return collections.Counter(res.engine for res in results)
+
+    def test_least_containers(self):
+        for _ in range(3):
+            self.engines[0].containers[str(_)] = {'State': {
+                'Status': 'running'}}
+        dl = self.cluster(ttl=60)
+        results = [dl.launch_container('ubuntu', return_result=True)
+                   for _ in range(7)]
+        self.assertTrue(all(res.ok for res in results))
+        self.assertEqual(self.placements(results),
+                         {'small': 1, 'big': 3, 'gpu': 3})
+
+        # The load is read once per engine while it is cached
+        for engine in self.engines:
+            self.assertEqual(engine.count('GET', '/info'), 1)
+        dl.invalidate()
+        dl.launch_container('ubuntu')
+        for engine in self.engines:
+            self.assertEqual(engine.count('GET', '/info'), 2)
+        self.assertEqual(dl.stats()['big']['running'], 3)
+
+    def test_headroom(self):
+        dl = self.cluster(cluster.Headroom(cpus=2))
+        results = dl.launch_many([{'image_name': 'ubuntu'}] * 8)
+        self.assertEqual(self.placements(results), {'big': 7, 'gpu': 1})
+
+    def test_image_locality(self):
+        dl = self.cluster('image-locality')
+        res = dl.launch_container('gui-app', return_result=True)
+        self.assertEqual(res.engine, 'gpu')
+        self.assertEqual(len(self.engines[2].pulls), 0)
+        res = dl.launch_container('ubuntu', return_result=True)
+        self.assertEqual(res.engine, 'small')
+
+    def test_launch_many(self):
+        dl = self.cluster()
+        specs = [{'image_name': 'ubuntu', 'name': 'c' + str(i)}
+                 for i in range(6)]
+        specs.append({'image_name': 'ubuntu', 'engine': 'gpu'})
+        specs.append({'command': 'xclock'})
+        results = dl.launch_many(specs)
+        self.assertEqual([res.spec.get('name') for res in results[:6]],
+                         ['c' + str(i) for i in range(6)])
+        self.assertTrue(all(res.ok for res in results[:7]))
+        self.assertEqual(results[6].engine, 'gpu')
+        self.assertIsInstance(results[7].error, TypeError)
+        self.assertEqual(self.placements(results[:6]),
+                         {'small': 2, 'big': 2, 'gpu': 2})
+        for res in results[:7]:
+            engine = next(e for e in self.engines if e.name == res.engine)
+            container = engine.find_container(res.container.id)
+            self.assertIn('DISPLAY=:42', container['Config']['Env'])
+
+        # The bulk operations return the containers of all the engines
+        ids = {res.container.id for res in results[:7]}
+        stopped = dl.stop_all(timeout=1)
+        self.assertEqual(set(stopped), ids)
+        self.assertTrue(all(e is None for e in stopped.values()))
+        self.assertEqual(set(dl.remove_all()), ids)
+        self.assertEqual(dl.remove_all(), {})
+
+    def test_refresh_without_lock(self):
+        dl = self.cluster()
+        locked = []
+        refresh = cluster.EngineNode.refresh
+
+        def check(node):
+            locked.append(dl._lock.locked())
+            refresh(node)
+
+        with unittest.mock.patch.object(cluster.EngineNode, 'refresh',
+                                        check):
+            dl.launch_container('ubuntu')
+        self.assertEqual(locked, [False] * 3)
+
+    def test_unreachable_engine(self):
+        dead = os.path.join(self.tmpdir.name, 'dead.sock')
+        dl = dockerx.ClusterLauncher(['unix://' + dead,
+            self.engines[1].base_url], registry=self.registry)
+        res = dl.launch_container('ubuntu', return_result=True)
+        self.assertEqual(res.engine, self.engines[1].base_url)
+        self.assertFalse(dl.stats()['unix://' + dead]['healthy'])
+
+        dl = dockerx.ClusterLauncher(['unix://' + dead],
+                                     registry=self.registry)
+        with self.assertRaises(RuntimeError):
+            dl.launch_container('ubuntu')
+
+    def test_remote_cpu_allocator(self):
+        import docker
+        engine = self.engines[0]
+        dl = dockerx.DockerLauncher()
+        node = cluster.EngineNode('remote', 'tcp://10.0.0.5:2375', dl)
+        node.connected = True
+        dl.client = docker.DockerClient(base_url=engine.base_url,
+                                        version=FakeEngine.api_version)
+
+        # The CPUs are those of the /info of the remote engine
+        res = dl.launch_container('ubuntu', cpus=2, return_result=True)
+        self.assertEqual(res.allocation.cpuset_cpus, '0-1')
+        self.assertEqual(engine.count('GET', '/info'), 1)
+        with self.assertRaises(RuntimeError):
+            dl.launch_container('ubuntu', cpus=1)
+        self.assertEqual(dockerx.DockerLauncher.cpu_allocator.allocations(),
+                         {})
+        dl.remove_all()
+        self.assertEqual(dl.cpu_allocator.free(), [0, 1])
+
+
+
+class TestRemoteX11(unittest.TestCase):
+
+    def test_remote_display(self):
+        with unittest.mock.patch.dict(os.environ, {'DISPLAY': ':10.0'}):
+            x11 = cluster.remote_x11_setup('127.0.0.1')
+        self.assertEqual(x11['environment']['DISPLAY'], '127.0.0.1:10')
+        self.assertEqual(x11['volumes'], {})
+        x11 = cluster.remote_x11_setup('10.0.0.5', 'laptop:0')
+        self.assertEqual(x11['environment']['DISPLAY'], 'laptop:0')
+
+    def test_per_engine_setup(self):
+        dl = dockerx.ClusterLauncher(['unix:///var/run/docker.sock',
+            {'base_url': 'tcp://127.0.0.1:2375', 'display': 'laptop:0'}])
+        local, remote = dl.nodes
+        self.assertTrue(local.local)
+        self.assertFalse(remote.local)
+        self.assertEqual(remote.launcher.setup_x11('docker0')
+                         ['environment']['DISPLAY'], 'laptop:0')
+        self.assertIs(local.launcher.cpu_allocator,
+                      dockerx.DockerLauncher.cpu_allocator)
+        self.assertIsNot(remote.launcher.cpu_allocator,
+                         dockerx.DockerLauncher.cpu_allocator)
+        with self.assertRaises(ValueError):
+            dockerx.ClusterLauncher([], 'least-containers')
+        with self.assertRaises(ValueError):
+            dockerx.ClusterLauncher(['unix:///a'], 'random')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+"""
+@brief  Unit tests for the resident dockerx daemon and its client.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import io
+import os
+import time
+import tempfile
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.daemon as daemon
+import dockerx.run as run
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xservers = [FakeXServer(path=os.path.join(self.tmpdir.name, x))
+                         for x in ('X42', 'X43')]
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.socket_path = os.path.join(self.tmpdir.name, 'run', 'd.sock')
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42',
+                daemon.SOCKET_VARIABLE: self.socket_path}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = dockerx.DockerLauncher(tracer=dockerx.Tracer())
+        self.dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                             version=FakeEngine.api_version)
+        self.daemon = daemon.Daemon(launcher=self.dl).start()
+
+    def tearDown(self):
+        self.daemon.close()
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        for xserver in self.xservers:
+            xserver.close()
+        self.tmpdir.cleanup()
+
+    def env(self, container_id):
+        return self.engine.find_container(container_id)['Config']['Env']
+
+    def test_launch_per_display(self):
+        self.assertEqual(daemon.default_socket_path(), self.socket_path)
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+        with daemon.connect() as client:
+            self.assertEqual(client.ping()['pid'], os.getpid())
+            first = client.launch(image_name='ubuntu', env_vars={'A': '1'})
+            with unittest.mock.patch.dict(os.environ, {'DISPLAY': ':43'}):
+                second = client.launch(image_name='ubuntu')
+            third = client.launch(image_name='ubuntu', name='third')
+            stats = client.stats()
+
+        self.assertTrue(first['ok'])
+        self.assertIn('A=1', self.env(first['container_id']))
+        self.assertIn('DISPLAY=:42', self.env(first['container_id']))
+        self.assertIn('DISPLAY=:43', self.env(second['container_id']))
+        self.assertEqual(third['name'], 'third')
+        self.assertGreater(third['elapsed'], 0)
+
+        # The X server of each display was detected once, and the daemon
+        # kept the containers in the registry of its launcher
+        self.assertEqual(stats['x11_cache']['misses'], 2)
+        self.assertEqual(stats['x11_cache']['hits'], 1)
+        self.assertEqual(stats['containers'], 3)
+        self.assertEqual(stats['requests'], 5)
+
+    def test_errors(self):
+        with daemon.connect() as client:
+            with self.assertRaises(daemon.DaemonError) as cm:
+                client.launch(image_name='missing', pull=False)
+            self.assertEqual(cm.exception.type_name, 'ImageNotFound')
+            with self.assertRaises(daemon.DaemonError):
+                client.request('format_disk')
+            with self.assertRaises(daemon.DaemonError) as cm:
+                client.launch(image='ubuntu')
+            self.assertEqual(cm.exception.type_name, 'TypeError')
+
+            # The connection is still usable after the errors
+            results = client.launch_many([{'image_name': 'ubuntu'},
+                                          {'image_name': 'missing',
+                                           'pull': False}])
+            self.assertEqual([r['ok'] for r in results], [True, False])
+            self.assertEqual(client.stats()['errors'], 3)
+
+    def test_images_added_after_start(self):
+        self.assertTrue(self.dl.images.complete)  # Warmed up by start()
+        self.engine.add_image('built:dev')
+        image_id = self.engine.find_image('built:dev')['Id']
+        with daemon.connect() as client:
+            first = client.launch(image_name='built:dev')
+            second = client.launch(image_name=image_id, pull=False)
+        self.assertTrue(first['ok'] and second['ok'])
+        self.assertEqual(self.engine.pulls, [])
+
+    def test_cli(self):
+        stdout = io.StringIO()
+        with unittest.mock.patch('sys.argv', ['dockerx.run', '--image',
+                                              'ubuntu']), \
+                unittest.mock.patch('sys.stdout', stdout):
+            run.main()
+        record, = self.dl.registry.records()
+        self.assertIn('docker kill ' + record.id[:12], stdout.getvalue())
+
+        # Without a daemon, dockerx.run launches the container by itself
+        self.daemon.close()
+        self.assertIsNone(daemon.connect())
+        with unittest.mock.patch('sys.argv', ['dockerx.run', '--image',
+                                              'ubuntu']), \
+                unittest.mock.patch('sys.stdout', io.StringIO()), \
+                unittest.mock.patch.object(dockerx.DockerLauncher, 'client',
+                                           self.dl.client):
+            run.main()
+        self.assertEqual(len(self.dl.registry), 1)
+        self.assertEqual(self.engine.count('POST', '/containers/create'), 2)
+
+    def test_other_engine(self):
+        other = {'DOCKER_HOST': 'tcp://10.0.0.5:2375'}
+        with daemon.connect() as client, \
+                unittest.mock.patch.dict(os.environ, other):
+            self.assertFalse(client.same_engine())
+            with self.assertRaises(daemon.DaemonError):
+                client.launch(image_name='ubuntu')
+        self.assertEqual(len(self.dl.registry), 0)
+
+        # dockerx.run launches by itself on the engine of the shell
+        with unittest.mock.patch('sys.argv', ['dockerx.run', '--image',
+                                              'ubuntu']), \
+                unittest.mock.patch('sys.stdout', io.StringIO()), \
+                unittest.mock.patch.dict(os.environ, other), \
+                unittest.mock.patch.object(dockerx.DockerLauncher, 'client',
+                                           self.dl.client):
+            run.main()
+        self.assertEqual(len(self.dl.registry), 0)
+        self.assertEqual(self.engine.count('POST', '/containers/create'), 1)
+
+    def test_single_instance_and_shutdown(self):
+        with self.assertRaises(RuntimeError):
+            daemon.Daemon(self.socket_path, self.dl).start(warm=False)
+        with daemon.connect() as client:
+            client.shutdown()
+        deadline = time.monotonic() + 5
+        while os.path.exists(self.socket_path) \
+                and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNone(daemon.connect())
+
+        # A socket left behind by a daemon that crashed is replaced
+        self.daemon = daemon.Daemon(self.socket_path, self.dl)
+        open(self.socket_path, 'w').close()
+        self.daemon.start(warm=False)
+        with daemon.connect() as client:
+            self.assertIn('uptime', client.ping())
+
+
+if __name__ == '__main__':
+    unittest.main()
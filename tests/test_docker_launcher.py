@@ -10,9 +10,11 @@ import socket
 import pathlib
 import subprocess
 import time
+import tempfile
 
 # My imports
 import dockerx
+from fake_x11 import FakeXServer
 
 
 def is_port_in_use(host, port):
@@ -82,7 +84,7 @@ class TestDockerLauncher(unittest.TestCase):
         exit_code = process.wait()
 
     def test_tcp_socket_detection(self, host='127.0.0.1', base_port=6000,
-                                  offset=50, delay=1):
+                                  offset=50):
         # Find a port that is not in use
         port = base_port + offset
         while is_port_in_use(host, port): 
@@ -92,17 +94,17 @@ class TestDockerLauncher(unittest.TestCase):
         # Set the DISPLAY pointing to the unused port
         os.environ['DISPLAY'] = ':' + str(offset)
         
-        # Run an X11 dummy TCP server
-        process = subprocess.Popen(['nc', '-l', host, str(port)], 
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        time.sleep(delay)
-
-        # Check that we are able to detect dummy X11 TCP server
-        socket_type = dockerx.DockerLauncher.get_x11_server_socket_type()
-        self.assertEqual(socket_type, 'tcp')
-
-        # Wait for netcat to finish
-        exit_code = process.wait()
+        # Run an X11 dummy TCP server that answers the connection setup
+        with FakeXServer(port=port, host=host):
+            # Check that we are able to detect dummy X11 TCP server
+            socket_type = dockerx.DockerLauncher.get_x11_server_socket_type()
+            self.assertEqual(socket_type, 'tcp')
+
+        # A server that does not speak X11 is not an X server
+        with FakeXServer(port=port, host=host, silent=True):
+            socket_type = dockerx.DockerLauncher.get_x11_server_socket_type(
+                timeout=0.5)
+            self.assertFalse(socket_type)
 
     def test_unix_socket_detection(self):
         host = ''
@@ -110,9 +112,12 @@ class TestDockerLauncher(unittest.TestCase):
         os.environ['DISPLAY'] = host + ':' + str(offset)
 
         # Create dummy unix socket
-        pathlib.Path('/tmp/.X11-unix/X' + str(offset)).touch()
-        socket_type = dockerx.DockerLauncher.get_x11_server_socket_type()
-        self.assertEqual(socket_type, 'unix')
+        with tempfile.TemporaryDirectory() as unix_socket_dir:
+            path = os.path.join(unix_socket_dir, 'X' + str(offset))
+            with FakeXServer(path=path):
+                socket_type = dockerx.DockerLauncher.get_x11_server_socket_type(
+                    unix_socket_dir)
+                self.assertEqual(socket_type, 'unix')
 
     def test_negative_socket_deteection(self):
         os.environ['DISPLAY'] = ':96'
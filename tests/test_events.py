@@ -0,0 +1,119 @@
+"""
+@brief  Unit tests for the tracking of containers with the events stream.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import asyncio
+import os
+import tempfile
+import time
+
+import docker
+
+# My imports
+import dockerx
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestEventMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = self.launcher('alice@lab')
+        self.monitor = dockerx.EventMonitor(self.dl, reconnect_delay=0.05)
+        self.monitor.start()
+
+    def tearDown(self):
+        self.monitor.close()
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def launcher(self, owner):
+        dl = dockerx.DockerLauncher(owner=owner)
+        dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                        version=FakeEngine.api_version)
+        return dl
+
+    def test_registry_follows_the_events(self):
+        container = self.dl.launch_container('ubuntu', name='gui')
+        self.monitor.wait_for(container, 'start', timeout=5)
+
+        self.engine.set_state(self.engine.find_container(container.id),
+                              'exited', 1)
+        event = self.monitor.wait_for('gui', 'die', timeout=5)
+        self.assertEqual(event['Actor']['Attributes']['exitCode'], '1')
+        self.assertEqual(self.dl.registry.get('gui').status, 'exited')
+
+        container.remove()
+        self.monitor.wait_for(container, 'destroy', timeout=5)
+        self.assertNotIn(container.id, self.dl.registry)
+
+    def test_callbacks_and_oom(self):
+        ooms = []
+        self.monitor.on('oom', ooms.append)
+        container = self.dl.launch_container('ubuntu')
+        self.engine.oom(container.id)
+        event = self.monitor.wait_for(container, ('oom', 'die'), timeout=5)
+        self.assertEqual(event['Action'], 'oom')
+        self.monitor.wait_for(container, 'die', timeout=5)
+        self.assertEqual([e['id'] for e in ooms], [container.id])
+
+    def test_only_own_containers(self):
+        actions = []
+        self.monitor.on(None, lambda e: actions.append(e['Action']))
+        other = self.launcher('bob@lab').launch_container('ubuntu')
+        mine = self.dl.launch_container('ubuntu')
+        self.monitor.wait_for(mine, 'start', timeout=5)
+        with self.assertRaises(TimeoutError):
+            self.monitor.wait_for(other, 'start', timeout=0.2)
+        self.assertEqual(actions, ['create', 'start'])
+
+    def test_wait_for_async(self):
+        container = self.dl.launch_container('ubuntu')
+
+        async def main():
+            waiting = asyncio.ensure_future(
+                self.monitor.wait_for_async(container, 'pause', timeout=5))
+            await asyncio.sleep(0.05)
+            container.pause()
+            return await waiting
+
+        event = asyncio.run(main())
+        self.assertEqual(event['Action'], 'pause')
+        self.assertEqual(self.dl.registry.get(container.id).status, 'paused')
+
+    def test_reconnects_without_losing_events(self):
+        container = self.dl.launch_container('ubuntu')
+        self.monitor.wait_for(container, 'start', timeout=5)
+        received = self.monitor.received
+        self.monitor._stream.close()
+        self.engine.set_state(self.engine.find_container(container.id),
+                              'exited')
+        self.monitor.wait_for(container, 'die', timeout=5)
+        time.sleep(0.1)
+        # The replayed events are not dispatched twice
+        self.assertEqual(self.monitor.received, received + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
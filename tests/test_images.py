@@ -0,0 +1,148 @@
+"""
+@brief  Unit tests for the local image index and the parallel pre-pull.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import concurrent.futures
+import os
+import tempfile
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.images as images
+import dockerx.run
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestImageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = dockerx.DockerLauncher()
+        self.dl.client = docker.DockerClient(base_url=self.engine.base_url,
+            version=FakeEngine.api_version, max_pool_size=8)
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def test_normalise(self):
+        self.assertEqual(images.normalise('ubuntu'), 'ubuntu:latest')
+        self.assertEqual(images.normalise('docker.io/library/ubuntu:20.04'),
+                         'ubuntu:20.04')
+        self.assertEqual(images.normalise('localhost:5000/app'),
+                         'localhost:5000/app:latest')
+        self.assertEqual(images.normalise('ubuntu@sha256:ab'), 'ubuntu@sha256:ab')
+
+    def test_refresh(self):
+        index = self.dl.images
+        self.assertFalse(index.missing('alpine'))
+        index.refresh()
+        self.assertTrue(index.present('ubuntu'))
+        self.assertTrue(index.present('docker.io/library/ubuntu:latest'))
+        self.assertTrue(index.missing('alpine'))
+        self.assertEqual(index.get('ubuntu'),
+                         self.engine.find_image('ubuntu')['Id'])
+
+    def test_prefetch_deduplicates_pulls(self):
+        self.engine.pull_delay = 0.2
+        result = self.dl.prefetch(['alpine', 'ubuntu', 'alpine', 'debian',
+                                   'missing'])
+        self.assertEqual(sorted(self.engine.pulls),
+                         ['alpine:latest', 'debian:latest', 'missing:latest'])
+        self.assertEqual(result['alpine'],
+                         self.engine.find_image('alpine')['Id'])
+        self.assertIsInstance(result['missing'], docker.errors.NotFound)
+        self.assertFalse(self.dl.images.present('missing'))
+
+    def test_concurrent_launches_share_the_pull(self):
+        self.engine.pull_delay = 0.2
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as ex:
+            futures = [ex.submit(self.dl.launch_container, 'alpine')
+                       for _ in range(4)]
+            containers = [f.result() for f in futures]
+        self.assertEqual(len(containers), 4)
+        self.assertEqual(self.engine.pulls, ['alpine:latest'])
+
+    def test_launch_without_pull(self):
+        self.dl.images.refresh()
+        with self.assertRaises(docker.errors.ImageNotFound):
+            self.dl.launch_container('alpine', pull=False)
+        self.assertEqual(self.engine.count('POST', '/containers/create'), 0)
+        self.assertEqual(self.engine.pulls, [])
+
+        # Present images launch without any existence check
+        inspections = self.engine.count('GET', '/images/.+/json')
+        self.dl.launch_container('ubuntu', pull=False)
+        self.assertEqual(self.engine.count('GET', '/images/.+/json'),
+                         inspections)
+
+    def test_image_added_after_refresh(self):
+        self.dl.images.refresh()
+        self.engine.add_image('missinglocal:dev')  # e.g. 'docker build'
+        self.dl.launch_container('missinglocal:dev')
+        self.engine.add_image('otherlocal:dev')
+        self.dl.launch_container('otherlocal:dev', pull=False)
+        self.assertEqual(self.engine.pulls, [])
+        self.assertEqual(self.engine.count('POST', '/containers/create'), 2)
+        self.assertTrue(self.dl.images.present('otherlocal:dev'))
+        self.assertEqual(self.dl.prefetch(['otherlocal:dev']),
+                         {'otherlocal:dev':
+                          self.engine.find_image('otherlocal:dev')['Id']})
+
+    def test_launch_by_id(self):
+        self.dl.images.refresh()
+        image_id = self.engine.find_image('ubuntu')['Id']
+        container = self.dl.launch_container(image_id, pull=False)
+        self.assertEqual(self.engine.find_container(container.id)
+                         ['Image'], image_id)
+        self.dl.launch_container(image_id[7:19], pull=False)
+        self.assertEqual(self.engine.pulls, [])
+
+    def test_ensure(self):
+        with self.assertRaises(docker.errors.ImageNotFound):
+            self.dl.images.ensure('alpine', pull=False)
+        self.assertEqual(self.dl.images.ensure('alpine'),
+                         self.engine.find_image('alpine')['Id'])
+
+    def test_cli_prefetch(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as f:
+            f.write('# Images of the lab\nalpine\n\ndebian\n')
+            f.flush()
+            argv = ['dockerx.run', '--prefetch', 'ubuntu', '--prefetch-file',
+                    f.name]
+            with unittest.mock.patch('sys.argv', argv), \
+                    unittest.mock.patch.object(dockerx.DockerLauncher,
+                        'client', self.dl.client), \
+                    unittest.mock.patch('sys.stdout'), \
+                    self.assertRaises(SystemExit) as cm:
+                dockerx.run.main()
+        self.assertEqual(cm.exception.code, 0)
+        self.assertEqual(sorted(self.engine.pulls),
+                         ['alpine:latest', 'debian:latest'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+@brief  Unit tests for the concurrent launch of batches of containers.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import threading
+import time
+
+# My imports
+import dockerx
+
+
+class FakeContainer:
+    def __init__(self, image, command, options):
+        self.id = '%064x' % id(self)
+        self.image = image
+        self.command = command
+        self.options = options
+        self.attrs = {'Image': 'sha256:' + image}
+
+    def start(self):
+        pass
+
+
+class FakeContainerCollection:
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def create(self, image, detach=True, command=None, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        if image == 'missing':
+            raise RuntimeError('No such image: ' + image)
+        return FakeContainer(image, command, kwargs)
+
+
+class FakeClient:
+    def __init__(self):
+        self.containers = FakeContainerCollection()
+
+
+class TestLaunchMany(unittest.TestCase):
+
+    def setUp(self):
+        # No X server listening on this display
+        os.environ['DISPLAY'] = ':96'
+        self.dl = dockerx.DockerLauncher()
+        self.dl.client = FakeClient()
+
+    def test_containers_are_launched_concurrently(self):
+        specs = [{'image_name': 'ubuntu', 'command': 'sleep infinity'}
+            for _ in range(4)]
+        tic = time.time()
+        results = self.dl.launch_many(specs, max_workers=4)
+        elapsed = time.time() - tic
+
+        self.assertTrue(all(res.ok for res in results))
+        self.assertEqual(self.dl.client.containers.max_running, 4)
+        self.assertLess(elapsed, 4 * self.dl.client.containers.delay)
+        self.assertEqual(len(self.dl.launched_containers), 4)
+
+    def test_max_workers_is_respected(self):
+        specs = [{'image_name': 'ubuntu'} for _ in range(6)]
+        self.dl.launch_many(specs, max_workers=2)
+        self.assertEqual(self.dl.client.containers.max_running, 2)
+
+    def test_x11_environment_is_detected_once(self):
+        specs = [{'image_name': 'ubuntu', 'ifname': None} for _ in range(5)]
+        dl = dockerx.DockerLauncher
+        with unittest.mock.patch.object(dl, 'get_x11_server_socket_type',
+                wraps=dl.get_x11_server_socket_type) as probe:
+            results = self.dl.launch_many(specs)
+        self.assertEqual(probe.call_count, 1)
+        self.assertTrue(all(res.ok for res in results))
+
+    def test_errors_do_not_abort_the_batch(self):
+        specs = [
+            {'image_name': 'ubuntu', 'env_vars': {'A': '1'}},
+            {'image_name': 'missing'},
+            {'command': 'no image'},
+            {'image_name': 'ubuntu', 'bogus': True},
+            {'image_name': 'ubuntu', 'name': 'second'},
+        ]
+        results = self.dl.launch_many(specs)
+        self.assertEqual([res.ok for res in results],
+            [True, False, False, False, True])
+        self.assertIsInstance(results[1].error, RuntimeError)
+        self.assertIsInstance(results[2].error, TypeError)
+        self.assertIsInstance(results[3].error, TypeError)
+        self.assertEqual(results[0].container.options['environment']['A'], '1')
+        self.assertEqual(results[4].container.options['name'], 'second')
+        self.assertEqual(len(self.dl.launched_containers), 2)
+
+    def test_specs_do_not_share_options(self):
+        specs = [{'image_name': 'ubuntu', 'env_vars': {'A': '1'}},
+                 {'image_name': 'ubuntu'}]
+        results = self.dl.launch_many(specs)
+        self.assertNotIn('A', results[1].container.options['environment'])
+
+
+if __name__ == '__main__':
+    unittest.main()
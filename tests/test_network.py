@@ -0,0 +1,142 @@
+"""
+@brief  Unit tests for the snapshot of the network interfaces of the host.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import socket
+import struct
+import tempfile
+
+# My imports
+import dockerx
+import dockerx.network as network
+
+
+def rtattr(rta_type, payload):
+    data = struct.pack('=HH', 4 + len(payload), rta_type) + payload
+    return data + b'\0' * (-len(data) % 4)
+
+
+def newaddr(family, index, address, scope=0, peer=None):
+    raw = socket.inet_pton(family, address)
+    body = struct.pack('=BBBBI', family, 24, 0, scope, index) \
+        + rtattr(network.IFA_ADDRESS, socket.inet_pton(family, peer)
+                 if peer else raw)
+    if peer:
+        body += rtattr(network.IFA_LOCAL, raw)
+    body += rtattr(3, b'eth0\0')  # IFA_LABEL, ignored
+    return struct.pack('=IHHII', 16 + len(body), network.RTM_NEWADDR, 2, 1,
+                       0) + body
+
+
+def done():
+    return struct.pack('=IHHIIi', 20, network.NLMSG_DONE, 2, 1, 0, 0)
+
+
+class TestParsers(unittest.TestCase):
+
+    def test_netlink_messages(self):
+        data = newaddr(socket.AF_INET, 2, '172.17.0.1') \
+            + newaddr(socket.AF_INET, 3, '10.8.0.5', peer='10.8.0.1') \
+            + newaddr(socket.AF_INET6, 2, 'fe80::42:acff:fe11:1', scope=253)
+        addresses, finished = network.parse_addr_messages(data)
+        self.assertFalse(finished)
+        self.assertEqual(addresses, [
+            (2, socket.AF_INET, '172.17.0.1', 0),
+            (3, socket.AF_INET, '10.8.0.5', 0),
+            (2, socket.AF_INET6, 'fe80::42:acff:fe11:1', 253)])
+        self.assertEqual(network.parse_addr_messages(done()), ([], True))
+
+    def test_netlink_error(self):
+        error = struct.pack('=IHHIIi', 20, network.NLMSG_ERROR, 0, 1, 0, -1)
+        with self.assertRaises(OSError):
+            network.parse_addr_messages(error)
+
+    def test_proc_inet6(self):
+        with tempfile.NamedTemporaryFile('w') as f:
+            f.write('00000000000000000000000000000001 01 80 10 80 lo\n'
+                    'fe800000000000000042acfffe110001 04 40 20 80 docker0\n')
+            f.flush()
+            self.assertEqual(network.read_proc_inet6(f.name), [
+                (1, socket.AF_INET6, '::1', 0),
+                (4, socket.AF_INET6, 'fe80::42:acff:fe11:1', 253)])
+
+
+class TestHostNetwork(unittest.TestCase):
+
+    def setUp(self):
+        self.net = network.HostNetwork(ttl=60, watch=False)
+
+    def test_loopback(self):
+        lo = self.net.get('lo')
+        self.assertEqual(lo.ipv4[0], '127.0.0.1')
+        self.assertEqual(self.net.address('lo'), '127.0.0.1')
+        self.assertTrue(self.net.exists('lo'))
+        self.assertFalse(self.net.exists('nonexistent0'))
+        self.assertIsNone(self.net.address('nonexistent0'))
+
+    def test_fallback_agrees_with_netlink(self):
+        netlink = self.net.refresh()
+        with unittest.mock.patch.object(network, 'dump_addresses_netlink',
+                side_effect=OSError):
+            fallback = self.net.refresh()
+        self.assertFalse(self.net.netlink)
+        self.assertEqual(sorted(netlink), sorted(fallback))
+        for name, iface in netlink.items():
+            self.assertEqual(iface.ipv4[:1], fallback[name].ipv4[:1])
+            self.assertEqual(sorted(iface.ipv6), sorted(fallback[name].ipv6))
+
+    def test_cached_until_ttl_or_invalidation(self):
+        self.net.snapshot()
+        for _ in range(10):
+            self.net.address('lo')
+        self.assertEqual(self.net.refreshes, 1)
+        self.net.invalidate()
+        self.net.exists('lo')
+        self.assertEqual(self.net.refreshes, 2)
+        with unittest.mock.patch('time.monotonic',
+                return_value=network.time.monotonic() + 61):
+            self.net.exists('lo')
+        self.assertEqual(self.net.refreshes, 3)
+
+    def test_link_local_addresses_last(self):
+        addresses = [(1, socket.AF_INET6, 'fe80::1', network.RT_SCOPE_LINK),
+                     (1, socket.AF_INET6, '2001:db8::1', 0)]
+        with unittest.mock.patch.object(network, 'dump_addresses_netlink',
+                    return_value=addresses), \
+                unittest.mock.patch('socket.if_nameindex',
+                    return_value=[(1, 'eth9')]):
+            self.assertEqual(self.net.get('eth9').ipv6,
+                             ['2001:db8::1', 'fe80::1'])
+            self.assertEqual(self.net.address('eth9'), '2001:db8::1')
+
+    def test_watcher(self):
+        net = network.HostNetwork(watch=True)
+        try:
+            net.snapshot()
+            if net.netlink:
+                self.assertIsNotNone(net._watcher)
+        finally:
+            net.close()
+        self.assertIsNone(net._watcher)
+
+
+class TestDisplayAddresses(unittest.TestCase):
+
+    def test_ipv6_display(self):
+        dl = dockerx.DockerLauncher
+        for display, ip in (('::1:10', '::1'), ('[::1]:10.0', '::1'),
+                            ('2001:db8::7:0', '2001:db8::7'),
+                            ('localhost:10.0', '127.0.0.1')):
+            with unittest.mock.patch.dict(os.environ, {'DISPLAY': display}):
+                self.assertEqual(dl.get_ip_from_display(), ip)
+                self.assertEqual(dl.get_port_offset_from_display(),
+                                 int(display.rsplit(':')[-1].split('.')[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
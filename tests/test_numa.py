@@ -0,0 +1,210 @@
+"""
+@brief  Unit tests for the NUMA topology and the pinning of CPUs.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import tempfile
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.numa as numa
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+def fake_sysfs(root, nodes):
+    """
+    @brief Writes a /sys/devices/system/node tree.
+    @param[in]  nodes  Dictionary {node id: (cpulist, MemTotal in kB)}.
+    """
+    with open(os.path.join(root, 'possible'), 'w') as f:
+        f.write('0-' + str(max(nodes)) + '\n')
+    for node_id, (cpulist, kb) in nodes.items():
+        path = os.path.join(root, 'node' + str(node_id))
+        os.mkdir(path)
+        with open(os.path.join(path, 'cpulist'), 'w') as f:
+            f.write(cpulist + '\n')
+        with open(os.path.join(path, 'meminfo'), 'w') as f:
+            f.write('Node %d MemTotal:       %d kB\n' % (node_id, kb)
+                    + 'Node %d MemFree:        %d kB\n' % (node_id, kb // 2))
+
+
+class TestTopology(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        fake_sysfs(self.tmpdir.name, {0: ('0-3', 8 << 20),
+                                      1: ('4-7', 8 << 20),
+                                      2: ('', 4 << 20)})  # Memory only
+        self.allocator = numa.CpuAllocator(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_cpulist(self):
+        self.assertEqual(numa.parse_cpulist('0-2,5,8-9\n'), [0, 1, 2, 5, 8, 9])
+        self.assertEqual(numa.format_cpulist([9, 0, 1, 2, 5, 8]), '0-2,5,8-9')
+        with self.assertRaises(ValueError):
+            numa.parse_cpulist('0-x')
+
+    def test_parse_size(self):
+        self.assertEqual(numa.parse_size('1.5g'), 3 << 29)
+        self.assertEqual(numa.parse_size('256m'), 256 << 20)
+        self.assertEqual(numa.parse_size(4096), 4096)
+        self.assertEqual(numa.parse_size('4gb'), 4 << 30)
+        self.assertEqual(numa.parse_size('512MB'), 512 << 20)
+        self.assertEqual(numa.parse_size('100b'), 100)
+        with self.assertRaises(ValueError):
+            numa.parse_size('lots')
+
+    def test_read_topology(self):
+        node0, node1 = numa.read_topology(self.tmpdir.name)
+        self.assertEqual((node0.id, node0.cpus), (0, [0, 1, 2, 3]))
+        self.assertEqual((node1.id, node1.cpus), (1, [4, 5, 6, 7]))
+        self.assertEqual(node1.mem_total, 8 << 30)
+
+        # Without NUMA information, the host is a single node
+        node, = numa.read_topology(os.path.join(self.tmpdir.name, 'none'))
+        self.assertEqual(node.id, 0)
+        self.assertTrue(node.cpus)
+
+    def test_spread_and_release(self):
+        allocations = [self.allocator.allocate(2) for _ in range(4)]
+        self.assertEqual([a.cpuset_cpus for a in allocations],
+                         ['0-1', '4-5', '2-3', '6-7'])
+        self.assertEqual([a.cpuset_mems for a in allocations],
+                         ['0', '1', '0', '1'])
+        with self.assertRaises(RuntimeError):
+            self.allocator.allocate(1)
+
+        self.allocator.assign(allocations[1], 'c1')
+        self.assertIs(self.allocator.release('c1'), allocations[1])
+        self.assertIsNone(self.allocator.release('c1'))
+        self.assertEqual(self.allocator.allocate(2).cpuset_cpus, '4-5')
+
+    def test_engine_topology(self):
+        allocator = numa.CpuAllocator(topology=lambda: numa.engine_topology(
+            {'NCPU': 4, 'MemTotal': 8 << 30}))
+        self.assertEqual(allocator.allocate(3).cpuset_cpus, '0-2')
+        self.assertEqual(allocator.stats(), {0: {'cpus': 4, 'free': 1,
+                                                 'memory': 0}})
+        with self.assertRaises(RuntimeError):
+            numa.engine_topology({})
+
+    def test_constraints(self):
+        # No single node has 6 CPUs
+        wide = self.allocator.allocate(6)
+        self.assertEqual(wide.cpuset_cpus, '0-5')
+        self.assertEqual(wide.cpuset_mems, '0-1')
+        self.allocator.release(wide)
+
+        self.assertEqual(self.allocator.allocate(1, mems='1').cpuset_mems,
+                         '1')
+        with self.assertRaises(ValueError):
+            self.allocator.allocate(1, mems='2')
+
+        # Node 1 has more free CPUs, but not enough memory left
+        self.allocator.allocate(1, memory=7 << 30, mems='1')
+        self.assertEqual(self.allocator.allocate(1, memory=2 << 30)
+                         .cpuset_mems, '0')
+        self.assertEqual(self.allocator.stats()[1],
+                         {'cpus': 4, 'free': 2, 'memory': 7 << 30})
+
+        # No single node fits, and the CPUs taken from both nodes do not
+        # have the memory left either
+        with self.assertRaises(ValueError):
+            self.allocator.allocate(5, memory=10 << 30)
+        self.assertEqual(len(self.allocator.free()), 5)
+        wide = self.allocator.allocate(5, memory=7 << 30)
+        self.assertEqual(wide.cpuset_mems, '0-1')
+
+
+class TestPinnedLaunches(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        sysfs = os.path.join(self.tmpdir.name, 'node')
+        os.mkdir(sysfs)
+        fake_sysfs(sysfs, {0: ('0-3', 8 << 20), 1: ('4-7', 8 << 20)})
+        self.allocator = numa.CpuAllocator(sysfs)
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'cpu_allocator', self.allocator),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = dockerx.DockerLauncher()
+        self.dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                             version=FakeEngine.api_version)
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def host_config(self, container):
+        return self.engine.find_container(container.id)['HostConfig']
+
+    def test_auto(self):
+        results = self.dl.launch_many([{'image_name': 'ubuntu',
+            'cpuset': 'auto', 'cpus': 2, 'mem_limit': '1g'}] * 5)
+        self.assertEqual(sum(res.ok for res in results), 4)
+        self.assertIsInstance(results[-1].error, RuntimeError)
+        configs = [self.host_config(res.container) for res in results[:4]]
+        self.assertEqual(sorted(c['CpusetCpus'] for c in configs),
+                         ['0-1', '2-3', '4-5', '6-7'])
+        self.assertEqual(sorted(c['CpusetMems'] for c in configs),
+                         ['0', '0', '1', '1'])
+        self.assertEqual(configs[0]['Memory'], 1 << 30)
+        self.assertEqual(len(self.allocator.allocations()), 4)
+
+        # Removing the containers releases their CPUs
+        self.dl.remove_all()
+        self.assertEqual(self.allocator.allocations(), {})
+        res = self.dl.launch_container('ubuntu', cpus=8, return_result=True)
+        self.assertEqual(res.allocation.cpuset_cpus, '0-7')
+
+    def test_explicit(self):
+        container = self.dl.launch_container('ubuntu', cpuset='1,3',
+                                             mems='0')
+        config = self.host_config(container)
+        self.assertEqual((config['CpusetCpus'], config['CpusetMems']),
+                         ('1,3', '0'))
+        self.assertEqual(self.allocator.allocations(), {})
+
+    def test_failed_launch_releases_cpus(self):
+        with self.assertRaises(docker.errors.ImageNotFound):
+            self.dl.launch_container('missing', cpuset='auto', cpus=4,
+                                     pull=False)
+        self.assertEqual(self.allocator.stats()[0]['free'], 4)
+
+    def test_failed_start_releases_cpus(self):
+        self.engine.start_error = 'cannot start container'
+        with self.assertRaises(docker.errors.APIError):
+            self.dl.launch_container('ubuntu', cpuset='auto', cpus=4)
+        self.assertEqual(self.allocator.allocations(), {})
+        self.assertEqual(sum(n['free'] for n in self.allocator.stats().values()),
+                         8)
+        self.assertEqual(self.engine.containers, {})
+        self.assertEqual(len(self.dl.registry), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
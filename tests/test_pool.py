@@ -0,0 +1,163 @@
+"""
+@brief  Unit tests for the warm pool of containers.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import tempfile
+import time
+
+import docker
+
+# My imports
+import dockerx
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestContainerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = dockerx.DockerLauncher()
+        self.dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                             version=FakeEngine.api_version)
+        self.pools = []
+
+    def tearDown(self):
+        for pool in self.pools:
+            pool.close()
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def pool(self, **kwargs):
+        kwargs.setdefault('maintenance_interval', None)
+        pool = dockerx.ContainerPool(self.dl, **kwargs)
+        self.pools.append(pool)
+        return pool
+
+    def states(self):
+        return sorted(c['State']['Status']
+                      for c in self.engine.containers.values())
+
+    def wait_idle(self, pool, image, n, timeout=5.):
+        deadline = time.monotonic() + timeout
+        while pool.idle(image) < n and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pool.idle(image), n)
+
+    def test_warm_creates_paused_containers_with_x11(self):
+        pool = self.pool(size=3)
+        self.assertEqual(pool.warm('ubuntu'), 3)
+        self.assertEqual(pool.idle('ubuntu'), 3)
+        self.assertEqual(self.states(), ['paused'] * 3)
+        for c in self.engine.containers.values():
+            self.assertIn('DISPLAY=:42', c['Config']['Env'])
+            self.assertEqual(c['Config']['Cmd'], ['sleep', 'infinity'])
+
+    def test_hit_unpauses_and_execs(self):
+        pool = self.pool(size=1)
+        pool.warm('ubuntu')
+        container = pool.acquire('ubuntu', command='xeyes')
+        state = self.engine.find_container(container.id)
+        self.assertEqual(state['State']['Status'], 'running')
+        self.assertEqual(state['Execs'], [['xeyes']])
+
+        # The pool is refilled in the background
+        self.wait_idle(pool, 'ubuntu', 1)
+        stats = pool.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 0))
+        self.assertEqual(stats['hit_rate'], 1.)
+        self.assertEqual(stats['handout_latency']['count'], 1)
+
+    def test_failed_hit_launches_cold(self):
+        pool = self.pool(size=1)
+        pool.warm('ubuntu')
+        pooled = next(iter(self.engine.containers))
+        with unittest.mock.patch.object(docker.models.containers.Container,
+                'unpause', side_effect=docker.errors.APIError('frozen')), \
+                self.assertWarns(UserWarning):
+            container = pool.acquire('ubuntu')
+        self.assertNotEqual(container.id, pooled)
+        self.assertIsNone(self.engine.find_container(pooled))
+        self.assertNotIn(pooled, self.dl.registry)
+        self.assertEqual(self.engine.find_container(container.id)['State']
+                         ['Status'], 'running')
+        self.assertEqual(pool.stats()['misses'], 1)
+
+    def test_running_mode(self):
+        pool = self.pool(size=1, mode='running')
+        pool.warm('ubuntu')
+        self.assertEqual(self.states(), ['running'])
+        pool.acquire('ubuntu')
+        self.assertEqual(self.engine.count('POST', r'/containers/.*/unpause'),
+                         0)
+        with self.assertRaises(ValueError):
+            dockerx.ContainerPool(self.dl, mode='frozen')
+
+    def test_miss_launches_cold(self):
+        pool = self.pool(size=1)
+        pool.warm('ubuntu', wait=False)
+        pool.acquire('ubuntu')
+        pool.acquire('alpine', command='xclock')
+        stats = pool.stats()
+        self.assertGreaterEqual(stats['misses'], 1)
+        self.assertNotIn('alpine', stats['idle'])
+
+    def test_eviction_by_age_and_capacity(self):
+        pool = self.pool(size=2, capacity=3)
+        pool.warm('ubuntu')
+        pool.warm('alpine')
+        # 'ubuntu' is the least recently used image, so it is evicted first
+        self.assertEqual(pool.idle('ubuntu'), 1)
+        self.assertEqual(pool.idle('alpine'), 2)
+
+        pool.max_idle = 0.
+        self.assertEqual(pool.evict_idle(), 3)
+        self.assertEqual(pool.idle(), 0)
+        self.assertEqual(len(self.engine.containers), 0)
+
+    def test_x11_change_drops_stale_containers(self):
+        pool = self.pool(size=1)
+        pool.warm('ubuntu')
+        stale = next(iter(self.engine.containers))
+        with unittest.mock.patch.object(dockerx.X11EnvironmentCache, 'key',
+                return_value=('other', None, None)):
+            container = pool.acquire('ubuntu')
+        self.assertNotEqual(container.id, stale)
+        self.assertIsNone(self.engine.find_container(stale))
+        self.assertEqual(pool.stats()['misses'], 1)
+
+    def test_close_removes_idle_containers(self):
+        pool = self.pool(size=2)
+        pool.warm('ubuntu')
+        self.assertEqual({r.status for r in self.dl.registry}, {'paused'})
+        container = pool.acquire('ubuntu')
+        self.assertEqual(self.dl.registry.get(container.id).status,
+                         'running')
+        pool.close()
+        self.assertEqual(list(self.engine.containers), [container.id])
+        self.assertEqual(self.dl.launched_containers, [container])
+
+
+if __name__ == '__main__':
+    unittest.main()
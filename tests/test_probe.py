@@ -0,0 +1,151 @@
+"""
+@brief  Unit tests for the parallel detection of the X11 server.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+# My imports
+import dockerx
+import dockerx.probe as probe
+from fake_x11 import FakeXServer
+
+
+class TestProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.close()
+        self.tmpdir.cleanup()
+
+    def tcp_server(self, **kwargs):
+        server = FakeXServer(port=0, **kwargs)
+        self.servers.append(server)
+        return server
+
+    def unix_server(self, offset, **kwargs):
+        path = probe.unix_socket_path(offset, self.tmpdir.name)
+        server = FakeXServer(path=path, **kwargs)
+        self.servers.append(server)
+        return server
+
+    def display_of(self, server, host='127.0.0.1'):
+        return host + ':' + str(server.port - 6000)
+
+    def test_parse_display(self):
+        self.assertEqual(probe.parse_display(':0'), ('', 0))
+        self.assertEqual(probe.parse_display('host:10.0'), ('host', 10))
+        self.assertEqual(probe.parse_display('[::1]:3'), ('::1', 3))
+        self.assertEqual(probe.parse_display('host'), (None, None))
+        self.assertEqual(probe.parse_display(None), (None, None))
+
+    def test_tcp(self):
+        server = self.tcp_server()
+        if server.port < 6000:
+            self.skipTest('ephemeral port below the X11 range')
+        result = probe.probe_display(self.display_of(server), self.tmpdir.name)
+        self.assertEqual(result.transport, 'tcp')
+        self.assertIsNotNone(result.timings['tcp'])
+
+    def test_unix(self):
+        self.unix_server(7)
+        result = probe.probe_display(':7', self.tmpdir.name)
+        self.assertEqual(result.transport, 'unix')
+        self.assertIsNotNone(result.timings['unix'])
+
+    def test_tcp_is_preferred(self):
+        tcp = self.tcp_server(delay=0.2)
+        if tcp.port < 6000:
+            self.skipTest('ephemeral port below the X11 range')
+        offset = tcp.port - 6000
+        self.unix_server(offset)
+        display = ':' + str(offset)
+
+        # The unix socket answers first, but both transports are up
+        result = probe.probe_display(display, self.tmpdir.name)
+        self.assertEqual(result.transport, 'tcp')
+        self.assertGreaterEqual(result.elapsed, 0.15)
+        result = asyncio.run(probe.aprobe_display(display, self.tmpdir.name))
+        self.assertEqual(result.transport, 'tcp')
+
+        # If the TCP probe does not finish in time, the unix socket is used
+        result = probe.probe_display(display, self.tmpdir.name, timeout=0.1)
+        self.assertEqual(result.transport, 'unix')
+
+    def test_losing_probe_is_aborted(self):
+        tcp = self.tcp_server()
+        if tcp.port < 6000:
+            self.skipTest('ephemeral port below the X11 range')
+        offset = tcp.port - 6000
+        self.unix_server(offset, silent=True)
+        threads = threading.active_count()
+        result = probe.probe_display(':' + str(offset), self.tmpdir.name,
+            timeout=5.)
+        self.assertEqual(result.transport, 'tcp')
+        self.assertLess(result.elapsed, 1.)
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_silent_server_is_not_an_x_server(self):
+        server = self.tcp_server(silent=True)
+        if server.port < 6000:
+            self.skipTest('ephemeral port below the X11 range')
+        tic = time.monotonic()
+        result = probe.probe_display(self.display_of(server),
+            self.tmpdir.name, timeout=0.3)
+        self.assertIsNone(result.transport)
+        self.assertLess(time.monotonic() - tic, 1.)
+
+        # Without the handshake, any listening socket is accepted
+        result = probe.probe_display(self.display_of(server),
+            self.tmpdir.name, timeout=0.3, handshake=False)
+        self.assertEqual(result.transport, 'tcp')
+
+    def test_regular_file_is_not_an_x_server(self):
+        open(probe.unix_socket_path(8, self.tmpdir.name), 'w').close()
+        result = probe.probe_display(':8', self.tmpdir.name, timeout=0.3)
+        self.assertIsNone(result.transport)
+
+    def test_deadline_with_unreachable_host(self):
+        # TEST-NET-1 (RFC 5737) is not routable, connect() would hang
+        tic = time.monotonic()
+        result = probe.probe_display('192.0.2.1:0', self.tmpdir.name,
+            timeout=0.3)
+        self.assertIsNone(result.transport)
+        self.assertLess(time.monotonic() - tic, 1.)
+
+    def test_async(self):
+        self.unix_server(9)
+        result = asyncio.run(probe.aprobe_display(':9', self.tmpdir.name))
+        self.assertEqual(result.transport, 'unix')
+
+        server = self.tcp_server(silent=True)
+        result = asyncio.run(probe.aprobe_display(self.display_of(server),
+            self.tmpdir.name, timeout=0.3))
+        self.assertIsNone(result.transport)
+
+    def test_launcher_uses_probe(self):
+        self.unix_server(11)
+        with unittest.mock.patch.dict(os.environ, {'DISPLAY': ':11'}), \
+                unittest.mock.patch.object(dockerx.DockerLauncher,
+                    'x11_socket_dir', self.tmpdir.name):
+            socket_type = dockerx.DockerLauncher.get_x11_server_socket_type()
+            x11 = dockerx.DockerLauncher.x11_setup_for(socket_type, None,
+                xhost=False)
+        self.assertEqual(socket_type, 'unix')
+        self.assertEqual(x11['volumes'][self.tmpdir.name]['bind'],
+                         '/tmp/.X11-unix')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+"""
+@brief  Unit tests for the readiness probes of the launches.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.readiness as readiness
+import dockerx.relay as x11relay
+import dockerx.xauth as xauth
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+def later(delay, func, *args):
+    timer = threading.Timer(delay, func, args)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+class TestParse(unittest.TestCase):
+
+    def test_probes(self):
+        self.assertEqual(readiness.parse(None), [])
+        health, = readiness.parse('health')
+        self.assertIsInstance(health, readiness.HealthProbe)
+        x11, log = readiness.parse(['x11', 'log:ready in \\d+ ms'])
+        self.assertIsInstance(x11, readiness.X11Probe)
+        self.assertTrue(log.pattern.search('ready in 42 ms'))
+        probe = readiness.LogProbe('up')
+        self.assertEqual(readiness.parse([probe]), [probe])
+        with self.assertRaises(ValueError):
+            readiness.parse('tcp:5900')
+
+
+class TestPidInContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cid = 'c0ffee' * 10 + 'c0ff'
+        self.process(100, 1, '0::/system.slice/docker-' + self.cid + '.scope')
+        self.process(150, 90, '0::/')
+        self.process(300, 150, '0::/')
+        self.process(400, 1, '0::/user.slice')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def process(self, pid, ppid, cgroup):
+        path = os.path.join(self.tmpdir.name, str(pid))
+        os.mkdir(path)
+        with open(os.path.join(path, 'status'), 'w') as f:
+            f.write('Name:\tapp\nPid:\t%d\nPPid:\t%d\n' % (pid, ppid))
+        with open(os.path.join(path, 'cgroup'), 'w') as f:
+            f.write(cgroup + '\n')
+
+    def test_cgroup_and_ancestors(self):
+        proc = self.tmpdir.name
+        self.assertTrue(readiness.pid_in_container(100, self.cid, proc=proc))
+        self.assertTrue(readiness.pid_in_container(300, self.cid, 150, proc))
+        self.assertFalse(readiness.pid_in_container(400, self.cid, 150, proc))
+        self.assertFalse(readiness.pid_in_container(400, self.cid, 1, proc))
+        self.assertFalse(readiness.pid_in_container(None, self.cid, 150,
+                                                    proc))
+
+
+class TestWaitReady(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.xauthority = os.path.join(self.tmpdir.name, 'Xauthority')
+        self.cookie = xauth.XauthEntry(xauth.FAMILY_WILD, b'', b'42',
+            b'MIT-MAGIC-COOKIE-1', os.urandom(16))
+        xauth.write_entries(self.xauthority, [self.cookie])
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42',
+                'XAUTHORITY': self.xauthority}),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'xauth_files',
+                xauth.XauthFileStore(os.path.join(self.tmpdir.name, 'xa'))),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_relays',
+                x11relay.RelayManager(directory=self.tmpdir.name)),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = dockerx.DockerLauncher(tracer=dockerx.Tracer())
+        self.dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                             version=FakeEngine.api_version)
+
+    def tearDown(self):
+        dockerx.DockerLauncher.enable_relay(False, unix=False)
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def launch(self, name='app', **kwargs):
+        return self.dl.launch_container('ubuntu', ifname=None, name=name,
+            return_result=True, **kwargs)
+
+    def test_health(self):
+        later(0.2, self.engine.health, 'app')
+        res = self.launch(wait_ready='health', ready_timeout=5)
+        self.assertGreaterEqual(res.time_to_ready, 0.15)
+        self.assertLess(res.time_to_ready, 2)
+        self.assertIn('ready', res.timings)
+
+    def test_health_timeout(self):
+        tic = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            self.launch(wait_ready='health', ready_timeout=0.3)
+        self.assertLess(time.monotonic() - tic, 2)
+
+        # The container that never became ready is not left behind
+        self.assertEqual(self.engine.containers, {})
+        self.assertEqual(len(self.dl.registry), 0)
+
+    def test_exit_before_ready(self):
+        later(0.2, self.engine.oom, 'app')
+        with self.assertRaises(RuntimeError):
+            self.launch(wait_ready='health', ready_timeout=5)
+
+    def test_log(self):
+        later(0.1, self.engine.log, 'app', 'loading...\n')
+        later(0.2, self.engine.log, 'app', 'VNC server listening on 5900\n',
+              2)
+        res = self.launch(wait_ready='log:listening on \\d+',
+                          ready_timeout=5)
+        self.assertGreaterEqual(res.time_to_ready, 0.15)
+
+        # The log has already been printed
+        container = res.container
+        self.assertGreaterEqual(self.dl.wait_ready(container,
+            'log:listening', timeout=1), 0)
+        with self.assertRaises(TimeoutError):
+            self.dl.wait_ready(container, 'log:never', timeout=0.3)
+
+    def test_x11(self):
+        dockerx.DockerLauncher.enable_relay(unix=True)
+        self.engine.init_pid = os.getpid()
+
+        def connect():
+            x11_relay, = dockerx.DockerLauncher.x11_relays.relays()
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(x11_relay.path)
+            self.addCleanup(sock.close)
+
+        later(0.2, connect)
+        res = self.launch(wait_ready='x11', ready_timeout=5)
+        self.assertGreaterEqual(res.time_to_ready, 0.15)
+        config = self.engine.find_container(res.container.id)
+        self.assertIn('DISPLAY=:42', config['Config']['Env'])
+        x11_relay, = dockerx.DockerLauncher.x11_relays.relays()
+        self.assertEqual(x11_relay.peers()[-1][0], os.getpid())
+
+        # The X server sees the user of the relay, so the container gets
+        # the cookie of the display, and other users cannot use the relay
+        self.assertEqual(os.stat(x11_relay.path).st_mode & 0o777, 0o700)
+        env = dict(e.split('=', 1) for e in config['Config']['Env'])
+        self.assertEqual(xauth.read_entries(env['XAUTHORITY']),
+                         [self.cookie])
+        self.assertIn(env['XAUTHORITY'] + ':' + env['XAUTHORITY'] + ':rw',
+                      config['HostConfig']['Binds'])
+
+        # A connection of a process of another container does not count
+        self.engine.init_pid = 999999999
+        later(0.1, connect)
+        with self.assertRaises(TimeoutError):
+            self.launch('other', wait_ready='x11', ready_timeout=0.5)
+
+    def test_x11_needs_relay(self):
+        with self.assertRaises(ValueError):
+            self.launch(wait_ready='x11', ready_timeout=1)
+
+    def test_launch_many(self):
+        later(0.2, self.engine.health, 'a')
+        a, b = self.dl.launch_many([
+            {'image_name': 'ubuntu', 'name': 'a', 'wait_ready': 'health'},
+            {'image_name': 'ubuntu', 'name': 'b', 'wait_ready': 'health',
+             'ready_timeout': 0.3}])
+        self.assertTrue(a.ok)
+        self.assertGreaterEqual(a.time_to_ready, 0.15)
+        self.assertIsInstance(b.error, TimeoutError)
+        self.assertIsNone(b.container)
+        self.assertEqual(list(self.engine.containers), [a.container.id])
+        self.assertEqual([r.id for r in self.dl.registry], [a.container.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
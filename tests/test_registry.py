@@ -0,0 +1,200 @@
+"""
+@brief  Unit tests for the registry and the bulk lifecycle of containers.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import tempfile
+import time
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.registry as registry
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class FakeContainer:
+    def __init__(self, cid, name=None, image='ubuntu', status='running'):
+        self.id = cid
+        self.attrs = {'Name': '/' + name if name else None,
+                      'Config': {'Image': image, 'Labels': {}},
+                      'State': {'Status': status}}
+
+
+class TestContainerRegistry(unittest.TestCase):
+
+    def test_indexes(self):
+        reg = registry.ContainerRegistry()
+        reg.add(FakeContainer('a' * 64, 'first'))
+        reg.add(FakeContainer('b' * 64, 'second', image='ubuntu:latest'))
+        reg.add(FakeContainer('c' * 64, image='alpine'))
+        self.assertEqual(reg.get('first').id, 'a' * 64)
+        self.assertEqual(reg.get('bbbb').name, 'second')
+        self.assertEqual([r.id for r in reg.by_image('docker.io/ubuntu')],
+                         ['a' * 64, 'b' * 64])
+        self.assertIn('c' * 64, reg)
+
+        reg.remove('second')
+        self.assertIsNone(reg.get('second'))
+        self.assertEqual(len(reg.by_image('ubuntu')), 1)
+        self.assertEqual(len(reg), 2)
+
+    def test_retention_forgets_terminated_containers_only(self):
+        evicted = []
+        reg = registry.ContainerRegistry(retention=3, on_evict=evicted.append)
+        reg.add(FakeContainer('1' * 64))
+        reg.add(FakeContainer('2' * 64, status='exited'))
+        reg.add(FakeContainer('3' * 64))
+        reg.add(FakeContainer('4' * 64))
+        self.assertEqual([r.id[0] for r in reg], ['1', '3', '4'])
+        self.assertEqual([r.id[0] for r in evicted], ['2'])
+
+        # Running containers are never forgotten
+        reg.add(FakeContainer('5' * 64))
+        self.assertEqual([r.id[0] for r in reg], ['1', '3', '4', '5'])
+        reg.set_status('3' * 64, 'dead')
+        reg.add(FakeContainer('6' * 64))
+        self.assertEqual([r.id[0] for r in reg], ['1', '4', '5', '6'])
+        self.assertEqual([r.id[0] for r in evicted], ['2', '3'])
+
+
+class TestLifecycle(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu', 'alpine']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def launcher(self, owner='alice@lab', retention=1024):
+        dl = dockerx.DockerLauncher(owner=owner, retention=retention)
+        dl.client = docker.DockerClient(base_url=self.engine.base_url,
+            version=FakeEngine.api_version, max_pool_size=8)
+        return dl
+
+    def launch(self, dl, n, image='ubuntu'):
+        return [dl.launch_container(image, command='sleep infinity')
+                for _ in range(n)]
+
+    def test_containers_are_labelled(self):
+        dl = self.launcher()
+        container = dl.launch_container('ubuntu', name='gui')
+        labels = self.engine.find_container(container.id)['Config']['Labels']
+        self.assertEqual(labels[registry.OWNER_LABEL], 'alice@lab')
+        self.assertIn(registry.LABEL, labels)
+        self.assertEqual(dl.registry.get('gui').image, 'ubuntu')
+        self.assertEqual(dl.launched_containers, [container])
+
+    def test_launched_containers_list(self):
+        dl = self.launcher()
+        a, b, c = self.launch(dl, 3)
+        self.assertEqual(len(dl.launched_containers), 3)
+        self.assertEqual(dl.launched_containers[-1], c)
+        dl.launched_containers.remove(a)
+        self.assertNotIn(a.id, dl.registry)
+        with self.assertRaises(ValueError):
+            dl.launched_containers.remove(a)
+        dl.launched_containers.append(a)
+        self.assertEqual(dl.launched_containers, [b, c, a])
+        dl.launched_containers = [c]
+        self.assertEqual(dl.launched_containers, [c])
+        dl.launched_containers.clear()
+        self.assertEqual(len(dl.registry), 0)
+
+    def test_stop_and_remove_all(self):
+        dl = self.launcher()
+        self.launch(dl, 4)
+        self.engine.latency = 0.1
+        tic = time.monotonic()
+        results = dl.stop_all(timeout=1)
+        self.assertLess(time.monotonic() - tic, 4 * 0.2)
+        self.assertEqual(list(results.values()), [None] * 4)
+        self.assertEqual(len(dl.registry.records(status='exited')), 4)
+        self.assertEqual(dl.stop_all(), {})
+
+        results = dl.remove_all()
+        self.assertEqual(list(results.values()), [None] * 4)
+        self.assertEqual(len(dl.registry), 0)
+        self.assertEqual(self.engine.containers, {})
+
+    def test_deadline(self):
+        dl = self.launcher()
+        self.launch(dl, 2)
+        self.engine.latency = 0.5
+        tic = time.monotonic()
+        results = dl.remove_all(deadline=0.1)
+        self.assertLess(time.monotonic() - tic, 0.4)
+        for error in results.values():
+            self.assertIsInstance(error, TimeoutError)
+
+    def test_reap_exited(self):
+        dl = self.launcher()
+        running, exited = self.launch(dl, 2)
+        gone = dl.launch_container('alpine')
+        self.engine.set_state(self.engine.find_container(exited.id), 'exited')
+        del self.engine.containers[gone.id]
+
+        results = dl.reap_exited()
+        self.assertEqual(list(results), [exited.id])
+        self.assertEqual(list(self.engine.containers), [running.id])
+        self.assertEqual([r.id for r in dl.registry], [running.id])
+
+    def test_reap_exited_keeps_other_owners(self):
+        dl = self.launcher()
+        other = self.launch(self.launcher(owner='bob@lab'), 1)[0]
+        self.assertEqual(len(dl.adopt(any_owner=True)), 1)
+        self.assertEqual(dl.reap_exited(), {})
+        self.assertIn(other.id, dl.registry)
+
+    def test_eviction_releases_resources(self):
+        dl = self.launcher(retention=1)
+        first, second = self.launch(dl, 2)
+        self.assertEqual(len(dl.registry), 2)
+        dl.registry.set_status(first.id, 'exited')
+        with unittest.mock.patch.object(dl, 'forget',
+                                        wraps=dl.forget) as forget:
+            self.launch(dl, 1)
+        forget.assert_called_once_with(first.id)
+        self.assertNotIn(first.id, dl.registry)
+        self.assertIn(second.id, dl.registry)
+
+    def test_adopt_after_restart(self):
+        mine = self.launch(self.launcher(), 2)
+        self.launch(self.launcher(owner='bob@lab'), 1)
+
+        dl = self.launcher()
+        adopted = dl.adopt()
+        self.assertEqual(sorted(r.id for r in adopted),
+                         sorted(c.id for c in mine))
+        self.assertEqual(dl.registry.get(mine[0].id).status, 'running')
+        self.assertEqual(len(dl.adopt(any_owner=True)), 3)
+
+        dl.remove_all()
+        self.assertEqual(len(self.engine.containers), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
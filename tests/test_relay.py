@@ -0,0 +1,159 @@
+"""
+@brief  Unit tests for the local X11 relay of TCP displays.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import socket
+import tempfile
+import time
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.probe as probe
+import dockerx.relay as x11relay
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+def wait_until(condition, timeout=5.):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not met in time')
+        time.sleep(0.01)
+
+
+class TestX11Relay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(port=0)
+
+    def tearDown(self):
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def relay(self, **kwargs):
+        return x11relay.X11Relay(('127.0.0.1', self.xserver.port), 10,
+            os.path.join(self.tmpdir.name, 'relay'), **kwargs).start()
+
+    def roundtrip(self, x11_relay, payload):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(x11_relay.path)
+            self.assertTrue(probe.x11_handshake(sock))
+            sock.recv(64)  # Rest of the 'Failed' reply
+            sock.sendall(payload)
+            sock.shutdown(socket.SHUT_WR)
+            echo = b''
+            while True:
+                chunk = sock.recv(1 << 16)
+                if not chunk:
+                    break
+                echo += chunk
+        return echo
+
+    def check_forwarding(self, **kwargs):
+        with self.relay(**kwargs) as x11_relay:
+            self.assertEqual(os.path.basename(x11_relay.path), 'X10')
+            self.assertTrue(probe.probe_unix(x11_relay.path, 1))
+            payload = os.urandom(3 << 20)
+            self.assertEqual(self.roundtrip(x11_relay, payload), payload)
+
+            wait_until(lambda: x11_relay.stats()['active'] == 0)
+            conn = x11_relay.connections()[-1]
+            self.assertEqual(conn.bytes_in, 12 + len(payload))
+            self.assertEqual(conn.bytes_out, 32 + len(payload))
+            self.assertGreaterEqual(conn.latency, 0)
+            stats = x11_relay.stats()
+            self.assertEqual(stats['accepted'], 2)
+            self.assertEqual(stats['bytes_in'], 2 * 12 + len(payload))
+        self.assertFalse(os.path.exists(x11_relay.path))
+        return conn
+
+    @unittest.skipUnless(x11relay.splice_available(), 'no os.splice()')
+    def test_splice(self):
+        self.assertTrue(self.check_forwarding().splice)
+
+    def test_copy(self):
+        self.assertFalse(self.check_forwarding(use_splice=False).splice)
+
+    def test_spare_connections(self):
+        with self.relay(spares=2) as x11_relay:
+            wait_until(lambda: self.xserver.connections == 2)
+            self.assertTrue(probe.probe_unix(x11_relay.path, 1))
+            self.assertEqual(x11_relay.stats()['spare_hits'], 1)
+
+            # The spare that was used is replaced
+            wait_until(lambda: self.xserver.connections == 3)
+            self.assertEqual(x11_relay.stats()['spares'], 2)
+
+    def test_x_server_down(self):
+        with self.relay() as x11_relay:
+            self.xserver.close()
+            self.assertFalse(probe.probe_unix(x11_relay.path, 1))
+            wait_until(lambda: x11_relay.stats()['failed'] == 1)
+
+
+class TestLaunchThroughRelay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(port=0)
+        if self.xserver.port < 6000:
+            self.xserver.close()
+            self.skipTest('ephemeral port below the X11 range')
+        self.offset = self.xserver.port - 6000
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {
+                'DISPLAY': '127.0.0.1:' + str(self.offset),
+                'XAUTHORITY': os.path.join(self.tmpdir.name, 'Xauthority')}),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_relays',
+                x11relay.RelayManager(directory=self.tmpdir.name)),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'xauth_files',
+                dockerx.xauth.XauthFileStore(self.tmpdir.name)),
+        ]
+        for patch in self.patches:
+            patch.start()
+        dockerx.DockerLauncher.enable_relay()
+
+    def tearDown(self):
+        dockerx.DockerLauncher.enable_relay(False)
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def test_launch(self):
+        dl = dockerx.DockerLauncher()
+        dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                        version=FakeEngine.api_version)
+        container = dl.launch_container('ubuntu', ifname=None)
+        config = self.engine.find_container(container.id)
+        self.assertIn('DISPLAY=:' + str(self.offset), config['Config']['Env'])
+
+        x11_relay, = dockerx.DockerLauncher.x11_relays.relays()
+        binds = config['HostConfig']['Binds']
+        self.assertIn(x11_relay.directory + ':/tmp/.X11-unix:rw', binds)
+
+        # What a client in the container would see
+        self.assertTrue(probe.probe_unix(x11_relay.path, 1))
+        self.assertEqual(self.xserver.connections, 2)
+
+        # The relay is reused by the next launches
+        dl.launch_container('ubuntu', ifname=None)
+        self.assertEqual(len(dockerx.DockerLauncher.x11_relays), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+"""
+@brief  Unit tests for the command line interface, dockerx.run.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import io
+import json
+import os
+import tempfile
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.run as run
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestParsers(unittest.TestCase):
+
+    def test_parse_env(self):
+        self.assertEqual(run.parse_env(['DEEP=LEARNING', 'OPTS=--a=b', 'E=']),
+                         {'DEEP': 'LEARNING', 'OPTS': '--a=b', 'E': ''})
+        with unittest.mock.patch.dict(os.environ, {'HOST_VAR': '1'}):
+            self.assertEqual(run.parse_env(['HOST_VAR', 'UNDEFINED_VAR_42']),
+                             {'HOST_VAR': '1'})
+        self.assertEqual(run.parse_env({'N': 3}), {'N': '3'})
+        with self.assertRaises(ValueError):
+            run.parse_env(['=value'])
+
+    def test_parse_vol(self):
+        self.assertEqual(run.parse_vol(['/tmp/unix:/foo/unix']),
+                         {'/tmp/unix': {'bind': '/foo/unix', 'mode': 'rw'}})
+        self.assertEqual(run.parse_vol(['/data:/data:ro']),
+                         {'/data': {'bind': '/data', 'mode': 'ro'}})
+        self.assertEqual(run.parse_vol(['/a:b:/mnt:rw,z']),
+                         {'/a:b': {'bind': '/mnt', 'mode': 'rw,z'}})
+        self.assertEqual(run.parse_vol(['/a:b:/mnt']),
+                         {'/a:b': {'bind': '/mnt', 'mode': 'rw'}})
+        self.assertEqual(run.parse_vol({'hello': '/tmp/hello',
+                                        '/d': {'bind': '/d', 'mode': 'ro'}}),
+                         {'hello': {'bind': '/tmp/hello', 'mode': 'rw'},
+                          '/d': {'bind': '/d', 'mode': 'ro'}})
+        with self.assertRaises(ValueError):
+            run.parse_vol(['/only-source'])
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manifest = {
+            'defaults': {'nvidia': 1, 'env': {'TZ': 'UTC'}},
+            'containers': [
+                {'image': 'ubuntu', 'command': 'xclock', 'name': 'clock'},
+                {'image': 'ubuntu', 'command': 'xeyes', 'nvidia': False,
+                 'volumes': ['/data:/data:ro'], 'env': ['OPTS=--a=b']},
+            ],
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as f:
+            if name.endswith('.json'):
+                json.dump(data, f)
+            else:
+                import yaml
+                yaml.safe_dump(data, f)
+        return path
+
+    def test_load_json(self):
+        specs = run.load_manifest(self.write('jobs.json', self.manifest))
+        self.assertEqual(specs[0], {'image_name': 'ubuntu',
+            'command': 'xclock', 'name': 'clock', 'nvidia_runtime': True,
+            'env_vars': {'TZ': 'UTC'}, 'volumes': {}})
+        self.assertEqual(specs[1]['env_vars'], {'OPTS': '--a=b'})
+        self.assertEqual(specs[1]['volumes'],
+                         {'/data': {'bind': '/data', 'mode': 'ro'}})
+        self.assertFalse(specs[1]['nvidia_runtime'])
+
+        # A plain list of containers is also accepted
+        specs = run.load_manifest(self.write('list.json',
+            self.manifest['containers']))
+        self.assertEqual(len(specs), 2)
+
+    def test_load_yaml(self):
+        try:
+            import yaml
+        except ImportError:
+            self.skipTest('PyYAML is not installed')
+        path = self.write('jobs.yaml', self.manifest)
+        self.assertEqual(run.load_manifest(path),
+            run.load_manifest(self.write('jobs.json', self.manifest)))
+
+    def test_invalid_manifests(self):
+        with self.assertRaises(ValueError):
+            run.load_manifest(self.write('a.json', [{'image': 'u', 'gpu': 1}]))
+        with self.assertRaises(ValueError):
+            run.load_manifest(self.write('b.json', [{'command': 'xclock'}]))
+        with self.assertRaises(ValueError):
+            run.load_manifest(self.write('c.json', {'defaults': {}}))
+
+
+class TestBatchLaunch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        client = docker.DockerClient(base_url=self.engine.base_url,
+            version=FakeEngine.api_version, max_pool_size=8)
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'client',
+                client),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def main(self, *argv):
+        stdout = io.StringIO()
+        self.stderr = io.StringIO()
+        with unittest.mock.patch('sys.argv', ['dockerx.run'] + list(argv)), \
+                unittest.mock.patch('sys.stdout', stdout), \
+                unittest.mock.patch('sys.stderr', self.stderr), \
+                self.assertRaises(SystemExit) as cm:
+            run.main()
+        return cm.exception.code, stdout.getvalue()
+
+    def test_errors_without_traceback(self):
+        for argv, message in (
+                (['--image', 'missing', '--no-pull'], 'missing'),
+                (['--image', 'ubuntu', '--memory', 'lots'], 'lots'),
+                (['--image', 'ubuntu', '--cpus', '1', '--memory', 'lots'],
+                 'Invalid size'),
+                (['--image', 'ubuntu', '--wait-ready', 'bogus'], 'bogus')):
+            code, _ = self.main('--no-daemon', *argv)
+            self.assertEqual(code, 1)
+            self.assertIn(message, self.stderr.getvalue())
+            self.assertNotIn('Traceback', self.stderr.getvalue())
+
+    def test_manifest(self):
+        manifest = os.path.join(self.tmpdir.name, 'jobs.json')
+        with open(manifest, 'w') as f:
+            json.dump([{'image': 'ubuntu', 'name': 'gui-%d' % i,
+                        'command': 'sleep infinity', 'env': ['I=%d' % i]}
+                       for i in range(4)] + [{'image': 'missing'}], f)
+        output = os.path.join(self.tmpdir.name, 'results.json')
+        code, stdout = self.main('--manifest', manifest, '--json', output)
+        self.assertEqual(code, 1)
+        self.assertIn('4/5 containers launched.', stdout)
+
+        with open(output) as f:
+            results = json.load(f)
+        self.assertEqual([r['ok'] for r in results], [True] * 4 + [False])
+        self.assertEqual([r['name'] for r in results[:4]],
+                         ['gui-%d' % i for i in range(4)])
+        for r in results[:4]:
+            container = self.engine.find_container(r['container_id'])
+            self.assertIn('I=' + str(r['index']), container['Config']['Env'])
+            self.assertGreater(r['elapsed'], 0)
+
+        # The X11 environment was detected once for the whole batch
+        self.assertEqual(dockerx.DockerLauncher.x11_cache.misses, 1)
+
+    def test_json_to_stdout(self):
+        manifest = os.path.join(self.tmpdir.name, 'jobs.json')
+        with open(manifest, 'w') as f:
+            json.dump({'containers': [{'image': 'ubuntu'}]}, f)
+        code, stdout = self.main('--manifest', manifest, '--json', '-')
+        self.assertEqual(code, 0)
+        self.assertTrue(json.loads(stdout)[0]['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+@brief  Unit tests for the opt-in shared memory (MIT-SHM) rendering.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import tempfile
+import warnings
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.aio as aio
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+def x11(transport, display):
+    return {'transport': transport, 'volumes': {},
+            'environment': {'QT_X11_NO_MITSHM': 1, 'DISPLAY': display}}
+
+
+class TestBuildOptions(unittest.TestCase):
+
+    def build(self, x11_setup, **kwargs):
+        return dockerx.DockerLauncher.build_options(x11_setup, False, {}, {},
+            None, **kwargs)
+
+    def test_usable(self):
+        usable = dockerx.DockerLauncher.shm_usable
+        self.assertTrue(usable(x11('unix', ':0')))
+        self.assertTrue(usable(x11('unix', 'unix:1.0')))
+        self.assertFalse(usable(x11('tcp', 'localhost:10')))
+        self.assertFalse(usable(x11('unix', '192.168.1.7:0')))
+        self.assertFalse(usable(x11(None, ':0')))
+
+    def test_auto(self):
+        options = self.build(x11('unix', ':0'), shm='auto', shm_size='1g')
+        self.assertEqual(options['ipc_mode'], 'host')
+        self.assertNotIn('QT_X11_NO_MITSHM', options['environment'])
+        self.assertNotIn('shm_size', options)
+
+        # Remote displays keep the safe default
+        options = self.build(x11('tcp', 'localhost:10'), shm='auto',
+            shm_size='1g')
+        self.assertNotIn('ipc_mode', options)
+        self.assertEqual(options['environment']['QT_X11_NO_MITSHM'], 1)
+        self.assertEqual(options['shm_size'], '1g')
+
+    def test_disabled_by_default(self):
+        options = self.build(x11('unix', ':0'))
+        self.assertNotIn('ipc_mode', options)
+        self.assertEqual(options['environment']['QT_X11_NO_MITSHM'], 1)
+
+    def test_forced_on_remote_display_warns(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            options = self.build(x11('tcp', 'localhost:10'), shm=True)
+        self.assertNotIn('ipc_mode', options)
+        self.assertEqual(len(caught), 1)
+
+    def test_async_create_body(self):
+        options = self.build(x11('unix', ':0'), shm=True)
+        body = aio.AsyncDockerLauncher.create_body('ubuntu', None, options)
+        self.assertEqual(body['HostConfig']['IpcMode'], 'host')
+        options = self.build(x11('tcp', 'localhost:10'), shm_size='256m')
+        body = aio.AsyncDockerLauncher.create_body('ubuntu', None, options)
+        self.assertEqual(body['HostConfig']['ShmSize'], 256 << 20)
+
+
+class TestLaunchWithShm(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = dockerx.DockerLauncher()
+        self.dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                             version=FakeEngine.api_version)
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def test_launch_container(self):
+        res = self.dl.launch_container('ubuntu', shm='auto',
+            return_result=True)
+        self.assertTrue(res.shm)
+        config = self.engine.find_container(res.container.id)
+        self.assertEqual(config['HostConfig']['IpcMode'], 'host')
+        self.assertNotIn('QT_X11_NO_MITSHM=1', config['Config']['Env'])
+
+        res = self.dl.launch_container('ubuntu', return_result=True)
+        self.assertFalse(res.shm)
+        config = self.engine.find_container(res.container.id)
+        self.assertIn('QT_X11_NO_MITSHM=1', config['Config']['Env'])
+
+    def test_launch_many(self):
+        results = self.dl.launch_many([
+            {'image_name': 'ubuntu', 'shm': 'auto'},
+            {'image_name': 'ubuntu', 'shm_size': '64m'},
+        ])
+        self.assertEqual([r.shm for r in results], [True, False])
+        config = self.engine.find_container(results[1].container.id)
+        self.assertEqual(config['HostConfig']['ShmSize'], 64 << 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+@brief  Regression tests for the startup cost of the dockerx package and CLI.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import subprocess
+import sys
+
+def python(code: str = None, args: list = (), importtime: bool = False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', code] if code is not None else list(args)
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+
+
+def imported_modules(importtime_stderr: str):
+    """@returns a dictionary {module: cumulative import time (us)}."""
+    modules = {}
+    for line in importtime_stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_does_not_load_docker_sdk(self):
+        proc = python('import sys, dockerx; '
+            'print("docker" in sys.modules, "asyncio" in sys.modules)')
+        self.assertEqual(proc.stdout.split(), ['False', 'False'])
+
+    def test_environment_only_operations_do_not_load_docker_sdk(self):
+        proc = python('import os, sys, dockerx\n'
+            'os.environ["DISPLAY"] = ":96"\n'
+            'dl = dockerx.DockerLauncher()\n'
+            'dockerx.DockerLauncher.prepare_environment(None, False, {}, {}, '
+            'None)\n'
+            'print("docker" in sys.modules)')
+        self.assertEqual(proc.stdout.strip(), 'False', proc.stderr)
+
+    def test_client_is_created_on_first_use(self):
+        proc = python('import sys, dockerx\n'
+            'dl = dockerx.DockerLauncher()\n'
+            'dl.client = object()\n'
+            'print(type(dl.client).__name__, "docker" in sys.modules)')
+        self.assertEqual(proc.stdout.split(), ['object', 'False'])
+
+    def test_cli_help_does_not_load_docker_sdk(self):
+        proc = python(args=['-m', 'dockerx.run', '--help'], importtime=True)
+        self.assertEqual(proc.returncode, 0)
+        self.assertIn('--image', proc.stdout)
+        modules = imported_modules(proc.stderr)
+        self.assertNotIn('docker', modules)
+        self.assertNotIn('requests', modules)
+
+    def test_cli_argument_errors_do_not_load_docker_sdk(self):
+        proc = python(args=['-m', 'dockerx.run', '--nvidia', '1'],
+            importtime=True)
+        self.assertEqual(proc.returncode, 2)
+        self.assertNotIn('docker', imported_modules(proc.stderr))
+
+    def test_lazy_names(self):
+        import dockerx
+        self.assertIs(dockerx.DockerLauncher, dockerx.dl.DockerLauncher)
+        self.assertIn('AsyncDockerLauncher', dir(dockerx))
+        with self.assertRaises(AttributeError):
+            dockerx.NotAName
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+"""
+@brief  Unit tests for the resource telemetry of the launched containers.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import time
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.telemetry as telemetry
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+def stats(cpu: int, system: int, memory: int = 0, rx: int = 0):
+    return {'cpu_stats': {'cpu_usage': {'total_usage': cpu},
+                          'system_cpu_usage': system, 'online_cpus': 4},
+            'memory_stats': {'usage': memory + 100, 'limit': 1 << 30,
+                             'stats': {'total_inactive_file': 100}},
+            'networks': {'eth0': {'rx_bytes': rx, 'tx_bytes': 0},
+                         'eth1': {'rx_bytes': rx, 'tx_bytes': 5}}}
+
+
+class TestSamples(unittest.TestCase):
+
+    def test_sample(self):
+        first = telemetry.Sample(stats(0, 0), now=10.)
+        second = telemetry.Sample(stats(2 * 10 ** 9, 4 * 10 ** 9, 512, 300),
+                                  now=12.)
+        self.assertEqual(second.memory, 512)
+        self.assertEqual(second.rx_bytes, 600)
+        self.assertEqual(second.tx_bytes, 5)
+        self.assertEqual(telemetry.cpu_percent(first, second), 200.)
+        self.assertEqual(telemetry.rate(first, second, 'rx_bytes'), 300.)
+        self.assertIsNone(telemetry.cpu_percent(second, first))
+
+        # Samples of a stopped container have no counters at all
+        empty = telemetry.Sample({'read': '0001-01-01T00:00:00Z'})
+        self.assertEqual((empty.memory, empty.rx_bytes), (0, 0))
+
+    def test_ring_buffer(self):
+        history = telemetry.History('c1', 'app', 'ubuntu', size=3)
+        for i in range(5):
+            history.add(telemetry.Sample(stats(i * 10 ** 9, i * 4 * 10 ** 9,
+                                               memory=i), now=float(i)))
+        self.assertEqual(len(history.samples), 3)
+        summary = history.summary()
+        self.assertEqual(summary['samples'], 3)
+        self.assertEqual(summary['cpu_percent_mean'], 100.)
+        self.assertEqual((summary['memory'], summary['memory_max']), (4, 4))
+        self.assertEqual(history.summary(window=1.)['samples'], 2)
+
+    def test_escape_label(self):
+        self.assertEqual(telemetry.escape_label('a"b\\c\nd'),
+                         'a\\"b\\\\c\\nd')
+
+
+class TestStatsCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.engine.stats_interval = 0.02
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.dl = dockerx.DockerLauncher()
+        self.dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                             version=FakeEngine.api_version)
+        results = self.dl.launch_many([{'image_name': 'ubuntu',
+            'name': 'app' + str(i)} for i in range(5)])
+        self.ids = [res.container.id for res in results]
+        for i, cid in enumerate(self.ids):
+            self.engine.usage[cid] = {'cpu': 0.5, 'memory': (i + 1) << 20,
+                                      'rx': 1000, 'tx': 10}
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def wait_samples(self, collector, n: int, timeout: float = 10.):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(len(collector.samples(cid)) >= n for cid in self.ids):
+                return
+            time.sleep(0.01)
+        self.fail('Not enough samples: ' + str(collector.stats()))
+
+    def test_bounded_streams(self):
+        collector = dockerx.StatsCollector(self.dl, max_streams=2, dwell=0.05,
+                                           refresh=0.05)
+        lock, active, peak = threading.Lock(), [0], [0]
+        follow = collector._follow
+
+        def counted_follow(cid):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            try:
+                return follow(cid)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        collector._follow = counted_follow
+        with collector:
+            self.wait_samples(collector, 4)
+            metrics = collector.metrics()
+            stats = collector.stats()
+        self.assertEqual(peak[0], 2)
+        self.assertGreater(stats['opened'], 5)  # The streams were rotated
+        self.assertEqual(stats['errors'], 0)
+        self.assertEqual(set(metrics), set(self.ids))
+        for i, cid in enumerate(self.ids):
+            m = metrics[cid]
+            self.assertEqual(m['name'], 'app' + str(i))
+            self.assertAlmostEqual(m['cpu_percent_mean'], 50., delta=1.)
+            self.assertEqual(m['memory'], (i + 1) << 20)
+            self.assertGreater(m['rx_rate'], 0)
+        self.assertEqual(collector.totals()['memory'], 15 << 20)
+
+        # The streams are closed with the collector
+        deadline = time.monotonic() + 5
+        while self.engine.stats_streams and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.engine.stats_streams, 0)
+
+    def test_forgotten_containers(self):
+        collector = dockerx.StatsCollector(self.dl, max_streams=5)
+        collector.sync()
+        for cid in self.ids:
+            collector.record(cid, self.engine.stats_sample(
+                self.engine.find_container(cid)))
+        self.dl.forget(self.ids[0])
+        collector.sync()
+        self.assertEqual(len(collector.metrics()), 4)
+        self.assertIsNone(collector.record(self.ids[0], {}))
+
+    def test_exited_and_paused_containers(self):
+        collector = dockerx.StatsCollector(self.dl, max_streams=5,
+                                           refresh=0.05)
+        with collector:
+            self.wait_samples(collector, 2)
+
+            # The container exits by itself, without an EventMonitor
+            with self.engine.lock:
+                self.engine.set_state(self.engine.find_container(
+                    self.ids[0]), 'exited')
+            deadline = time.monotonic() + 5
+            while self.dl.registry.get(self.ids[0]).status != 'exited' \
+                    and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.dl.registry.get(self.ids[0]).status,
+                             'exited')
+
+            # A paused container leaves its stream
+            self.dl.registry.get(self.ids[1]).container.pause()
+            self.dl.registry.set_status(self.ids[1], 'paused')
+            while self.engine.stats_streams > 3 \
+                    and time.monotonic() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.2)
+            opened = collector.stats()['opened']
+            time.sleep(0.2)
+            self.assertEqual(self.engine.stats_streams, 3)
+            self.assertEqual(collector.stats()['opened'], opened)
+        self.assertEqual(self.dl.registry.get(self.ids[1]).status, 'paused')
+
+    def test_prometheus_endpoint(self):
+        with dockerx.StatsCollector(self.dl, max_streams=5) as collector:
+            self.wait_samples(collector, 2)
+            host, port = collector.serve()
+            url = 'http://%s:%d' % (host, port)
+            with urllib.request.urlopen(url + '/metrics') as response:
+                self.assertIn('text/plain', response.headers['Content-Type'])
+                text = response.read().decode()
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(url + '/other')
+        self.assertIn('# TYPE dockerx_container_memory_bytes gauge', text)
+        self.assertIn('dockerx_container_memory_bytes{id="%s",name="app2",'
+                      'image="ubuntu"} %r' % (self.ids[2][:12],
+                                              float(3 << 20)), text)
+        self.assertIn('dockerx_telemetry_streams ', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+@brief  Unit tests for the per-phase tracing of the launches.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import json
+import os
+import tempfile
+
+import docker
+
+# My imports
+import dockerx
+import dockerx.tracing as tracing
+from fake_engine import FakeEngine
+from fake_x11 import FakeXServer
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xserver = FakeXServer(path=os.path.join(self.tmpdir.name, 'X42'))
+        self.engine = FakeEngine(images=['ubuntu']).start()
+        self.patches = [
+            unittest.mock.patch.dict(os.environ, {'DISPLAY': ':42'}),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'x11_socket_dir', self.tmpdir.name),
+            unittest.mock.patch.object(dockerx.DockerLauncher, 'x11_cache',
+                dockerx.X11EnvironmentCache()),
+            unittest.mock.patch.object(dockerx.DockerLauncher,
+                'xhost_available', return_value=False),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.engine.stop()
+        self.xserver.close()
+        self.tmpdir.cleanup()
+
+    def launcher(self, tracer=None):
+        dl = dockerx.DockerLauncher(tracer=tracer)
+        dl.client = docker.DockerClient(base_url=self.engine.base_url,
+                                        version=FakeEngine.api_version)
+        return dl
+
+    def test_phases_are_timed(self):
+        dl = self.launcher(tracing.Tracer())
+        res = dl.launch_container('ubuntu', return_result=True)
+        self.assertTrue(res.ok)
+        self.assertEqual(set(res.timings), {'launch_container',
+            'prepare_environment', 'x11_cache', 'probe', 'create', 'start'})
+        self.assertGreaterEqual(res.timings['launch_container'],
+                                res.timings['create'] + res.timings['start'])
+
+        # The second launch hits the cache, so there is no probe
+        res = dl.launch_container('alpine', return_result=True)
+        self.assertNotIn('probe', res.timings)
+        self.assertIn('pull', res.timings)
+
+    def test_hooks(self):
+        spans = []
+        dl = self.launcher(tracing.Tracer(
+            hooks=[lambda trace, span: spans.append((trace.name, span.name))]))
+        dl.launch_container('ubuntu')
+        self.assertEqual(spans[-1], ('launch_container', 'launch_container'))
+        self.assertIn(('launch_container', 'create'), spans)
+
+    def test_json_logging(self):
+        dl = self.launcher(tracing.Tracer(logger=True))
+        with self.assertLogs('dockerx.trace', 'INFO') as logs:
+            dl.launch_container('ubuntu')
+        records = [json.loads(r.getMessage()) for r in logs.records]
+        self.assertTrue({r['span'] for r in records} >= {'create', 'start'})
+        self.assertTrue(all(r['image'] == 'ubuntu' for r in records))
+        self.assertTrue(all(r['duration_ms'] >= 0 for r in records))
+
+    def test_failed_phase_is_recorded(self):
+        spans = []
+        dl = self.launcher(tracing.Tracer(
+            hooks=[lambda trace, span: spans.append(span)]))
+        with self.assertRaises(docker.errors.APIError):
+            dl.launch_container('missing')
+        self.assertEqual(spans[-1].attrs['error'], 'NotFound')
+
+    def test_launch_many(self):
+        dl = self.launcher(tracing.Tracer())
+        results = dl.launch_many([{'image_name': 'ubuntu'}] * 3)
+        for res in results:
+            self.assertIn('probe', res.timings)
+            self.assertIn('create', res.timings)
+
+    def test_disabled_by_default(self):
+        dl = self.launcher()
+        res = dl.launch_container('ubuntu', return_result=True)
+        self.assertIsNone(res.timings)
+        self.assertIs(tracing.span('probe'), tracing.NULL_SPAN)
+        self.assertIsNone(tracing.current())
+
+
+if __name__ == '__main__':
+    unittest.main()
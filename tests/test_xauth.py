@@ -0,0 +1,248 @@
+"""
+@brief  Unit tests for the native Xauthority reader/writer.
+@author Luis C. Garcia Peraza Herrera (luiscarlos.gph@gmail.com).
+@date   17 October 2026.
+"""
+
+import unittest
+import unittest.mock
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import tempfile
+
+# My imports
+import dockerx
+import dockerx.xauth as xauth
+
+COOKIE_LOCAL = bytes(range(16))
+COOKIE_REMOTE = bytes(range(16, 32))
+COOKIE_WILD = bytes(range(32, 48))
+
+
+def raw_entry(family, address, number, name, data):
+    """@returns an Xauthority entry packed by hand (fixture)."""
+    out = struct.pack('>H', family)
+    for field in (address, number, name, data):
+        out += struct.pack('>H', len(field)) + field
+    return out
+
+
+class TestXauth(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'Xauthority')
+        self.hostname = socket.gethostname().encode()
+        self.fixture = raw_entry(256, self.hostname, b'10',
+                b'MIT-MAGIC-COOKIE-1', COOKIE_LOCAL) \
+            + raw_entry(0, socket.inet_aton('192.168.1.7'), b'0',
+                b'MIT-MAGIC-COOKIE-1', COOKIE_REMOTE) \
+            + raw_entry(65535, b'', b'3', b'MIT-MAGIC-COOKIE-1', COOKIE_WILD)
+        with open(self.path, 'wb') as f:
+            f.write(self.fixture)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_parse_and_pack_roundtrip(self):
+        entries = xauth.read_entries(self.path)
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries[0].family, xauth.FAMILY_LOCAL)
+        self.assertEqual(entries[0].number, b'10')
+        self.assertEqual(entries[1].data, COOKIE_REMOTE)
+        self.assertEqual(b''.join(e.pack() for e in entries), self.fixture)
+
+    def test_corrupted_file(self):
+        with self.assertRaises(ValueError):
+            xauth.parse(self.fixture[:-3])
+
+    def test_missing_file(self):
+        self.assertEqual(xauth.read_entries(self.path + '.missing'), [])
+
+    def test_parse_display(self):
+        self.assertEqual(xauth.parse_display('localhost:10.0'),
+                         ('localhost', '10'))
+        self.assertEqual(xauth.parse_display(':1'), ('', '1'))
+        self.assertEqual(xauth.parse_display('[::1]:2'), ('::1', '2'))
+        with self.assertRaises(ValueError):
+            xauth.parse_display('localhost')
+
+    def test_find_cookie(self):
+        local = xauth.find_cookie('localhost:10.0', self.path)
+        self.assertEqual(local.data, COOKIE_LOCAL)
+        local = xauth.find_cookie(self.hostname.decode() + ':10', self.path)
+        self.assertEqual(local.data, COOKIE_LOCAL)
+        remote = xauth.find_cookie('192.168.1.7:0', self.path)
+        self.assertEqual(remote.data, COOKIE_REMOTE)
+        wild = xauth.find_cookie('10.0.0.1:3', self.path)
+        self.assertEqual(wild.data, COOKIE_WILD)
+        self.assertIsNone(xauth.find_cookie(':4', self.path))
+
+    def test_merge_entry_replaces_existing(self):
+        target = os.path.join(self.tmpdir.name, 'docker.xauth')
+        entry = xauth.find_cookie(':10', self.path).wildcard()
+        xauth.merge_entry(target, entry)
+        xauth.merge_entry(target, entry)
+        entries = xauth.read_entries(target)
+        self.assertEqual(entries, [entry])
+        self.assertEqual(entries[0].family, xauth.FAMILY_WILD)
+        self.assertEqual(entries[0].address, self.hostname)
+
+        # A new cookie for the same display replaces the old one
+        new = xauth.XauthEntry(xauth.FAMILY_WILD, self.hostname, b'10',
+            b'MIT-MAGIC-COOKIE-1', COOKIE_REMOTE)
+        xauth.merge_entry(target, new)
+        self.assertEqual(xauth.read_entries(target), [new])
+
+    def test_write_keeps_permissions(self):
+        os.chmod(self.path, 0o600)
+        xauth.write_entries(self.path, xauth.read_entries(self.path)[:1])
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        self.assertEqual(os.listdir(self.tmpdir.name), ['Xauthority'])
+
+    @unittest.skipUnless(shutil.which('xauth'), 'xauth is not installed')
+    def test_compatible_with_xauth(self):
+        target = os.path.join(self.tmpdir.name, 'docker.xauth')
+        xauth.merge_entry(target, xauth.find_cookie(':10', self.path).wildcard())
+        out = subprocess.run(['xauth', '-f', target, 'nlist'],
+            capture_output=True, check=True).stdout.decode()
+        self.assertEqual(out.split()[0], 'ffff')
+        self.assertEqual(out.split()[-1], COOKIE_LOCAL.hex())
+
+    def test_prepare_environment_tcp(self):
+        tmpdir = self.tmpdir.name
+        dl = dockerx.DockerLauncher
+        with unittest.mock.patch.dict(os.environ, {'DISPLAY': 'localhost:10',
+                    'XAUTHORITY': self.path}), \
+                unittest.mock.patch.object(dl, 'get_x11_server_socket_type',
+                    return_value='tcp'), \
+                unittest.mock.patch('tempfile.gettempdir',
+                    return_value=tmpdir), \
+                unittest.mock.patch('subprocess.Popen') as popen:
+            options = dl.prepare_environment(None, False, {}, {}, None,
+                use_cache=False)
+        popen.assert_not_called()
+        env = options['environment']
+        self.assertEqual(env['DISPLAY'], '127.0.0.1:10')
+        entries = xauth.read_entries(env['XAUTHORITY'])
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].family, xauth.FAMILY_WILD)
+        self.assertEqual(entries[0].data, COOKIE_LOCAL)
+        self.assertIn(env['XAUTHORITY'], options['volumes'])
+
+
+class TestXauthFileStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = xauth.XauthFileStore(os.path.join(self.tmpdir.name, 'x'))
+        self.entry = xauth.XauthEntry(xauth.FAMILY_WILD, b'', b'10',
+            b'MIT-MAGIC-COOKIE-1', COOKIE_LOCAL)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_one_entry_per_file_and_reuse(self):
+        path = self.store.get('localhost:10', self.entry)
+        self.assertEqual(xauth.read_entries(path), [self.entry])
+        self.assertEqual(self.store.get('localhost:10', self.entry), path)
+        self.assertEqual(self.store.writes, 1)
+        self.assertEqual(os.stat(self.store.folder()).st_mode & 0o777, 0o700)
+
+        # Each display has its own file
+        other = self.store.get('localhost:11', self.entry)
+        self.assertNotEqual(other, path)
+
+    def test_new_cookie_replaces_unused_file(self):
+        old = self.store.get('localhost:10', self.entry)
+        self.store.acquire(old)
+        new_entry = xauth.XauthEntry(xauth.FAMILY_WILD, b'', b'10',
+            b'MIT-MAGIC-COOKIE-1', COOKIE_REMOTE)
+        new = self.store.get('localhost:10', new_entry)
+        self.assertNotEqual(new, old)
+
+        # The old file is deleted once the last container using it is gone
+        self.assertTrue(os.path.exists(old))
+        self.store.release(old)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+
+        self.assertEqual(self.store.cleanup(), 1)
+        self.assertEqual(os.listdir(self.store.folder()), [])
+
+    def test_concurrent_gets(self):
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as ex:
+            paths = set(ex.map(lambda _: self.store.get('localhost:10',
+                self.entry), range(64)))
+        self.assertEqual(len(paths), 1)
+        self.assertEqual(self.store.writes, 1)
+        self.assertEqual(os.listdir(self.store.folder()),
+                         [os.path.basename(paths.pop())])
+
+    def test_launcher_releases_file_on_remove(self):
+        import docker
+        from fake_engine import FakeEngine
+        dl_class = dockerx.DockerLauncher
+        with FakeEngine(images=['ubuntu']) as engine, \
+                unittest.mock.patch.object(dl_class, 'xauth_files',
+                    self.store), \
+                unittest.mock.patch.object(dl_class, 'x11_cache',
+                    dockerx.X11EnvironmentCache()), \
+                unittest.mock.patch.object(dl_class,
+                    'get_x11_server_socket_type', return_value='tcp'), \
+                unittest.mock.patch.dict(os.environ,
+                    {'DISPLAY': '127.0.0.1:10'}), \
+                unittest.mock.patch.object(xauth, 'find_cookie',
+                    return_value=self.entry):
+            dl = dl_class()
+            dl.client = docker.DockerClient(base_url=engine.base_url,
+                                            version=FakeEngine.api_version)
+            first = dl.launch_container('ubuntu', ifname=None)
+            dl.launch_container('ubuntu', ifname=None)
+            old = self.store.path_for('127.0.0.1:10', self.entry)
+            self.assertEqual(self.store._refs[old], 2)
+
+            # The cookie changes, e.g. a new ssh -X session
+            self.entry.data = COOKIE_REMOTE
+            dl_class.x11_cache.invalidate()
+            dl.launch_container('ubuntu', ifname=None)
+            self.assertEqual(len(os.listdir(self.store.folder())), 2)
+
+            dl.remove_all()
+            self.assertFalse(os.path.exists(old))
+            self.assertEqual(len(os.listdir(self.store.folder())), 1)
+            self.assertNotIn(first.id, dl._xauth_paths)
+
+    def test_launcher_releases_file_on_failed_start(self):
+        import docker
+        from fake_engine import FakeEngine
+        dl_class = dockerx.DockerLauncher
+        with FakeEngine(images=['ubuntu']) as engine, \
+                unittest.mock.patch.object(dl_class, 'xauth_files',
+                    self.store), \
+                unittest.mock.patch.object(dl_class, 'x11_cache',
+                    dockerx.X11EnvironmentCache()), \
+                unittest.mock.patch.object(dl_class,
+                    'get_x11_server_socket_type', return_value='tcp'), \
+                unittest.mock.patch.dict(os.environ,
+                    {'DISPLAY': '127.0.0.1:10'}), \
+                unittest.mock.patch.object(xauth, 'find_cookie',
+                    return_value=self.entry):
+            dl = dl_class()
+            dl.client = docker.DockerClient(base_url=engine.base_url,
+                                            version=FakeEngine.api_version)
+            engine.start_error = 'cannot start container'
+            with self.assertRaises(docker.errors.APIError):
+                dl.launch_container('ubuntu', ifname=None)
+            path = self.store.path_for('127.0.0.1:10', self.entry)
+            self.assertEqual(self.store._refs[path], 0)
+            self.assertEqual(dl._xauth_paths, {})
+            self.assertEqual(engine.containers, {})
+
+
+if __name__ == '__main__':
+    unittest.main()